@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+"""Import time of the bitso package.
+
+Runs each statement in a fresh interpreter and reports the median wall
+time. On Python 3.7+ the slowest modules from `python -X importtime`
+are listed too. Exits with status 1 if `import bitso` loads any of the
+heavy dependencies, so it can be used as a regression check.
+
+    $ python benchmarks/bench_import.py [runs]
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ('requests', 'websocket', 'dateutil')
+
+STATEMENTS = [
+    'import bitso',
+    'import bitso; bitso.Api',
+    'import bitso; bitso.api.requests.get',
+    'import bitso; bitso.LiveOrderBook',
+    'import bitso; bitso.Client',
+]
+
+TIMER = '''
+import sys, time
+start = time.time()
+exec(sys.argv[1])
+elapsed = time.time() - start
+print("%%f %%s" %% (elapsed, ",".join(m for m in %r if m in sys.modules)))
+''' % (HEAVY,)
+
+
+def run(statement):
+    output = subprocess.check_output([sys.executable, '-c', TIMER, statement], cwd=ROOT)
+    elapsed, loaded = output.decode('ascii').split(' ', 1)
+    return float(elapsed), loaded.strip()
+
+
+def importtime(statement, top=10):
+    process = subprocess.Popen([sys.executable, '-X', 'importtime', '-c', statement],
+                               cwd=ROOT, stderr=subprocess.PIPE, stdout=subprocess.PIPE)
+    _, err = process.communicate()
+    rows = []
+    for line in err.decode('utf-8').splitlines()[1:]:
+        parts = line.split('|')
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+if __name__ == '__main__':
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 9
+    failed = False
+    for statement in STATEMENTS:
+        results = sorted(run(statement) for _ in range(runs))
+        elapsed, loaded = results[runs // 2]
+        print("%-40s %8.1f ms  loaded: %s" % (statement, elapsed * 1000, loaded or '-'))
+        if statement == 'import bitso' and loaded:
+            failed = True
+    if sys.version_info >= (3, 7):
+        print("\nslowest modules for 'import bitso; bitso.Api' (cumulative us):")
+        for cumulative, name in importtime('import bitso; bitso.Api'):
+            print("%10d %s" % (cumulative, name))
+    if failed:
+        print("\n'import bitso' loaded heavy dependencies")
+        sys.exit(1)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+"""Memory and throughput of LiveOrderBook in 'L2' and 'L3' mode.
+
+Loads a synthetic snapshot, then replays a stream of diff-orders
+updates (new orders, partial fills and cancellations).
+
+    $ python benchmarks/bench_livebook.py
+"""
+
+import gc
+import random
+import sys
+import os
+import time
+from decimal import Decimal
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitso
+from bitso.models import OrderBook, StreamUpdate
+
+ORDERS = 20000
+LEVELS = 500
+UPDATES = 100000
+
+
+def sizeof(obj, seen=None):
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += sizeof(key, seen) + sizeof(value, seen)
+    elif isinstance(obj, (list, tuple, set)):
+        for item in obj:
+            size += sizeof(item, seen)
+    elif hasattr(obj, '__dict__'):
+        size += sizeof(obj.__dict__, seen)
+    return size
+
+
+def snapshot(rng):
+    bids, asks = [], []
+    for i in range(ORDERS):
+        side, sign = (bids, -1) if i % 2 else (asks, 1)
+        price = Decimal(10000 + sign * rng.randint(1, LEVELS))
+        side.append({'book': 'btc_mxn', 'price': price, 'amount': '0.5', 'oid': 'o%d' % i})
+    return OrderBook._NewFromJsonDict({'updated_at': '2017-01-01T00:00:00+00:00',
+                                       'sequence': '0', 'bids': bids, 'asks': asks})
+
+
+def updates(rng):
+    messages = []
+    for seq in range(1, UPDATES + 1):
+        oid = 'o%d' % rng.randint(0, ORDERS * 2)
+        side = int(oid[1:]) % 2
+        price = 10000 + (1 - 2 * side) * rng.randint(1, LEVELS)
+        elem = {'d': seq, 'r': str(price), 't': side, 'o': oid, 's': 'open'}
+        if rng.random() < 0.7:
+            elem['a'] = '0.25'
+        messages.append(StreamUpdate({'type': 'diff-orders', 'book': 'btc_mxn',
+                                      'sequence': seq, 'payload': [elem]}))
+    return messages
+
+
+if __name__ == '__main__':
+    rng = random.Random(1)
+    order_book = snapshot(rng)
+    messages = updates(rng)
+    for mode in ('L2', 'L3'):
+        book = bitso.LiveOrderBook('btc_mxn', mode=mode)
+        book.load_snapshot(order_book)
+        memory = sizeof((book.bids, book.asks))
+        gc.collect()
+        start = time.time()
+        for data in messages:
+            book.on_update(data)
+        elapsed = time.time() - start
+        print "mode=%s  memory: %8.1f KiB  updates: %9.0f/s" % (
+            mode, memory / 1024.0, UPDATES / elapsed)
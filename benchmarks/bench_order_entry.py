@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+"""Load test of order entry against a SimulatedExchange.
+
+Several threads place, look up and cancel limit orders around the mid
+of a synthetic book, and one in five orders crosses the spread. Prints
+throughput and the exchange's ack and fill latency report.
+
+    $ python benchmarks/bench_order_entry.py [threads] [orders per thread]
+"""
+
+import random
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitso
+
+THREADS = 4
+ORDERS = 200
+
+
+def trader(api, seed, orders):
+    rng = random.Random(seed)
+    for i in range(orders):
+        side = rng.choice(['buy', 'sell'])
+        cross = rng.random() < 0.2
+        offset = rng.randint(1, 50) * (1 if (side == 'buy') == cross else -1)
+        oid = api.place_order(book='btc_mxn', side=side, order_type='limit',
+                              major='0.01', price=str(100000 + offset * 100))['oid']
+        api.lookup_order([oid])
+        api.cancel_order(oid)
+
+
+def milliseconds(histogram):
+    return ' '.join('%s=%.2fms' % (key, histogram[key] * 1000)
+                    for key in ('p50', 'p90', 'p99', 'max') if histogram[key] is not None)
+
+
+if __name__ == '__main__':
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else THREADS
+    orders = int(sys.argv[2]) if len(sys.argv) > 2 else ORDERS
+    exchange = bitso.SimulatedExchange({'btc_mxn': bitso.synthetic_order_book('btc_mxn', '100000', levels=50, step='0.001')})
+    exchange.start()
+    api = bitso.Api('key', 'secret')
+    exchange.connect(api)
+    start = time.time()
+    workers = [threading.Thread(target=trader, args=(api, seed, orders)) for seed in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.time() - start
+    time.sleep(0.1)
+    exchange.stop()
+    report = exchange.latency.report()
+    print "orders: %d  %.0f orders/s" % (report['orders'], report['orders'] / elapsed)
+    print "ack:  %s" % milliseconds(report['ack'])
+    print "fill: %s (%d filled)" % (milliseconds(report['fill']), report['filled'])
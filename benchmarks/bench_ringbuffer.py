@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+"""Records per second through the shared-memory ring buffer.
+
+One producer process writes trades records while several consumer
+processes follow the buffer, each reporting its own throughput and the
+records it lost to overruns.
+
+    $ python benchmarks/bench_ringbuffer.py [consumers]
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitso
+from bitso.models import StreamUpdate
+
+N = 100000
+BATCH = 100
+
+
+def produce(writer):
+    data = StreamUpdate({'type': 'trades', 'book': 'btc_mxn', 'payload': [
+        {'i': i, 'a': '0.5', 'r': '5000', 'v': '2500', 't': 1} for i in range(BATCH)]})
+    start = time.time()
+    for _ in range(N // BATCH):
+        writer.write(data)
+    return N / (time.time() - start)
+
+
+def consume(path, decode, ready, results):
+    reader = bitso.RingReader(path, start='earliest')
+    ready.put(None)
+    read = reader.read if decode else reader.read_raw
+    count = 0
+    start = None
+    while count + reader.dropped < N:
+        records = read(4096)
+        if not records:
+            time.sleep(0.001)
+            continue
+        if start is None:
+            start = time.time()
+        count += len(records)
+    results.put((count, reader.dropped, count / (time.time() - start)))
+
+
+if __name__ == '__main__':
+    consumers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    path = os.path.join(tempfile.mkdtemp(), 'stream')
+    for decode in (False, True):
+        writer = bitso.RingWriter(path, capacity=65536)
+        ready = multiprocessing.Queue()
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=consume, args=(path, decode, ready, results))
+                     for _ in range(consumers)]
+        for process in processes:
+            process.start()
+        for _ in processes:
+            ready.get()
+        rate = produce(writer)
+        print "%s  producer: %9.0f records/s" % ('StreamRecord' if decode else 'raw tuples  ', rate)
+        for process in processes:
+            count, dropped, rate = results.get()
+            process.join()
+            print "    consumer: %9.0f records/s  read: %d  dropped: %d" % (rate, count, dropped)
+        writer.close()
+    os.remove(path)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+"""Signatures per second for private requests.
+
+Compares re-keying the HMAC on every request (the previous behaviour)
+against bitso.Signer, with one and several threads.
+
+    $ python benchmarks/bench_signing.py
+"""
+
+import hashlib
+import hmac
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitso
+
+N = 50000
+SECRET = 'x' * 32
+PATH = '/api/v3/orders/'
+PAYLOAD = '{"book": "btc_mxn", "side": "buy", "type": "limit", "major": "0.01", "price": "7000"}'
+
+
+def rekeyed(n):
+    for _ in range(n):
+        nonce = str(int(round(time.time() * 1000000)))
+        hmac.new(SECRET.encode('utf-8'),
+                 (nonce+'POST'+PATH+PAYLOAD).encode('utf-8'),
+                 hashlib.sha256).hexdigest()
+
+
+def run(func, threads):
+    per_thread = N // threads
+    workers = [threading.Thread(target=func, args=(per_thread,)) for _ in range(threads)]
+    start = time.time()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return per_thread * threads / (time.time() - start)
+
+
+if __name__ == '__main__':
+    signer = bitso.Signer('key', SECRET)
+    def signed(n):
+        for _ in range(n):
+            signer.auth_header('POST', PATH, PAYLOAD)
+
+    for threads in (1, 2, 4, 8):
+        print "threads=%d  rekeyed: %10.0f sig/s  signer: %10.0f sig/s" % (
+            threads, run(rekeyed, threads), run(signed, threads))
@@ -23,41 +23,105 @@
 #OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #SOFTWARE.
 
+"""Python client for the Bitso API.
 
-from .errors import (ApiError, ApiClientError)
+Names are imported from their submodules on first use, so `import bitso`
+does not load requests, websocket-client or dateutil until they are
+needed.
+"""
+
+import sys
+import types
 
-from .models import (
-    Ticker,
-    OrderBook,
-    Balance,
-    Balances,
-    Fee,
-    Fees,
-    Trade,
-    UserTrade,
-    Order,
-    TransactionQuote,
-    TransactionOrder,
-    LedgerEntry,
-    BalanceUpdate,
-    FundingDestination,
-    Withdrawal,
-    Funding,
-    Book,
-    AvailableBooks,
-    AccountStatus,
-    AccountRequiredField
-)
-
-
-from .api import Api
-from .bitsows import (Listener, Client)
+from .errors import (ApiError, ApiClientError)
 
 __author__       = 'Mario Romero'
 __email__        = 'mario@romero.fm'
 __version__      = '0.2.0'
 __copyright__    = 'Copyright (c) 2016 Mario Romero'
 __license__      = 'The MIT License (MIT)'
- 
 
 
+_submodules = {
+    'models': (
+        'Ticker',
+        'OrderBook',
+        'Balance',
+        'Balances',
+        'Fee',
+        'Fees',
+        'Trade',
+        'UserTrade',
+        'Order',
+        'TransactionQuote',
+        'TransactionOrder',
+        'LedgerEntry',
+        'BalanceUpdate',
+        'FundingDestination',
+        'Withdrawal',
+        'Funding',
+        'Book',
+        'AvailableBooks',
+        'AccountStatus',
+        'AccountRequiredField',
+    ),
+    'ratelimit': ('RateLimiter',),
+    'auth': ('NonceGenerator', 'Signer'),
+    'keypool': ('KeyPool',),
+    'tracing': ('RecordingTracer', 'Span'),
+    'metrics': ('ApiMetrics', 'Histogram', 'RequestHook', 'RequestInfo'),
+    'api': ('Api',),
+    'bitsows': ('Listener', 'ListenerGroup', 'Client'),
+    'orderstore': ('OrderStore', 'TrackedOrder'),
+    'history': ('HistoryStore', 'HistorySync'),
+    'projector': ('BalanceProjector', 'ProjectedBalance'),
+    'candles': ('Candle', 'CandleSeries', 'CandleAggregator'),
+    'rollingstats': ('RollingTradeStats', 'WindowStats'),
+    'livebook': ('LiveOrderBook', 'TopOfBookEvent'),
+    'shm': ('BookSnapshot', 'SnapshotPublisher', 'SnapshotReader', 'SnapshotWriter'),
+    'ringbuffer': ('RingPublisher', 'RingReader', 'RingWriter', 'StreamRecord'),
+    'bookwalk': ('BookWalker', 'FillEstimate'),
+    'validation': ('BookRules', 'OrderValidator'),
+    'export': ('HistoryExporter',),
+    'poller': ('AdaptivePoller', 'BookDiff'),
+    'bookdiff': ('diff_order_books',),
+    'simulator': ('LatencyReport', 'MatchingEngine', 'SimulatedExchange', 'synthetic_order_book'),
+    'lifecycle': ('LifecycleTracker', 'OrderTimeline'),
+    'feedmonitor': ('FeedMonitor', 'FeedStats'),
+}
+
+_lazy_names = dict((name, submodule)
+                   for submodule, names in _submodules.items()
+                   for name in names)
+
+__all__ = ['ApiError', 'ApiClientError'] + sorted(_lazy_names)
+
+
+class _LazyPackage(types.ModuleType):
+    """The bitso package, importing public names on first access."""
+
+    def __getattr__(self, name):
+        if name in _submodules:
+            return __import__('%s.%s' % (self.__name__, name), fromlist=['__name__'])
+        submodule = _lazy_names.get(name)
+        if submodule is None:
+            raise AttributeError("module %r has no attribute %r" % (self.__name__, name))
+        module = __import__('%s.%s' % (self.__name__, submodule), fromlist=[name])
+        value = getattr(module, name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(_lazy_names))
+
+
+def _install():
+    package = sys.modules[__name__]
+    lazy = _LazyPackage(__name__, package.__doc__)
+    lazy.__dict__.update(package.__dict__)
+    # keep the original module alive, Python 2 clears the globals of
+    # collected modules
+    lazy.__dict__['_package'] = package
+    sys.modules[__name__] = lazy
+
+_install()
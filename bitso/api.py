@@ -24,22 +24,105 @@
 #SOFTWARE.
 
 
+import functools
 import hashlib
 import hmac
 import json
+import random
+import threading
 import time
-import requests
+from Queue import Queue, Empty
 from urlparse import urlparse
 from urllib import urlencode
 
 
 from bitso import (ApiError, ApiClientError, Ticker, OrderBook, Balances, Fees, Trade, UserTrade, Order, TransactionQuote, TransactionOrder, LedgerEntry, FundingDestination, Withdrawal, Funding, AvailableBooks, AccountStatus, AccountRequiredField)
+from .utils import (map_concurrently, chunk_ids, LazyModule)
+from .auth import Signer
+from .metrics import (ApiMetrics, RequestInfo)
+from .parsers import OrderBookParser
+
+requests = LazyModule('requests')
 
 
 def current_milli_time():
     nonce =  str(int(round(time.time() * 1000000)))
     return nonce
-    
+
+
+_calls = threading.local()
+
+
+class _ApiCall(object):
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.started = time.time()
+        self.requests = []
+
+
+def _run_call(api, name, func, args, kwargs, out=None):
+    stack = getattr(_calls, 'stack', None)
+    if stack is None:
+        stack = _calls.stack = []
+    call = _ApiCall(name)
+    if out is not None:
+        out.append(call)
+    stack.append(call)
+    failed = True
+    try:
+        result = func(api, *args, **kwargs)
+        failed = False
+        return result
+    finally:
+        stack.pop()
+        if call.requests:
+            if not failed:
+                last = call.requests[-1]
+                model = max(0.0, time.time() - call.started - sum(r.timings['total'] for r in call.requests))
+                last.timings['model'] = model
+                last.timings['total'] += model
+            if api.metrics is not None:
+                for request in call.requests:
+                    api.metrics.record(request)
+
+
+def _api_call(func=None, endpoint=None):
+    """Marks an Api method as an endpoint for hooks and metrics.
+
+    Requests made while the method runs are reported under its name, and
+    the time spent after the last response arrives is recorded as the
+    'model' phase. With a tracer set, each call runs inside a span.
+    """
+    if func is None:
+        return lambda f: _api_call(f, endpoint)
+    name = endpoint or func.__name__
+    argnames = func.__code__.co_varnames[1:func.__code__.co_argcount]
+    book_index = argnames.index('book') if 'book' in argnames else None
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if self.tracer is None:
+            return _run_call(self, name, func, args, kwargs)
+        attributes = {'bitso.endpoint': name}
+        book = kwargs.get('book')
+        if book is None and book_index is not None and len(args) > book_index:
+            book = args[book_index]
+        if book is not None:
+            attributes['bitso.book'] = book
+        with self.tracer.start_as_current_span('bitso.api.%s' % name, attributes=attributes) as span:
+            call = []
+            result = _run_call(self, name, func, args, kwargs, call)
+            if call and call[0].requests:
+                last = call[0].requests[-1]
+                span.set_attribute('http.method', last.method)
+                span.set_attribute('http.status_code', last.status_code)
+                span.set_attribute('bitso.requests', len(call[0].requests))
+            sequence = getattr(result, 'sequence', None)
+            if sequence is not None:
+                span.set_attribute('bitso.sequence', sequence)
+            return result
+    return wrapper
+
 
 class Api(object):
     """A python interface for the Bitso API
@@ -65,7 +148,8 @@ class Api(object):
         >>> print balance.mxn_available
     """
     
-    def __init__(self, key=None, secret=None):
+    def __init__(self, key=None, secret=None, rate_limiter=None, max_workers=8, max_url_length=2000, nonce_generator=None, key_pool=None, metrics=None, hooks=None, tracer=None,
+                 timeout=10.0, timeouts=None, max_retries=2, backoff=0.1, hedge=False, hedge_delay=None, validator=None):
         """Instantiate a bitso.Api object.
         
         Args:
@@ -73,6 +157,44 @@ class Api(object):
             Bitso API Key 
           secret:
             Bitso API Secret
+          rate_limiter (bitso.RateLimiter, optional):
+            Every request waits on this limiter before being sent,
+            retries and hedged copies included
+          max_workers (int, optional):
+            Number of concurrent requests used by batch calls. Default is 8
+          max_url_length (int, optional):
+            Longest URL batch calls will build when joining Order IDs. Default is 2000
+          nonce_generator (bitso.NonceGenerator, optional):
+            Source of nonces for signed requests. Share one created with a
+            `path` between processes that use the same key
+          key_pool (bitso.KeyPool, optional):
+            Signs private requests with several keys instead of key/secret
+          metrics (bitso.ApiMetrics, optional):
+            Collector for per-endpoint metrics. A new one is created if
+            None; set api.metrics to None to stop collecting
+          hooks (list, optional):
+            A list of bitso.RequestHook instances
+          tracer (optional):
+            An OpenTelemetry compatible tracer. Every call runs in a span
+            carrying the endpoint, book and sequence number
+          timeout (float, optional):
+            Seconds to wait for the server before giving up. Default is 10.0
+          timeouts (dict, optional):
+            Per-endpoint timeouts, e.g. {'order_book': 30.0}
+          max_retries (int, optional):
+            Times a GET is retried after a connection error, timeout,
+            429 or 5xx response. Default is 2
+          backoff (float, optional):
+            Base delay in seconds between retries, doubled on each one
+          hedge (bool, optional):
+            Send a second copy of slow ticker and order_book requests and
+            use whichever answers first. Default is False
+          hedge_delay (float, optional):
+            Seconds to wait before hedging. If None, the endpoint's p95
+            server time is used once enough requests have been seen
+          validator (bitso.OrderValidator, optional):
+            Checks and quantizes orders against cached book limits before
+            place_order sends them
 
   
         """
@@ -80,7 +202,37 @@ class Api(object):
         self.base_url = "https://bitso.com/api/v3"
         self.key = key
         self._secret = secret
-
+        self.rate_limiter = rate_limiter
+        self.max_workers = max_workers
+        self.max_url_length = max_url_length
+        self._signer = None
+        if key is not None and secret is not None:
+            self._signer = Signer(key, secret, nonce_generator)
+        self.key_pool = key_pool
+        self.metrics = metrics if metrics is not None else ApiMetrics()
+        self.hooks = list(hooks or [])
+        self.tracer = tracer
+        self.stream_chunk_size = 16384
+        self.timeout = timeout
+        self.timeouts = dict(timeouts or {})
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.retry_statuses = (429, 500, 502, 503, 504)
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.hedge_endpoints = ('ticker', 'order_book')
+        self.hedge_default_delay = 0.25
+        self.hedge_min_samples = 20
+        self.validator = validator
+
+    def add_hook(self, hook):
+        """Registers a bitso.RequestHook to observe every request."""
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    @_api_call
     def available_books(self):
         """
         Returns:
@@ -91,6 +243,7 @@ class Api(object):
         return AvailableBooks._NewFromJsonDict(resp)
 
         
+    @_api_call
     def ticker(self, book):
         """Get a Bitso price ticker.
 
@@ -109,7 +262,8 @@ class Api(object):
         return Ticker._NewFromJsonDict(resp['payload'])
 
 
-    def order_book(self, book, aggregate=True):
+    @_api_call
+    def order_book(self, book, aggregate=True, depth=None, stream=False):
         """Get a public Bitso order book with a 
         list of all open orders in the specified book
         
@@ -119,6 +273,12 @@ class Api(object):
             Specifies which book to use. Default is btc_mxn
           aggregate (bool):
             Specifies if orders should be aggregated by price
+          depth (int, optional):
+            Only keep the best `depth` levels on each side. Levels past
+            it are skipped while parsing. Implies stream=True
+          stream (bool, optional):
+            Parse the response as it downloads, building price levels
+            as their bytes arrive instead of after the whole body is read
             
         Returns:
           A bitso.OrderBook instance.
@@ -129,9 +289,13 @@ class Api(object):
         parameters = {}
         parameters['book'] = book
         parameters['aggregate'] = aggregate
-        resp = self._request_url(url, 'GET', params=parameters)
+        parser = None
+        if stream or depth is not None:
+            parser = OrderBookParser(depth)
+        resp = self._request_url(url, 'GET', params=parameters, parser=parser)
         return OrderBook._NewFromJsonDict(resp['payload'])
 
+    @_api_call
     def trades(self, book, **kwargs):
         """Get a list of recent trades from the specified book.
 
@@ -167,6 +331,7 @@ class Api(object):
 
 
         
+    @_api_call
     def account_status(self):
         """
         Get a user's account status.
@@ -179,6 +344,7 @@ class Api(object):
         return AccountStatus._NewFromJsonDict(resp['payload'])
 
         
+    @_api_call
     def account_required_fields(self):
         """
         This endpoint returns a list of required fields and their 
@@ -192,6 +358,7 @@ class Api(object):
         return [AccountRequiredField._NewFromJsonDict(x) for x in resp['payload']]
 
 
+    @_api_call
     def create_account(self, **kwargs):
         """This endpoint creates a new Bitso user account.
                 
@@ -209,6 +376,7 @@ class Api(object):
         return resp['payload']
 
     
+    @_api_call
     def register_phone(self, phone_number):
         """This endpoint is used to register Mobile phone number for verification.
 
@@ -227,6 +395,7 @@ class Api(object):
         return resp['payload']
 
 
+    @_api_call
     def verify_phone(self, verification_code):
         """This endpoint is used to verify a registered mobile phone number
 
@@ -246,6 +415,7 @@ class Api(object):
         return resp['payload']
 
     
+    @_api_call
     def balances(self):
         """Get a user's balance.
 
@@ -258,6 +428,7 @@ class Api(object):
         return Balances._NewFromJsonDict(resp['payload'])
 
   
+    @_api_call
     def fees(self):
         """Get a user's fees for all availabel order books.
 
@@ -271,6 +442,7 @@ class Api(object):
 
 
 
+    @_api_call
     def ledger(self, operations='', marker=None, limit=25, sort='desc'):
         """Get the ledger of user operations 
 
@@ -304,6 +476,7 @@ class Api(object):
         return [LedgerEntry._NewFromJsonDict(entry) for entry in resp['payload']]
 
 
+    @_api_call
     def withdrawals(self, wids=[], marker=None, limit=25, sort='desc'):
         """Get the ledger of user operations 
 
@@ -339,6 +512,7 @@ class Api(object):
         return [Withdrawal._NewFromJsonDict(entry) for entry in resp['payload']]
 
 
+    @_api_call
     def fundings(self, fids=[], marker=None, limit=25, sort='desc'):
         """Get the ledger of user operations 
 
@@ -375,6 +549,7 @@ class Api(object):
 
     
         
+    @_api_call
     def user_trades(self, tids=[], book=None, marker=None, limit=25, sort='desc'):
         """Get a list of the user's transactions
 
@@ -402,9 +577,9 @@ class Api(object):
         tids = map(str, tids)
         if tids:
             url+='%s/' % ('-'.join(tids))            
-        if book:
-            url+='?book=%s' % book
         parameters = {}
+        if book:
+            parameters['book'] = book
         if marker:
             parameters['marker'] = marker
         if limit:
@@ -417,19 +592,36 @@ class Api(object):
         return [UserTrade._NewFromJsonDict(x) for x in resp['payload']]
     
 
-    def open_orders(self, book=None):
+    @_api_call
+    def open_orders(self, book=None, marker=None, limit=None, sort=None):
         """Get a list of the user's open orders
 
         Args:
           book (str):
             Specifies which book to use. Default is btc_mxn
+          marker (str, optional):
+            Returns objects that are older or newer (depending on 'sort') than the object which
+            has the marker value as ID
+          limit (int, optional):
+            Limit the number of results to parameter value, max=100, default=25
+          sort (str, optional):
+            Sorting by datetime: 'asc', 'desc'
             
         Returns:
           A list of bitso.Order instances.        
         """
         url = '%s/open_orders/' % self.base_url
-        url+='?book=%s' % book
         parameters = {}
+        if book:
+            parameters['book'] = book
+        if marker:
+            parameters['marker'] = marker
+        if limit:
+            parameters['limit'] = limit
+        if sort:
+            if not isinstance(sort, basestring) or sort.lower() not in ['asc', 'desc']:
+                 raise ApiClientError({u'message': u"sort is not 'asc' or 'desc' "})
+            parameters['sort'] = sort
         resp = self._request_url(url, 'GET', params=parameters, private=True)
         return [Order._NewFromJsonDict(x) for x in resp['payload']]
 
@@ -437,6 +629,9 @@ class Api(object):
     def lookup_order(self, oids):
         """Get a list of details for one or more orders
 
+        Large lists of Order IDs are split into several requests that are
+        sent concurrently.
+
         Args:
           order_ids (list):
             A list of Bitso Order IDs
@@ -446,6 +641,44 @@ class Api(object):
         """
         if isinstance(oids, basestring):
             oids = [oids]
+        if not oids:
+            return self._lookup_order_chunk([])
+        orders = []
+        for result in map_concurrently(self._lookup_order_chunk,
+                                       self._chunk_oids(oids),
+                                       self.max_workers):
+            if isinstance(result, Exception):
+                raise result
+            orders.extend(result)
+        return orders
+
+    def lookup_orders(self, oids):
+        """Get the details of many orders, one result per Order ID.
+
+        Args:
+          order_ids (list):
+            A list of Bitso Order IDs
+            
+        Returns:
+          A list with one entry per Order ID, in the same order. Each entry
+          is a bitso.Order instance, None if Bitso did not return that order,
+          or the exception raised by the request that included it.
+        """
+        chunks = self._chunk_oids(oids)
+        found = {}
+        failed = {}
+        results = map_concurrently(self._lookup_order_chunk, chunks, self.max_workers)
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, Exception):
+                for oid in chunk:
+                    failed[oid] = result
+                continue
+            for order in result:
+                found[order.oid] = order
+        return [failed.get(oid, found.get(oid)) for oid in oids]
+
+    @_api_call(endpoint='lookup_order')
+    def _lookup_order_chunk(self, oids):
         url = '%s/orders/' % self.base_url
         if oids:
             url+='%s/' % ('-'.join(oids))
@@ -453,22 +686,65 @@ class Api(object):
         return [Order._NewFromJsonDict(x) for x in resp['payload']]
 
     def cancel_order(self, oids):
-        """Cancels an open order
+        """Cancels one or more open orders
+
+        Large lists of Order IDs are split into several requests that are
+        sent concurrently.
 
         Args:
           order_id (str):
-            A Bitso Order ID.
+            A Bitso Order ID, or a list of them.
             
         Returns:
           A list of Order IDs (OIDs) for the canceled orders. Orders may not be successfully cancelled if they have been filled, have been already cancelled, or the OIDs are incorrect.        
         """
         if isinstance(oids, basestring):
             oids = [oids]        
+        cancelled = []
+        for result in map_concurrently(self._cancel_order_chunk,
+                                       self._chunk_oids(oids),
+                                       self.max_workers):
+            if isinstance(result, Exception):
+                raise result
+            cancelled.extend(result)
+        return cancelled
+
+    def cancel_orders(self, oids):
+        """Cancels many open orders, one result per Order ID.
+
+        Args:
+          order_ids (list):
+            A list of Bitso Order IDs
+            
+        Returns:
+          A list with one entry per Order ID, in the same order. Each entry
+          is True if the order was cancelled, False if Bitso did not cancel
+          it, or the exception raised by the request that included it.
+        """
+        chunks = self._chunk_oids(oids)
+        cancelled = set()
+        failed = {}
+        results = map_concurrently(self._cancel_order_chunk, chunks, self.max_workers)
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, Exception):
+                for oid in chunk:
+                    failed[oid] = result
+                continue
+            cancelled.update(result)
+        return [failed.get(oid, oid in cancelled) for oid in oids]
+
+    @_api_call(endpoint='cancel_order')
+    def _cancel_order_chunk(self, oids):
         url = '%s/orders/' % self.base_url
         url+='%s/' % ('-'.join(oids))
         resp = self._request_url(url, 'DELETE', private=True)
         return resp['payload']
 
+    def _chunk_oids(self, oids):
+        base_length = len('%s/orders/' % self.base_url) + 1
+        return chunk_ids(oids, base_length, self.max_url_length)
+
+    @_api_call
     def place_order(self, **kwargs):
         """Places a buy limit order.
 
@@ -497,6 +773,8 @@ class Api(object):
             raise ApiClientError({u'message': u'side not specified.'})
         if kwargs.get('order_type') is None:
             raise ApiClientError({u'message': u'order type not specified.'})
+        if self.validator is not None:
+            kwargs = self.validator.validate(self, kwargs)
 
         url = '%s/orders/' % self.base_url
         parameters = {}
@@ -513,8 +791,25 @@ class Api(object):
         resp = self._request_url(url, 'POST', params=parameters, private=True)
         return resp['payload']
 
+    def place_orders(self, orders):
+        """Places several orders concurrently.
+
+        Args:
+          orders (list):
+            A list of dictionaries, each one with the arguments
+            accepted by place_order.
+
+        Returns:
+          A list with one entry per order, in the same order. Each entry is
+          the payload returned by place_order, or the exception raised while
+          placing that order.
+        """
+        return map_concurrently(lambda order: self.place_order(**order),
+                                orders,
+                                self.max_workers)
 
 
+    @_api_call
     def funding_destination(self, fund_currency):
         """Returns account funding information for specified currencies.
 
@@ -533,6 +828,7 @@ class Api(object):
         return FundingDestination._NewFromJsonDict(resp['payload']) 
     
 
+    @_api_call
     def btc_withdrawal(self, amount, address):
         """Triggers a bitcoin withdrawal from your account
 
@@ -553,6 +849,7 @@ class Api(object):
         return Withdrawal._NewFromJsonDict(resp['payload'])
 
 
+    @_api_call
     def eth_withdrawal(self, amount, address):
         """Triggers an ether withdrawal from your account
 
@@ -573,6 +870,7 @@ class Api(object):
         return Withdrawal._NewFromJsonDict(resp['payload'])
 
     
+    @_api_call
     def ripple_withdrawal(self, currency, amount, address):
         """Triggers a ripple withdrawal from your account
 
@@ -597,6 +895,7 @@ class Api(object):
         return Withdrawal._NewFromJsonDict(resp['payload'])
 
     
+    @_api_call
     def spei_withdrawal(self, amount=None, first_names=None, last_names=None, clabe=None, notes_ref=None, numeric_ref=None):
         """Triggers a SPEI withdrawal from your account.
         These withdrawals are immediate during banking hours for some banks (M-F 9:00AM - 5:00PM Mexico City Time), 24 hours for others.
@@ -634,6 +933,7 @@ class Api(object):
         return Withdrawal._NewFromJsonDict(resp['payload'])
 
 
+    @_api_call
     def debit_card_withdrawal(self, amount=None, first_names=None, last_names=None, card_number=None, bank_code=None):
         """Triggers a Debit Cards withdrawal from your account. These withdrawals are immediate during banking hours for some 
         banks (M-F 9:00AM - 5:00PM Mexico City Time), 24 hours for others.
@@ -671,6 +971,7 @@ class Api(object):
         return Withdrawal._NewFromJsonDict(resp['payload'])
 
     
+    @_api_call
     def phone_withdrawal(self, amount=None, first_names=None, last_names=None, phone_number=None, bank_code=None):
         """Triggers a withdrawal from your account to a phone number. (Phone number must be registered for SPEI Transfers with their corresponding bank) These withdrawals are immediate during banking hours for some banks (M-F 9:00AM - 5:00PM Mexico City Time), 24 hours for others.
 
@@ -708,6 +1009,7 @@ class Api(object):
     
     
     
+    @_api_call
     def bank_codes(self):
         """Gets codes for banks to be used in debit_card_withdrawal/phone_number_withdrawal
 
@@ -725,6 +1027,7 @@ class Api(object):
         
     
 
+    @_api_call
     def transfer_quote(self, amount=None, btc_amount=None, currency=None):
         """Get a quote for a transfer for various Bitso Outlets.
 
@@ -769,6 +1072,7 @@ class Api(object):
 
 
 
+    @_api_call
     def transfer_create(self,
                         amount=None,
                         btc_amount=None,
@@ -837,6 +1141,7 @@ class Api(object):
         return TransactionOrder._NewFromJsonDict(resp['payload']) 
 
              
+    @_api_call
     def transfer_status(self, transfer_id):
         """Request status for a transfer order 
 
@@ -864,46 +1169,234 @@ class Api(object):
                                            hashlib.sha256).hexdigest()
         return parameters
 
-    def _build_auth_header(self, http_method, url, json_payload=''):
+    def _build_auth_header(self, http_method, url, json_payload='', signer=None):
         if json_payload == {} or json_payload=='{}':
             json_payload = ''
         url_components = urlparse(url)
         request_path = url_components.path
         if url_components.query != '':
             request_path+='?'+url_components.query
-        nonce = current_milli_time()
-        msg_concat = nonce+http_method.upper()+request_path+json_payload
-        signature = hmac.new(self._secret.encode('utf-8'),
-                                 msg_concat.encode('utf-8'),
-                                 hashlib.sha256).hexdigest()
-        return {'Authorization': 'Bitso %s:%s:%s' % (self.key, nonce, signature)}
+        if signer is None:
+            signer = self._signer
+        if signer is None:
+            raise ApiClientError({u'message': u'key and secret are required for private endpoints'})
+        return signer.auth_header(http_method, request_path, json_payload)
 
     
-    def _request_url(self, url, verb, params=None, private=False):
-        headers=None
+    def _request_url(self, url, verb, params=None, private=False, parser=None):
         if params == None:
             params = {}
-        if private:
-            headers = self._build_auth_header(verb, url, json.dumps(params))
-        if verb == 'GET':
-            url = self._build_url(url, params)
-            if private:
-                headers = self._build_auth_header(verb, url)
+        pooled = None
+        if private and self.key_pool is not None:
+            pooled = self.key_pool.acquire(wait=False)
+        stack = getattr(_calls, 'stack', None)
+        call = stack[-1] if stack else None
+        request = RequestInfo(call.endpoint if call else self._endpoint_name(url), verb, url, private, params)
+        failed = False
+        try:
+            for hook in self.hooks:
+                hook.before_request(request)
+            started = time.time()
+            resp = None
             try:
-                resp = requests.get(url, headers=headers)
-            except requests.RequestException as e:
+                resp = self._send_with_retries(url, verb, params, private, pooled, request)
+                request.status_code = resp.status_code
+                if parser is not None:
+                    data = self._parse_stream(resp, parser, request)
+                else:
+                    mark = time.time()
+                    content = resp.content
+                    request.timings['download'] = time.time() - mark
+                    request.bytes_received = len(content)
+                    mark = time.time()
+                    data = self._parse_json(content.decode('utf-8'))
+                    request.timings['parse'] = time.time() - mark
+            except Exception as e:
+                request.timings['total'] = time.time() - started
+                request.error_code = self._error_code(e, resp)
+                failed = self._is_key_failure(resp)
+                for hook in self.hooks:
+                    hook.on_error(request, e)
+                self._finish_request(request, call)
                 raise
-        elif verb == 'POST':
+            request.timings['total'] = time.time() - started
+            for hook in self.hooks:
+                hook.after_response(request, resp)
+            self._finish_request(request, call)
+            return data
+        finally:
+            # hooks can raise too, the key must go back to the pool regardless
+            if pooled is not None:
+                self.key_pool.release(pooled, failed=failed)
+
+    def _finish_request(self, request, call):
+        if call is not None:
+            call.requests.append(request)
+        elif self.metrics is not None:
+            self.metrics.record(request)
+
+    def _send_with_retries(self, url, verb, params, private, pooled, request):
+        retries = self.max_retries if verb == 'GET' else 0
+        hedge = self.hedge and verb == 'GET' and request.endpoint in self.hedge_endpoints
+        attempt = 0
+        while True:
             try:
-                resp = requests.post(url, json=params, headers=headers)
-            except requests.RequestException as e:
-                raise
-        elif verb == 'DELETE':
+                if hedge:
+                    resp = self._send_hedged(url, verb, params, private, pooled, request)
+                else:
+                    resp = self._send(url, verb, params, private, pooled, request)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if isinstance(e, requests.Timeout):
+                    self._count(request.endpoint, 'timeouts')
+                if attempt >= retries:
+                    raise
+            else:
+                if attempt >= retries or resp.status_code not in self.retry_statuses:
+                    return resp
+                resp.close()
+            attempt += 1
+            request.retries += 1
+            self._count(request.endpoint, 'retries')
+            time.sleep(self.backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+
+    def _send_hedged(self, url, verb, params, private, pooled, request):
+        """Sends a second copy of a request if the first one is slow.
+
+        The copy goes out once the first request has taken longer than
+        hedge_delay (or the endpoint's p95 server time, when known), and
+        whichever response arrives first is used.
+        """
+        results = Queue()
+
+        def attempt(info):
             try:
-                resp = requests.delete(url, headers=headers)
-            except requests.RequestException as e:
-                raise
-        data = self._parse_json(resp.content.decode('utf-8'))
+                results.put((info, self._send(url, verb, params, private, pooled, info), None))
+            except Exception as e:
+                results.put((info, None, e))
+
+        def start():
+            info = RequestInfo(request.endpoint, verb, url, private)
+            t = threading.Thread(target=attempt, args=(info,))
+            t.daemon = True
+            t.start()
+            return info
+
+        first = start()
+        pending = 1
+        try:
+            outcome = results.get(timeout=self._hedge_delay(request.endpoint))
+            pending -= 1
+        except Empty:
+            request.hedged = True
+            self._count(request.endpoint, 'hedges')
+            start()
+            pending += 1
+            outcome = results.get()
+            pending -= 1
+            if outcome[2] is not None:
+                # the first to finish failed, wait for the other one
+                outcome = results.get()
+                pending -= 1
+            if outcome[0] is not first and outcome[1] is not None:
+                self._count(request.endpoint, 'hedge_wins')
+        if pending:
+            self._close_later(results, pending)
+        info, resp, error = outcome
+        request.timings.update(info.timings)
+        request.bytes_sent += info.bytes_sent
+        if error is not None:
+            raise error
+        return resp
+
+    def _close_later(self, results, pending):
+        def close():
+            for _ in range(pending):
+                resp = results.get()[1]
+                if resp is not None:
+                    resp.close()
+        t = threading.Thread(target=close)
+        t.daemon = True
+        t.start()
+
+    def _hedge_delay(self, endpoint):
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        hist = self.metrics.histogram(endpoint, 'server') if self.metrics is not None else None
+        if hist is None or hist.count < self.hedge_min_samples:
+            return self.hedge_default_delay
+        return hist.quantile(0.95)
+
+    def _count(self, endpoint, counter):
+        if self.metrics is not None:
+            self.metrics.increment(endpoint, counter)
+
+    def _send(self, url, verb, params, private, pooled, request):
+        # every request that goes out takes a token, retries and hedges too
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        signer = None
+        if pooled is not None:
+            if pooled.rate_limiter is not None:
+                pooled.rate_limiter.acquire()
+            signer = pooled.signer
+        headers=None
+        body = ''
+        mark = time.time()
+        if verb != 'GET':
+            body = json.dumps(params)
+            if private:
+                headers = self._build_auth_header(verb, url, body, signer)
+        else:
+            url = self._build_url(url, params)
+            if private:
+                headers = self._build_auth_header(verb, url, signer=signer)
+        request.timings['sign'] = time.time() - mark
+        request.bytes_sent = len(url) + len(body)
+        timeout = self.timeouts.get(request.endpoint, self.timeout)
+        mark = time.time()
+        if verb == 'GET':
+            resp = requests.get(url, headers=headers, stream=True, timeout=timeout)
+        elif verb == 'POST':
+            resp = requests.post(url, json=params, headers=headers, stream=True, timeout=timeout)
+        elif verb == 'DELETE':
+            resp = requests.delete(url, headers=headers, stream=True, timeout=timeout)
+        else:
+            raise ApiClientError({u'message': u'unsupported http method %s' % verb})
+        request.timings['server'] = time.time() - mark
+        return resp
+
+    def _endpoint_name(self, url):
+        path = urlparse(url).path
+        if path.startswith(urlparse(self.base_url).path):
+            path = path[len(urlparse(self.base_url).path):]
+        return path.strip('/').split('/')[0] or 'unknown'
+
+    def _error_code(self, error, resp):
+        if isinstance(error, ApiError) and error.args:
+            detail = error.args[0]
+            if isinstance(detail, dict) and detail.get('code') is not None:
+                return detail['code']
+        if resp is not None and resp.status_code >= 400:
+            return resp.status_code
+        return error.__class__.__name__
+
+    def _is_key_failure(self, resp):
+        """Whether a failed request should count against the key that signed it."""
+        if resp is None:
+            return True
+        return resp.status_code in (401, 403, 429) or resp.status_code >= 500
+
+    def _parse_stream(self, resp, parser, request):
+        # levels are parsed while downloading, so 'download' covers both
+        mark = time.time()
+        for chunk in resp.iter_content(self.stream_chunk_size):
+            request.bytes_received += len(chunk)
+            parser.feed(chunk)
+        request.timings['download'] = time.time() - mark
+        mark = time.time()
+        data = parser.close()
+        self._check_for_api_error(data)
+        request.timings['parse'] = time.time() - mark
         return data
 
     def _build_url(self, url, params):
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import hashlib
+import hmac
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from .errors import ApiClientError
+
+
+class NonceGenerator(object):
+    """A source of strictly increasing nonces for signed requests.
+
+    Nonces are based on the current time in microseconds, but never repeat
+    or go backwards: two threads asking in the same microsecond get
+    consecutive values. When `path` is given, the last nonce is also kept in
+    that file under an exclusive lock, so every process sharing the file
+    (and the API key) gets its own unique value.
+    """
+
+    def __init__(self, path=None):
+        if path is not None and fcntl is None:
+            raise ApiClientError({u'message': u'process-shared nonces require fcntl'})
+        self.path = path
+        self._last = 0
+        self._lock = threading.Lock()
+        self._fd = None
+
+    def next(self):
+        """Returns the next nonce as a string."""
+        with self._lock:
+            nonce = max(int(time.time() * 1000000), self._last + 1)
+            if self.path is not None:
+                nonce = self._next_shared(nonce)
+            self._last = nonce
+            return str(nonce)
+
+    __call__ = next
+
+    def _next_shared(self, nonce):
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            data = os.read(self._fd, 8)
+            if len(data) == 8:
+                nonce = max(nonce, struct.unpack('<Q', data)[0] + 1)
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            os.write(self._fd, struct.pack('<Q', nonce))
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return nonce
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+class Signer(object):
+    """Signs private requests for a single API key.
+
+    The keyed HMAC state is built once and copied for every signature,
+    instead of re-deriving it from the secret on each request.
+    """
+
+    def __init__(self, key, secret, nonce_generator=None):
+        self.key = key
+        self._hmac = hmac.new(secret.encode('utf-8'), digestmod=hashlib.sha256)
+        if nonce_generator is None:
+            nonce_generator = NonceGenerator()
+        self.nonce_generator = nonce_generator
+
+    def signature(self, message):
+        mac = self._hmac.copy()
+        mac.update(message.encode('utf-8'))
+        return mac.hexdigest()
+
+    def auth_header(self, http_method, request_path, json_payload=''):
+        """Builds the Authorization header for a request.
+
+        Args:
+          http_method (str):
+            The HTTP verb of the request
+          request_path (str):
+            The path of the request, including the query string
+          json_payload (str, optional):
+            The JSON encoded body of the request
+        Returns:
+          A dictionary with the Authorization header.
+        """
+        nonce = self.nonce_generator.next()
+        signature = self.signature(nonce+http_method.upper()+request_path+json_payload)
+        return {'Authorization': 'Bitso %s:%s:%s' % (self.key, nonce, signature)}
+
+    def __repr__(self):
+        return "Signer(key={key})".format(key=self.key)
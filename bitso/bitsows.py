@@ -24,8 +24,11 @@
 #SOFTWARE.
 
 import json
-import websocket
+import time
 from models import StreamUpdate
+from utils import LazyModule
+
+websocket = LazyModule('websocket')
 
 
 class Listener(object):
@@ -39,19 +42,45 @@ class Listener(object):
         pass
 
 
+class ListenerGroup(Listener):
+    """Forwards every event to several listeners, in order."""
+
+    def __init__(self, listeners=None):
+        self.listeners = list(listeners or [])
+
+    def add(self, listener):
+        self.listeners.append(listener)
+
+    def on_connect(self):
+        for listener in self.listeners:
+            listener.on_connect()
+
+    def on_update(self, json_data):
+        for listener in self.listeners:
+            listener.on_update(json_data)
+
+    def on_close(self, **kwargs):
+        for listener in self.listeners:
+            listener.on_close(**kwargs)
+
+
 
 class Client(object):
-    def __init__(self, listener):
+    def __init__(self, listener, tracer=None):
         self.listener = listener
+        self.tracer = tracer
         self._ws_url = 'wss://ws.bitso.com'
         self.ws_client = websocket.WebSocketApp(self._ws_url,
                             on_message = self._on_message,
                             on_error = self._on_error,
                             on_close = self._on_close)
         self.channels = []
+        self.books = ['btc_mxn']
 
-    def connect(self, channels):
+    def connect(self, channels, books=None):
         self.channels = channels
+        if books:
+            self.books = list(books)
         self.ws_client.on_open = self._on_open
         self.ws_client.run_forever()
 
@@ -67,14 +96,34 @@ class Client(object):
         print error
         
     def _on_open(self, ws):
-        for channel in self.channels:
-            self.ws_client.send(json.dumps({ 'action': 'subscribe', 'book': 'btc_mxn', 'type': channel }))
+        for book in self.books:
+            for channel in self.channels:
+                self.ws_client.send(json.dumps({ 'action': 'subscribe', 'book': book, 'type': channel }))
         self.listener.on_connect()
 
     def _on_message(self, ws, m):
+        received_at = time.time()
+        if self.tracer is not None:
+            return self._on_message_traced(m, received_at)
         val = json.loads(m)
         obj = StreamUpdate(val)
+        obj.received_at = received_at
         self.listener.on_update(obj)
+
+    def _on_message_traced(self, m, received_at):
+        with self.tracer.start_as_current_span('bitso.ws.message') as span:
+            with self.tracer.start_as_current_span('bitso.ws.parse'):
+                val = json.loads(m)
+                obj = StreamUpdate(val)
+                obj.received_at = received_at
+            span.set_attribute('bitso.channel', obj.channel)
+            if obj.book is not None:
+                span.set_attribute('bitso.book', obj.book)
+            if obj.sequence_number is not None:
+                span.set_attribute('bitso.sequence', obj.sequence_number)
+            span.set_attribute('bitso.updates', len(obj.updates))
+            with self.tracer.start_as_current_span('bitso.ws.dispatch', attributes={'bitso.channel': obj.channel}):
+                self.listener.on_update(obj)
         
         
     
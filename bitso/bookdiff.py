@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+from .history import to_timestamp
+from .models import OrderUpdate
+
+
+ADD = 'add'
+MODIFY = 'modify'
+REMOVE = 'remove'
+
+_SIDE_CODES = {'bid': 0, 'ask': 1}
+
+
+def _sorted(orders, descending):
+    """Returns orders sorted by price, checking in one pass if they already are."""
+    for i in range(1, len(orders)):
+        if (orders[i].price > orders[i - 1].price) if descending else (orders[i].price < orders[i - 1].price):
+            return sorted(orders, key=lambda order: order.price, reverse=descending)
+    return orders
+
+
+def _groups(orders):
+    """Yields (price, orders at that price) from orders sorted by price."""
+    i = 0
+    n = len(orders)
+    while i < n:
+        price = orders[i].price
+        j = i + 1
+        while j < n and orders[j].price == price:
+            j += 1
+        yield price, orders[i:j]
+        i = j
+
+
+def _event(action, side, price, amount, oid, timestamp):
+    kwargs = {'r': price, 't': _SIDE_CODES[side]}
+    if action != REMOVE:
+        # a removal may be a fill or a cancel, so it gets no status
+        kwargs['s'] = 'open'
+        kwargs['a'] = amount
+        kwargs['v'] = price * amount
+    if oid is not None:
+        kwargs['o'] = oid
+    if timestamp is not None:
+        kwargs['d'] = timestamp
+    update = OrderUpdate(**kwargs)
+    update.action = action
+    return update
+
+
+def diff_side(side, previous, current, timestamp=None):
+    """Diffs one side of two snapshots in a single merge pass.
+
+    Args:
+      side (str):
+        'bid' or 'ask'
+      previous, current (list):
+        bitso.PublicOrder lists, bids best (highest) first and asks best
+        (lowest) first, as returned by Api.order_book
+      timestamp (int, optional):
+        Milliseconds set as the updates' timestamp
+
+    Returns:
+      A tuple (removed, changed) of bitso.models.OrderUpdate lists. Orders
+      with an oid are matched by oid within each price, others by price
+      level. Every update has an `action` of 'add', 'modify' or 'remove'.
+    """
+    descending = side == 'bid'
+    previous = list(_groups(_sorted(previous, descending)))
+    current = list(_groups(_sorted(current, descending)))
+    removed = []
+    changed = []
+    i = j = 0
+    while i < len(previous) or j < len(current):
+        if j == len(current):
+            order = 1
+        elif i == len(previous):
+            order = -1
+        else:
+            p, c = previous[i][0], current[j][0]
+            if p == c:
+                order = 0
+            elif (p > c) if descending else (p < c):
+                order = 1
+            else:
+                order = -1
+        if order > 0:
+            price, orders = previous[i]
+            for oid, _ in _amounts(orders):
+                removed.append(_event(REMOVE, side, price, 0, oid, timestamp))
+            i += 1
+        elif order < 0:
+            price, orders = current[j]
+            for oid, amount in _amounts(orders):
+                changed.append(_event(ADD, side, price, amount, oid, timestamp))
+            j += 1
+        else:
+            price = previous[i][0]
+            before = dict(_amounts(previous[i][1]))
+            for oid, amount in _amounts(current[j][1]):
+                old = before.pop(oid, None)
+                if old is None:
+                    changed.append(_event(ADD, side, price, amount, oid, timestamp))
+                elif old != amount:
+                    changed.append(_event(MODIFY, side, price, amount, oid, timestamp))
+            for oid in before:
+                removed.append(_event(REMOVE, side, price, 0, oid, timestamp))
+            i += 1
+            j += 1
+    return removed, changed
+
+
+def _amounts(orders):
+    """Returns [(oid, amount)] for the orders of one price, summing orders
+    without an oid into a single level entry."""
+    if len(orders) == 1 or orders[0].oid is not None:
+        return [(order.oid, order.amount) for order in orders]
+    return [(None, sum(order.amount for order in orders))]
+
+
+def diff_order_books(previous, current):
+    """Returns the updates that turn one bitso.OrderBook into the next.
+
+    Both sides are merged in one pass each, so the cost is linear in the
+    size of the books. Removals come first, so orders that moved price can
+    be applied by oid. `previous` may be None to list every order as added.
+
+    Example usage:
+
+        >>> updates = bitso.diff_order_books(previous, api.order_book('btc_mxn', aggregate=False))
+        >>> [(u.action, u.side, u.rate, u.amount, u.oid) for u in updates]
+        [('remove', 'ask', Decimal('101'), Decimal('0.0'), 'a1'), ('modify', 'bid', Decimal('100'), Decimal('0.5'), 'b1')]
+    """
+    timestamp = current.updated_at
+    if timestamp is not None and not isinstance(timestamp, (int, long)):
+        timestamp = int(to_timestamp(timestamp) * 1000)
+    removed_bids, bids = diff_side('bid', previous.bids if previous is not None else [], current.bids, timestamp)
+    removed_asks, asks = diff_side('ask', previous.asks if previous is not None else [], current.asks, timestamp)
+    return removed_bids + removed_asks + bids + asks
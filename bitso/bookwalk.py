@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import bisect
+from decimal import Decimal
+
+from .errors import ApiClientError
+
+
+ZERO = Decimal('0')
+BPS = Decimal('10000')
+
+
+class FenwickTree(object):
+    """Prefix sums over a list of Decimals, with O(log n) point updates,
+    prefix queries and prefix searches."""
+
+    def __init__(self, values=()):
+        n = len(values)
+        tree = [ZERO] + list(values)
+        for i in range(1, n + 1):
+            parent = i + (i & -i)
+            if parent <= n:
+                tree[parent] += tree[i]
+        self.tree = tree
+        self.size = n
+        self.top = 1
+        while self.top * 2 <= n:
+            self.top *= 2
+
+    def add(self, i, delta):
+        """Adds `delta` to the value at position `i` (0-based)."""
+        i += 1
+        tree = self.tree
+        n = self.size
+        while i <= n:
+            tree[i] += delta
+            i += i & -i
+
+    def prefix(self, k):
+        """Returns the sum of the first `k` values."""
+        total = ZERO
+        tree = self.tree
+        while k > 0:
+            total += tree[k]
+            k -= k & -k
+        return total
+
+    def search(self, limit):
+        """Returns (k, sum) for the largest k whose prefix sum is <= limit.
+
+        Values must not be negative.
+        """
+        k = 0
+        total = ZERO
+        tree = self.tree
+        n = self.size
+        step = self.top if n else 0
+        while step:
+            i = k + step
+            if i <= n and total + tree[i] <= limit:
+                k = i
+                total += tree[i]
+            step >>= 1
+        return k, total
+
+
+class DepthIndex(object):
+    """Cumulative amount and value of one side of a book, best level first.
+
+    Amount changes at existing levels are applied in O(log n). Adding or
+    removing a level only marks the index dirty; it is rebuilt in O(n) on
+    the next query, so a burst of new levels costs a single rebuild.
+    """
+
+    def __init__(self, side, levels=()):
+        self.side = side
+        self.rebuild(levels)
+
+    def rebuild(self, levels):
+        """Replaces the index with (price, amount) levels, best first."""
+        self.prices = [price for price, _ in levels]
+        if self.side == 'bid':
+            self._keys = [-price for price in self.prices]
+        else:
+            self._keys = self.prices
+        self.amounts = FenwickTree([amount for _, amount in levels])
+        self.values = FenwickTree([price * amount for price, amount in levels])
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.prices)
+
+    def add(self, price, delta):
+        """Adds `delta` to the amount of an existing level."""
+        if self.dirty:
+            return
+        key = -price if self.side == 'bid' else price
+        i = bisect.bisect_left(self._keys, key)
+        if i == len(self._keys) or self._keys[i] != key:
+            self.dirty = True
+            return
+        self.amounts.add(i, delta)
+        self.values.add(i, price * delta)
+
+    def count_within(self, limit):
+        """Returns how many levels are priced at `limit` or better."""
+        key = -limit if self.side == 'bid' else limit
+        return bisect.bisect_right(self._keys, key)
+
+
+class FillEstimate(object):
+    """What a market order would get from the book at the time of the estimate."""
+
+    def __init__(self, side, amount, filled, value, best_price, worst_price):
+        self.side = side
+        self.amount = amount
+        self.filled = filled
+        self.value = value
+        self.best_price = best_price
+        self.worst_price = worst_price
+
+    @property
+    def complete(self):
+        """False if the book does not have enough depth for the whole amount."""
+        return self.filled == self.amount
+
+    @property
+    def average_price(self):
+        if not self.filled:
+            return None
+        return self.value / self.filled
+
+    @property
+    def slippage_bps(self):
+        """Distance from the best price to the average price, in basis
+        points. Positive values are always worse for the taker."""
+        average = self.average_price
+        if average is None:
+            return None
+        if self.side == 'buy':
+            return (average - self.best_price) / self.best_price * BPS
+        return (self.best_price - average) / self.best_price * BPS
+
+    def __repr__(self):
+        return "FillEstimate(side={side}, amount={amount}, filled={filled}, average_price={average_price}, worst_price={worst_price})".format(
+            side=self.side,
+            amount=self.amount,
+            filled=self.filled,
+            average_price=self.average_price,
+            worst_price=self.worst_price)
+
+
+class BookWalker(object):
+    """Estimates fill costs by walking a book's cumulative depth in O(log n).
+
+    Works on a REST bitso.OrderBook snapshot (see from_order_book()) or on
+    a bitso.LiveOrderBook, whose depth index is updated as diffs arrive.
+    Buys walk the asks and sells walk the bids; amounts are in major.
+
+    Example usage:
+
+        >>> walker = bitso.BookWalker.from_order_book(api.order_book('btc_mxn'))
+        >>> estimate = walker.cost('buy', Decimal('2.5'))
+        >>> estimate.average_price, estimate.slippage_bps
+        >>> walker.size_within('sell', 25)
+        >>> walker.price_at_depth('buy', Decimal('10'))
+    """
+
+    def __init__(self, live_book=None):
+        self.live_book = live_book
+        self._sides = None
+
+    @classmethod
+    def from_order_book(cls, order_book):
+        """Returns a bitso.BookWalker over a bitso.OrderBook snapshot."""
+        walker = cls()
+        walker._sides = {
+            'bid': DepthIndex('bid', cls._aggregate(order_book.bids, reverse=True)),
+            'ask': DepthIndex('ask', cls._aggregate(order_book.asks, reverse=False)),
+        }
+        return walker
+
+    @staticmethod
+    def _aggregate(orders, reverse):
+        levels = {}
+        for order in orders:
+            levels[order.price] = levels.get(order.price, ZERO) + order.amount
+        return sorted(levels.items(), reverse=reverse)
+
+    def _index(self, side):
+        if side == 'buy':
+            name = 'ask'
+        elif side == 'sell':
+            name = 'bid'
+        else:
+            raise ApiClientError({u'message': u"side is not 'buy' or 'sell'"})
+        if self._sides is not None:
+            return self._sides[name]
+        book_side = self.live_book.asks if name == 'ask' else self.live_book.bids
+        index = book_side.depth_index
+        if index is None:
+            index = book_side.depth_index = DepthIndex(name)
+            index.dirty = True
+        if index.dirty:
+            index.rebuild(book_side.top(len(book_side)))
+        return index
+
+    def cost(self, side, amount):
+        """Returns a bitso.FillEstimate for a market order of `amount` major."""
+        amount = Decimal(amount)
+        index = self._index(side)
+        if not len(index):
+            return FillEstimate(side, amount, ZERO, ZERO, None, None)
+        k, filled = index.amounts.search(amount)
+        value = index.values.prefix(k)
+        worst = index.prices[k - 1] if k else None
+        remaining = amount - filled
+        if remaining > 0 and k < len(index):
+            worst = index.prices[k]
+            filled = amount
+            value += remaining * worst
+        return FillEstimate(side, amount, filled, value, index.prices[0], worst)
+
+    def size_within(self, side, bps):
+        """Returns the amount available within `bps` basis points of the best price."""
+        index = self._index(side)
+        if not len(index):
+            return ZERO
+        best = index.prices[0]
+        offset = best * Decimal(str(bps)) / BPS
+        limit = best + offset if side == 'buy' else best - offset
+        return index.amounts.prefix(index.count_within(limit))
+
+    def price_at_depth(self, side, amount):
+        """Returns the price of the level where the cumulative amount reaches
+        `amount`, or None if the book is not that deep."""
+        amount = Decimal(amount)
+        index = self._index(side)
+        k, filled = index.amounts.search(amount)
+        if filled == amount and k:
+            return index.prices[k - 1]
+        if k < len(index):
+            return index.prices[k]
+        return None
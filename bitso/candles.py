@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import threading
+import time
+from collections import deque
+
+from .bitsows import Listener
+from .history import to_timestamp
+
+
+class Candle(object):
+    """An OHLCV bar with its volume weighted average price."""
+
+    __slots__ = ('start', 'interval', 'open', 'high', 'low', 'close', 'volume', 'value', 'count')
+
+    def __init__(self, start, interval, price, amount):
+        self.start = start
+        self.interval = interval
+        self.open = self.high = self.low = self.close = price
+        self.volume = amount
+        self.value = price * amount
+        self.count = 1
+
+    def add(self, price, amount):
+        if price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += amount
+        self.value += price * amount
+        self.count += 1
+
+    @property
+    def vwap(self):
+        if not self.volume:
+            return self.close
+        return self.value / self.volume
+
+    def __repr__(self):
+        return "Candle(start={start}, interval={interval}, open={open}, high={high}, low={low}, close={close}, volume={volume})".format(
+            start=self.start,
+            interval=self.interval,
+            open=self.open,
+            high=self.high,
+            low=self.low,
+            close=self.close,
+            volume=self.volume)
+
+
+class CandleSeries(object):
+    """The candles of one book and interval, oldest first.
+
+    Closed candles are kept in a ring buffer of `max_candles`; intervals
+    without trades have no candle.
+    """
+
+    def __init__(self, interval, max_candles=1000):
+        self.interval = interval
+        self.closed = deque(maxlen=max_candles)
+        self.current = None
+
+    def add(self, timestamp, price, amount):
+        """Adds a trade. Returns the candle it closed, if any."""
+        start = int(timestamp) - int(timestamp) % self.interval
+        current = self.current
+        if current is not None and start == current.start:
+            current.add(price, amount)
+            return None
+        if current is None or start > current.start:
+            self.current = Candle(start, self.interval, price, amount)
+            if current is not None:
+                self.closed.append(current)
+            return current
+        # a late trade for a candle that already closed
+        for candle in reversed(self.closed):
+            if candle.start == start:
+                candle.add(price, amount)
+                break
+            if candle.start < start:
+                break
+        return None
+
+    @property
+    def candles(self):
+        """All candles, including the one still open."""
+        candles = list(self.closed)
+        if self.current is not None:
+            candles.append(self.current)
+        return candles
+
+    def __len__(self):
+        return len(self.closed) + (1 if self.current is not None else 0)
+
+
+class CandleAggregator(Listener):
+    """Builds OHLCV+VWAP candles for many books and intervals from trades.
+
+    Each trade updates every interval in constant time. Trades are
+    deduplicated by tid, so REST backfills and the websocket 'trades'
+    channel can overlap.
+
+    Example usage:
+
+        >>> candles = bitso.CandleAggregator(intervals=(1, 60, 300, 3600))
+        >>> candles.backfill(api, 'btc_mxn', since=time.time() - 3600)
+        >>> client = bitso.Client(candles)
+        >>> client.connect(['trades'])
+        ...
+        >>> candles.series('btc_mxn', 60).candles[-1].vwap
+    """
+
+    def __init__(self, intervals=(1, 60, 300, 3600), max_candles=1000, on_candle=None, dedupe_window=10000):
+        """Instantiate a bitso.CandleAggregator object.
+
+        Args:
+          intervals (tuple, optional):
+            Candle lengths in seconds. Default is 1s, 1m, 5m and 1h
+          max_candles (int, optional):
+            Closed candles kept per book and interval. Default is 1000
+          on_candle (callable, optional):
+            Called with (book, candle) whenever a candle closes
+          dedupe_window (int, optional):
+            Number of recent tids remembered per book. Default is 10000
+        """
+        self.intervals = tuple(intervals)
+        self.max_candles = max_candles
+        self.on_candle = on_candle
+        self.dedupe_window = dedupe_window
+        self._series = {}
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def series(self, book, interval):
+        """Returns the bitso.CandleSeries of a book and interval."""
+        return self._books(book)[1][interval]
+
+    def _books(self, book):
+        entry = self._series.get(book)
+        if entry is None:
+            entry = self._series[book] = (
+                (set(), deque()),
+                dict((i, CandleSeries(i, self.max_candles)) for i in self.intervals))
+        return entry
+
+    def add_trade(self, book, tid, price, amount, timestamp=None):
+        """Adds a trade to every interval of `book`.
+
+        Returns:
+          False if the tid was already seen, True otherwise.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        closed = []
+        with self._lock:
+            (seen, order), series = self._books(book)
+            if tid is not None:
+                tid = int(tid)
+                if tid in seen:
+                    return False
+                seen.add(tid)
+                order.append(tid)
+                if len(order) > self.dedupe_window:
+                    seen.discard(order.popleft())
+            for candle_series in series.values():
+                candle = candle_series.add(timestamp, price, amount)
+                if candle is not None:
+                    closed.append(candle)
+        if self.on_candle is not None:
+            for candle in closed:
+                self.on_candle(book, candle)
+        return True
+
+    def add_trades(self, trades):
+        """Adds a list of bitso.Trade instances, oldest first."""
+        for trade in trades:
+            self.add_trade(trade.book, trade.tid, trade.price, trade.amount, to_timestamp(trade.created_at))
+
+    def backfill(self, api, book, since, page_size=100):
+        """Loads trades newer than `since` from Api.trades, paging by marker.
+
+        Args:
+          api (bitso.Api):
+            A bitso.Api instance
+          book (str):
+            The book to backfill
+          since (float or datetime):
+            Oldest trade time to load
+
+        Returns:
+          The number of trades added.
+        """
+        since = to_timestamp(since)
+        trades = []
+        marker = None
+        while True:
+            kwargs = {'limit': page_size, 'sort': 'desc'}
+            if marker is not None:
+                kwargs['marker'] = marker
+            page = api.trades(book, **kwargs)
+            done = len(page) < page_size
+            for trade in page:
+                if to_timestamp(trade.created_at) < since:
+                    done = True
+                    break
+                trades.append(trade)
+            if done or not page:
+                break
+            marker = page[-1].tid
+        trades.reverse()
+        return sum(1 for trade in trades
+                   if self.add_trade(book, trade.tid, trade.price, trade.amount, to_timestamp(trade.created_at)))
+
+    def on_update(self, data):
+        if data.channel != 'trades' or data.book is None:
+            return
+        now = time.time()
+        for update in data.updates:
+            self.add_trade(data.book, getattr(update, 'tid', None), update.rate, update.amount, now)
@@ -0,0 +1,327 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+"""Exports the user's ledger and trades to CSV or Parquet files.
+
+    $ python -m bitso.export --out export/ --books btc_mxn,eth_mxn
+
+Work is split into one partition per ledger operation type and one per
+book for user trades. Partitions are fetched concurrently under a shared
+rate limiter and written page by page. After every page the partition's
+marker and file size are checkpointed, so an interrupted export resumes
+where it stopped, and running it again later only fetches new rows.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+from .errors import ApiClientError
+from .history import LEDGER_OPERATIONS
+from .ratelimit import RateLimiter
+from .utils import map_concurrently
+
+
+USER_TRADE_COLUMNS = ('tid', 'oid', 'book', 'side', 'created_at', 'major', 'minor',
+                      'price', 'fees_amount', 'fees_currency')
+LEDGER_COLUMNS = ('eid', 'operation', 'created_at', 'currency', 'amount', 'details')
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    return str(value)
+
+
+def user_trade_rows(trade):
+    return [tuple(_text(getattr(trade, column, None)) if column != 'created_at'
+                  else trade.created_at.isoformat() for column in USER_TRADE_COLUMNS)]
+
+
+def ledger_rows(entry):
+    """One row per balance update of a bitso.LedgerEntry."""
+    created_at = getattr(entry, 'created_at', None)
+    common = (_text(getattr(entry, 'eid', None)),
+              _text(getattr(entry, 'operation', None)),
+              created_at.isoformat() if created_at is not None else '')
+    details = json.dumps(getattr(entry, 'details', None), sort_keys=True)
+    updates = getattr(entry, 'balance_updates', None) or [None]
+    return [common + (_text(getattr(update, 'currency', None)),
+                      _text(getattr(update, 'amount', None)),
+                      details)
+            for update in updates]
+
+
+class Partition(object):
+    """One independently exported and checkpointed slice of the history."""
+
+    def __init__(self, kind, key):
+        self.kind = kind
+        self.key = key
+
+    @property
+    def name(self):
+        return '%s_%s' % (self.kind, self.key)
+
+    @property
+    def columns(self):
+        return USER_TRADE_COLUMNS if self.kind == 'user_trades' else LEDGER_COLUMNS
+
+    def fetch(self, api, marker, limit):
+        if self.kind == 'user_trades':
+            return api.user_trades(book=self.key, marker=marker, limit=limit, sort='asc')
+        return api.ledger(self.key, marker=marker, limit=limit, sort='asc')
+
+    def rows(self, obj):
+        if self.kind == 'user_trades':
+            return user_trade_rows(obj)
+        return ledger_rows(obj)
+
+    def marker(self, obj):
+        if self.kind == 'user_trades':
+            return str(obj.tid)
+        return getattr(obj, 'eid', None)
+
+    def __repr__(self):
+        return "Partition(name={name})".format(name=self.name)
+
+
+class CsvWriter(object):
+    """Appends rows to a CSV file, cutting off anything written after the
+    last checkpoint when resuming."""
+
+    extension = 'csv'
+
+    def __init__(self, path, columns, state):
+        offset = state.get('offset', 0)
+        exists = os.path.exists(path)
+        self.file = open(path, 'r+b' if exists else 'wb')
+        self.file.truncate(offset)
+        self.file.seek(offset)
+        self.writer = csv.writer(self.file)
+        if offset == 0:
+            self.writer.writerow(columns)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def commit(self):
+        """Flushes the rows written so far and returns the state to checkpoint."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return {'offset': self.file.tell()}
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter(object):
+    """Writes rows to Parquet part files with pyarrow.
+
+    A Parquet file is only readable once closed, so every commit closes
+    the current part file and the next page goes to a new one.
+    """
+
+    extension = 'parquet'
+
+    def __init__(self, path, columns, state):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ApiClientError({u'message': u'Parquet export needs pyarrow installed'})
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.base = path[:-len('.parquet')]
+        self.columns = columns
+        self.parts = state.get('parts', 0)
+        self.pending = []
+
+    def write(self, rows):
+        self.pending.extend(rows)
+
+    def commit(self):
+        if self.pending:
+            data = dict((column, [row[i] for row in self.pending])
+                        for i, column in enumerate(self.columns))
+            table = self.pa.Table.from_pydict(data)
+            self.pq.write_table(table, '%s.%05d.parquet' % (self.base, self.parts))
+            self.parts += 1
+            self.pending = []
+        return {'parts': self.parts}
+
+    def close(self):
+        pass
+
+
+WRITERS = {'csv': CsvWriter, 'parquet': ParquetWriter}
+
+
+class HistoryExporter(object):
+    """Exports ledger and user trade partitions concurrently.
+
+    Example usage:
+
+        >>> api = bitso.Api(key, secret, rate_limiter=bitso.RateLimiter(60, per=60.0))
+        >>> exporter = bitso.HistoryExporter(api, 'export/', format='csv')
+        >>> exporter.export(books=['btc_mxn', 'eth_mxn'])
+        {'ledger_fees': 210, 'ledger_trades': 420, 'user_trades_btc_mxn': 400, ...}
+    """
+
+    def __init__(self, api, out_dir, format='csv', page_size=100, max_workers=4):
+        """Instantiate a bitso.HistoryExporter object.
+
+        Args:
+          api (bitso.Api):
+            Authenticated client. Give it a rate_limiter; all partitions share it
+          out_dir (str):
+            Directory for the exported files and their checkpoints
+          format (str, optional):
+            'csv' or 'parquet'. Default is 'csv'
+          page_size (int, optional):
+            Objects per request, max 100. Default is 100
+          max_workers (int, optional):
+            Partitions fetched at the same time. Default is 4
+        """
+        if format not in WRITERS:
+            raise ApiClientError({u'message': u"format is not 'csv' or 'parquet'"})
+        self.api = api
+        self.out_dir = out_dir
+        self.format = format
+        self.page_size = page_size
+        self.max_workers = max_workers
+
+    def partitions(self, books=None, operations=LEDGER_OPERATIONS):
+        return ([Partition('ledger', operation) for operation in operations or []] +
+                [Partition('user_trades', book) for book in books or []])
+
+    def export(self, books=None, operations=LEDGER_OPERATIONS):
+        """Exports every partition.
+
+        Returns:
+          A dictionary with the rows written per partition in this run, or
+          the exception that stopped that partition.
+        """
+        if not os.path.isdir(self.out_dir):
+            os.makedirs(self.out_dir)
+        partitions = self.partitions(books, operations)
+        results = map_concurrently(self.export_partition, partitions, self.max_workers)
+        return dict((partition.name, result) for partition, result in zip(partitions, results))
+
+    def checkpoint_path(self, partition):
+        return os.path.join(self.out_dir, '%s.%s.checkpoint' % (partition.name, self.format))
+
+    def load_checkpoint(self, partition):
+        path = self.checkpoint_path(partition)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def save_checkpoint(self, partition, state):
+        path = self.checkpoint_path(partition)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(path + '.tmp', path)
+
+    def export_partition(self, partition):
+        """Exports one partition from its checkpoint and returns the rows written."""
+        state = self.load_checkpoint(partition)
+        writer_class = WRITERS[self.format]
+        path = os.path.join(self.out_dir, '%s.%s' % (partition.name, writer_class.extension))
+        writer = writer_class(path, partition.columns, state)
+        marker = state.get('marker')
+        total = state.get('rows', 0)
+        written = 0
+        try:
+            while True:
+                page = partition.fetch(self.api, marker, self.page_size)
+                if not page:
+                    break
+                rows = []
+                for obj in page:
+                    rows.extend(partition.rows(obj))
+                writer.write(rows)
+                markers = [m for m in map(partition.marker, page) if m is not None]
+                if markers:
+                    marker = markers[-1]
+                state = writer.commit()
+                state['marker'] = marker
+                written += len(rows)
+                state['rows'] = total + written
+                self.save_checkpoint(partition, state)
+                if len(page) < self.page_size or not markers:
+                    break
+        finally:
+            writer.close()
+        return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bitso.export',
+                                     description='Export your Bitso ledger and trades.')
+    parser.add_argument('--out', default='bitso-export', help='output directory')
+    parser.add_argument('--format', default='csv', choices=sorted(WRITERS))
+    parser.add_argument('--books', help='comma separated books for user trades, default all')
+    parser.add_argument('--operations', default=','.join(LEDGER_OPERATIONS),
+                        help='comma separated ledger operations, empty for none')
+    parser.add_argument('--workers', type=int, default=4, help='partitions fetched at once')
+    parser.add_argument('--rate', type=float, default=60, help='requests per minute')
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--key', default=os.environ.get('BITSO_API_KEY'))
+    parser.add_argument('--secret', default=os.environ.get('BITSO_API_SECRET'))
+    args = parser.parse_args(argv)
+    if not args.key or not args.secret:
+        parser.error('--key and --secret (or BITSO_API_KEY and BITSO_API_SECRET) are required')
+
+    from .api import Api
+    api = Api(args.key, args.secret, rate_limiter=RateLimiter(args.rate, per=60.0),
+              max_workers=args.workers)
+    if args.books is None:
+        books = api.available_books().books
+    else:
+        books = [book for book in args.books.split(',') if book]
+    operations = [operation for operation in args.operations.split(',') if operation]
+
+    exporter = HistoryExporter(api, args.out, args.format, args.page_size, args.workers)
+    failed = False
+    for name, result in sorted(exporter.export(books, operations).items()):
+        if isinstance(result, Exception):
+            failed = True
+            print >> sys.stderr, '%s: failed: %s' % (name, result)
+        else:
+            print '%s: %d rows' % (name, result)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+
+import logging
+import threading
+import time
+
+from .bitsows import Listener, ListenerGroup
+from .metrics import DEFAULT_BUCKETS, Histogram
+
+
+class FeedStats(object):
+    """Latency and gap histograms of one channel of one book, in seconds.
+
+    `exchange_latency` runs from the exchange timestamp of a message ('d'
+    in its updates) to its local receive time, so it includes any clock
+    offset between both. `dispatch_latency` runs from receive time until
+    the FeedMonitor handed the message on, which covers parsing. `gaps`
+    are the times between consecutive messages.
+    """
+
+    def __init__(self, channel, book, buckets=DEFAULT_BUCKETS):
+        self.channel = channel
+        self.book = book
+        self.messages = 0
+        self.last_received = None
+        self.last_timestamp = None
+        self.stale = False
+        self.exchange_latency = Histogram(buckets)
+        self.dispatch_latency = Histogram(buckets)
+        self.gaps = Histogram(buckets)
+
+    def as_dict(self):
+        return {
+            'messages': self.messages,
+            'last_received': self.last_received,
+            'stale': self.stale,
+            'exchange_latency': self.exchange_latency.as_dict(),
+            'dispatch_latency': self.dispatch_latency.as_dict(),
+            'gaps': self.gaps.as_dict()
+        }
+
+    def __repr__(self):
+        return "FeedStats(channel={channel}, book={book}, messages={messages}, stale={stale})".format(
+            channel=self.channel,
+            book=self.book,
+            messages=self.messages,
+            stale=self.stale)
+
+
+class FeedMonitor(Listener):
+    """Measures a websocket feed per channel and book, and notices when it
+    goes quiet.
+
+    Pass it to bitso.Client in place of `listener`, which then receives
+    every event through it. Each message updates the FeedStats of its
+    channel and book. A watchdog thread checks, four times per window,
+    that each (channel, book) seen so far, plus those in `watch`, got a
+    message within the last `window` seconds. `window` can also map
+    channels to their own window, so that a quiet 'trades' channel is
+    not mistaken for a frozen book; channels it leaves out are not
+    watched. The first check that finds
+    one silent marks it stale, logs it, calls `on_stale(monitor, channel,
+    book, silence)` and, with `resync`, calls `resync()` on the listeners
+    of that book (those with a `resync` method and a matching `book`, as
+    bitso.LiveOrderBook has, also inside a bitso.ListenerGroup) so the
+    book is fetched again over REST. Every event is passed on under a
+    lock that the watchdog also holds while it resyncs, so a resync never
+    runs alongside an update, and the feed waits for the snapshot to
+    load. The next message clears the stale mark. Keep-alive ('ka') messages are measured but
+    do not count as updates of any book.
+
+    Example usage:
+
+        >>> book = bitso.LiveOrderBook('btc_mxn', api=bitso.Api())
+        >>> monitor = bitso.FeedMonitor(book, window=5.0, on_stale=alert, resync=True,
+        ...                             watch=[('diff-orders', 'btc_mxn')])
+        >>> monitor.start()
+        >>> bitso.Client(monitor).connect(['diff-orders'], books=['btc_mxn'])
+        >>> monitor.stats('diff-orders', 'btc_mxn').exchange_latency.quantile(0.99)
+    """
+
+    def __init__(self, listener=None, window=5.0, on_stale=None, resync=False, watch=None,
+                 buckets=DEFAULT_BUCKETS, clock=time.time):
+        """Instantiate a bitso.FeedMonitor object.
+
+        Args:
+          listener (bitso.Listener, optional):
+            Receives every event after it was measured
+          window (float or dict, optional):
+            Seconds without a message after which a channel is stale, or
+            a dict of them by channel
+          on_stale (callable, optional):
+            Called with (monitor, channel, book, silence) when a channel goes stale
+          resync (bool, optional):
+            Call resync() on the listeners of a book once one of its
+            channels went stale
+          watch (list, optional):
+            (channel, book) pairs to expect even before their first message
+        """
+        self.listener = listener
+        self.window = window
+        self.on_stale = on_stale
+        self.resync = resync
+        self.buckets = buckets
+        self.clock = clock
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._started_at = clock()
+        # held while passing events on, and by the watchdog while it resyncs
+        self._dispatch_lock = threading.RLock()
+        for channel, book in watch or []:
+            self._stats[(channel, book)] = FeedStats(channel, book, buckets)
+
+    def stats(self, channel, book=None):
+        """The bitso.FeedStats of a channel and book, or None if unseen."""
+        return self._stats.get((channel, book))
+
+    def as_dict(self):
+        with self._lock:
+            return dict(('%s:%s' % key, stats.as_dict()) for key, stats in self._stats.items())
+
+    def is_stale(self, channel, book=None):
+        stats = self._stats.get((channel, book))
+        return stats is not None and stats.stale
+
+    def start(self):
+        """Starts the staleness watchdog in a background thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.check()
+            self._stop.wait(self._interval())
+
+    def _interval(self):
+        if isinstance(self.window, dict):
+            return min(self.window.values() or [1.0]) / 4.0
+        return self.window / 4.0
+
+    def _window(self, channel):
+        if isinstance(self.window, dict):
+            return self.window.get(channel)
+        return self.window
+
+    def check(self):
+        """Marks channels that got no message within their window as stale.
+
+        Returns:
+          (channel, book, silence) for each channel that just went stale.
+        """
+        now = self.clock()
+        expired = []
+        with self._lock:
+            for stats in self._stats.values():
+                window = self._window(stats.channel)
+                if stats.stale or stats.channel == 'ka' or window is None:
+                    continue
+                silence = now - (stats.last_received or self._started_at)
+                if silence > window:
+                    stats.stale = True
+                    expired.append((stats.channel, stats.book, silence))
+        for channel, book, silence in expired:
+            logging.warning("No %s update for %s in %.1fs" % (channel, book, silence))
+            if self.on_stale is not None:
+                self.on_stale(self, channel, book, silence)
+            if self.resync:
+                with self._dispatch_lock:
+                    for listener in self._resync_targets(self.listener, book):
+                        listener.resync()
+        return expired
+
+    def _resync_targets(self, listener, book):
+        if isinstance(listener, ListenerGroup):
+            targets = []
+            for member in listener.listeners:
+                targets.extend(self._resync_targets(member, book))
+            return targets
+        if hasattr(listener, 'resync') and getattr(listener, 'book', None) == book:
+            return [listener]
+        return []
+
+    def on_connect(self):
+        if self.listener is not None:
+            with self._dispatch_lock:
+                self.listener.on_connect()
+
+    def on_update(self, data):
+        now = self.clock()
+        received = data.received_at if data.received_at is not None else now
+        key = (data.channel, data.book)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = FeedStats(data.channel, data.book, self.buckets)
+            if stats.last_received is not None:
+                stats.gaps.observe(received - stats.last_received)
+            stats.messages += 1
+            stats.last_received = received
+            stats.stale = False
+            timestamps = [update.timestamp for update in data.updates if hasattr(update, 'timestamp')]
+            if timestamps:
+                stats.last_timestamp = max(timestamps)
+                stats.exchange_latency.observe(received - int(stats.last_timestamp) / 1000.0)
+            if data.received_at is not None:
+                stats.dispatch_latency.observe(now - received)
+        if self.listener is not None:
+            with self._dispatch_lock:
+                self.listener.on_update(data)
+
+    def on_close(self, **kwargs):
+        if self.listener is not None:
+            with self._dispatch_lock:
+                self.listener.on_close(**kwargs)
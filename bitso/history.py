@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import calendar
+import json
+import sqlite3
+import time
+from decimal import Decimal
+
+
+LEDGER_OPERATIONS = ('trades', 'fees', 'fundings', 'withdrawals')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_trades (
+    tid TEXT PRIMARY KEY,
+    oid TEXT,
+    book TEXT,
+    side TEXT,
+    created_at TEXT,
+    created_ts REAL,
+    major TEXT,
+    minor TEXT,
+    price TEXT,
+    fees_amount TEXT,
+    fees_currency TEXT
+);
+CREATE INDEX IF NOT EXISTS user_trades_book_ts ON user_trades (book, created_ts);
+CREATE INDEX IF NOT EXISTS user_trades_ts ON user_trades (created_ts);
+CREATE INDEX IF NOT EXISTS user_trades_fees_currency ON user_trades (fees_currency, created_ts);
+
+CREATE TABLE IF NOT EXISTS ledger (
+    id INTEGER PRIMARY KEY,
+    eid TEXT UNIQUE,
+    operation TEXT,
+    created_at TEXT,
+    created_ts REAL,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS ledger_operation_ts ON ledger (operation, created_ts);
+CREATE INDEX IF NOT EXISTS ledger_ts ON ledger (created_ts);
+
+CREATE TABLE IF NOT EXISTS ledger_updates (
+    ledger_id INTEGER REFERENCES ledger (id),
+    currency TEXT,
+    amount TEXT
+);
+CREATE INDEX IF NOT EXISTS ledger_updates_currency ON ledger_updates (currency, ledger_id);
+CREATE INDEX IF NOT EXISTS ledger_updates_ledger ON ledger_updates (ledger_id);
+
+CREATE TABLE IF NOT EXISTS checkpoints (
+    stream TEXT PRIMARY KEY,
+    marker TEXT,
+    updated_at REAL
+);
+"""
+
+
+def to_timestamp(value):
+    """Converts a datetime (naive ones are taken as UTC) or a number to epoch seconds."""
+    if value is None or isinstance(value, (int, long, float)):
+        return value
+    if value.tzinfo is not None:
+        value = value.replace(tzinfo=None) - value.utcoffset()
+    return calendar.timegm(value.timetuple()) + value.microsecond / 1000000.0
+
+
+class HistoryStore(object):
+    """A local SQLite copy of the user's trades and ledger.
+
+    Rows are indexed by time, book, currency and operation, and amounts are
+    kept as strings so sums come back as exact Decimals.
+
+    Example usage:
+
+        >>> store = bitso.HistoryStore('bitso.db')
+        >>> store.fees(book='eth_mxn', start=datetime(2017, 9, 1), end=datetime(2017, 10, 1))
+        {u'mxn': Decimal('-12.50')}
+    """
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(_SCHEMA)
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def checkpoint(self, stream):
+        """Returns the last marker saved for `stream`, or None."""
+        row = self.db.execute('SELECT marker FROM checkpoints WHERE stream = ?', (stream,)).fetchone()
+        return row[0] if row else None
+
+    def set_checkpoint(self, stream, marker):
+        self.db.execute('INSERT OR REPLACE INTO checkpoints (stream, marker, updated_at) VALUES (?, ?, ?)',
+                        (stream, marker, time.time()))
+
+    def add_user_trades(self, trades):
+        """Inserts or replaces a list of bitso.UserTrade instances."""
+        self.db.executemany(
+            'INSERT OR REPLACE INTO user_trades VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            [(str(t.tid), t.oid, t.book, t.side, t.created_at.isoformat(), to_timestamp(t.created_at),
+              str(t.major), str(t.minor), str(t.price), str(t.fees_amount), t.fees_currency)
+             for t in trades])
+
+    def add_ledger_entries(self, entries):
+        """Inserts a list of bitso.LedgerEntry instances, skipping known eids."""
+        for entry in entries:
+            eid = getattr(entry, 'eid', None)
+            created_at = getattr(entry, 'created_at', None)
+            cursor = self.db.execute(
+                'INSERT OR IGNORE INTO ledger (eid, operation, created_at, created_ts, details) VALUES (?, ?, ?, ?, ?)',
+                (eid, getattr(entry, 'operation', None),
+                 created_at.isoformat() if created_at else None, to_timestamp(created_at),
+                 json.dumps(getattr(entry, 'details', None))))
+            if cursor.rowcount == 0:
+                continue
+            self.db.executemany('INSERT INTO ledger_updates VALUES (?, ?, ?)',
+                                [(cursor.lastrowid, update.currency, str(update.amount))
+                                 for update in getattr(entry, 'balance_updates', [])])
+
+    def commit(self):
+        self.db.commit()
+
+    def _where(self, clauses):
+        clauses = [(sql, arg) for sql, arg in clauses if arg is not None]
+        if not clauses:
+            return '', ()
+        return ' WHERE ' + ' AND '.join(sql for sql, _ in clauses), tuple(arg for _, arg in clauses)
+
+    def user_trades(self, book=None, start=None, end=None):
+        """Returns stored trades as dictionaries, oldest first."""
+        where, args = self._where([('book = ?', book),
+                                   ('created_ts >= ?', to_timestamp(start)),
+                                   ('created_ts < ?', to_timestamp(end))])
+        cursor = self.db.execute('SELECT * FROM user_trades%s ORDER BY created_ts' % where, args)
+        names = [d[0] for d in cursor.description]
+        return [dict(zip(names, row)) for row in cursor]
+
+    def fees(self, book=None, start=None, end=None):
+        """Sums the fees paid on trades.
+
+        Returns:
+          A dictionary of Decimal totals keyed by fee currency.
+        """
+        where, args = self._where([('book = ?', book),
+                                   ('created_ts >= ?', to_timestamp(start)),
+                                   ('created_ts < ?', to_timestamp(end))])
+        totals = {}
+        for currency, amount in self.db.execute('SELECT fees_currency, fees_amount FROM user_trades%s' % where, args):
+            totals[currency] = totals.get(currency, Decimal(0)) + Decimal(amount)
+        return totals
+
+    def balance_changes(self, currency=None, operation=None, start=None, end=None):
+        """Sums ledger balance updates.
+
+        Returns:
+          A dictionary of Decimal totals keyed by currency.
+        """
+        where, args = self._where([('u.currency = ?', currency),
+                                   ('l.operation = ?', operation),
+                                   ('l.created_ts >= ?', to_timestamp(start)),
+                                   ('l.created_ts < ?', to_timestamp(end))])
+        totals = {}
+        for cur, amount in self.db.execute(
+                'SELECT u.currency, u.amount FROM ledger_updates u JOIN ledger l ON l.id = u.ledger_id%s' % where, args):
+            totals[cur] = totals.get(cur, Decimal(0)) + Decimal(amount)
+        return totals
+
+
+class HistorySync(object):
+    """Keeps a bitso.HistoryStore up to date with only the new rows.
+
+    The last marker fetched for every book (user trades) and operation type
+    (ledger) is checkpointed in the store, and the next run asks Bitso only
+    for newer objects.
+
+    Example usage:
+
+        >>> sync = bitso.HistorySync(api, bitso.HistoryStore('bitso.db'))
+        >>> sync.sync(books=['btc_mxn', 'eth_mxn'])
+        {'user_trades:btc_mxn': 12, 'user_trades:eth_mxn': 0, 'ledger:trades': 12, ...}
+    """
+
+    def __init__(self, api, store, page_size=100):
+        self.api = api
+        self.store = store
+        self.page_size = page_size
+
+    def sync(self, books=None, operations=LEDGER_OPERATIONS):
+        """Syncs user trades for `books` and the ledger for `operations`.
+
+        Returns:
+          A dictionary with the number of new rows per stream.
+        """
+        counts = {}
+        for book in books or []:
+            counts['user_trades:%s' % book] = self.sync_user_trades(book)
+        for operation in operations or []:
+            counts['ledger:%s' % operation] = self.sync_ledger(operation)
+        return counts
+
+    def sync_user_trades(self, book):
+        return self._sync('user_trades:%s' % book,
+                          lambda marker: self.api.user_trades(book=book, marker=marker,
+                                                              limit=self.page_size, sort='asc'),
+                          self.store.add_user_trades,
+                          lambda trade: str(trade.tid))
+
+    def sync_ledger(self, operation):
+        return self._sync('ledger:%s' % operation,
+                          lambda marker: self.api.ledger(operation, marker=marker,
+                                                         limit=self.page_size, sort='asc'),
+                          self.store.add_ledger_entries,
+                          lambda entry: getattr(entry, 'eid', None))
+
+    def _sync(self, stream, fetch, add, key):
+        marker = self.store.checkpoint(stream)
+        total = 0
+        while True:
+            page = fetch(marker)
+            if not page:
+                break
+            add(page)
+            keys = [k for k in map(key, page) if k is not None]
+            if keys:
+                marker = keys[-1]
+                self.store.set_checkpoint(stream, marker)
+            self.store.commit()
+            total += len(page)
+            if len(page) < self.page_size or not keys:
+                break
+        return total
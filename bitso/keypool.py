@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import threading
+import time
+
+from .auth import Signer
+from .errors import ApiClientError
+from .ratelimit import RateLimiter
+
+
+class PooledKey(object):
+    """A single set of credentials in a bitso.KeyPool."""
+
+    def __init__(self, key, secret, rate_limiter=None):
+        self.key = key
+        self.signer = Signer(key, secret)
+        self.rate_limiter = rate_limiter
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.disabled_until = 0.0
+
+    def healthy(self, now=None):
+        return self.disabled_until <= (now if now is not None else time.time())
+
+    def __repr__(self):
+        return "PooledKey(key={key}, in_flight={in_flight}, errors={errors})".format(
+            key=self.key,
+            in_flight=self.in_flight,
+            errors=self.errors)
+
+
+class KeyPool(object):
+    """Spreads private requests over several API keys of the same account.
+
+    Each key signs with its own nonce sequence and waits on its own rate
+    limiter. A key that fails `max_errors` requests in a row is taken out
+    of rotation for `cooldown` seconds.
+
+    Example usage:
+
+        >>> pool = bitso.KeyPool([(KEY_1, SECRET_1), (KEY_2, SECRET_2)], rate=300, per=60.0)
+        >>> api = bitso.Api(key_pool=pool)
+    """
+
+    ROUND_ROBIN = 'round_robin'
+    LEAST_LOADED = 'least_loaded'
+
+    def __init__(self, credentials, strategy=LEAST_LOADED, rate=None, per=60.0, max_errors=3, cooldown=30.0):
+        """Instantiate a bitso.KeyPool object.
+
+        Args:
+          credentials (list):
+            A list of (key, secret) tuples
+          strategy (str, optional):
+            'least_loaded' or 'round_robin'. Default is 'least_loaded'
+          rate (int, optional):
+            Requests allowed per key every `per` seconds. No limit if None
+          per (float, optional):
+            Rate limit window in seconds. Default is 60.0
+          max_errors (int, optional):
+            Consecutive failures before a key is taken out of rotation
+          cooldown (float, optional):
+            Seconds an unhealthy key stays out of rotation
+        """
+        if not credentials:
+            raise ApiClientError({u'message': u'KeyPool needs at least one key'})
+        if strategy not in (self.ROUND_ROBIN, self.LEAST_LOADED):
+            raise ApiClientError({u'message': u"strategy is not 'round_robin' or 'least_loaded'"})
+        self.keys = []
+        for key, secret in credentials:
+            limiter = RateLimiter(rate, per) if rate else None
+            self.keys.append(PooledKey(key, secret, limiter))
+        self.strategy = strategy
+        self.max_errors = max_errors
+        self.cooldown = cooldown
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, wait=True):
+        """Picks a key for the next request and waits on its rate limiter.
+
+        Args:
+          wait (bool, optional):
+            Take a token from the key's rate limiter. bitso.Api passes
+            False and takes one for every attempt it sends instead
+
+        Returns:
+          A bitso.PooledKey instance. Pass it back to release() once the
+          request is done.
+        """
+        with self._lock:
+            pooled = self._pick(time.time())
+            pooled.in_flight += 1
+            pooled.requests += 1
+        if wait and pooled.rate_limiter is not None:
+            pooled.rate_limiter.acquire()
+        return pooled
+
+    def release(self, pooled, failed=False):
+        """Records the outcome of a request made with `pooled`."""
+        with self._lock:
+            pooled.in_flight -= 1
+            if not failed:
+                pooled.consecutive_errors = 0
+                return
+            pooled.errors += 1
+            pooled.consecutive_errors += 1
+            if pooled.consecutive_errors >= self.max_errors:
+                pooled.disabled_until = time.time() + self.cooldown
+
+    def _pick(self, now):
+        healthy = [k for k in self.keys if k.healthy(now)]
+        if not healthy:
+            # every key is cooling down, probe the one that recovers first
+            return min(self.keys, key=lambda k: k.disabled_until)
+        if self.strategy == self.ROUND_ROBIN:
+            while True:
+                pooled = self.keys[self._next % len(self.keys)]
+                self._next += 1
+                if pooled.healthy(now):
+                    return pooled
+        return min(healthy, key=lambda k: (k.in_flight,
+                                           -(k.rate_limiter.available if k.rate_limiter else 0),
+                                           k.requests))
+
+    @property
+    def healthy_keys(self):
+        now = time.time()
+        return [k.key for k in self.keys if k.healthy(now)]
+
+    def __repr__(self):
+        return "KeyPool(keys={keys}, strategy={strategy})".format(
+            keys=','.join(k.key for k in self.keys),
+            strategy=self.strategy)
@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from .bitsows import Listener
+from .metrics import DEFAULT_BUCKETS, Histogram, RequestHook
+
+
+STAGES = ('ack', 'visible', 'first_fill', 'cancel')
+
+
+class OrderTimeline(object):
+    """When each step in the life of one order was observed.
+
+    Times are local clock readings. `sent` is taken just before the
+    place_order request goes out and `acked` once its response has been
+    read. `visible` is the first websocket update with the order's oid,
+    `first_fill` the first trade, fill or user trade that involves it
+    (`fill_source` tells which), `cancel_sent` and `cancel_acked` bracket
+    the cancel_order request and `cancelled` is the websocket removal
+    that confirms it.
+    """
+
+    def __init__(self, oid):
+        self.oid = oid
+        self.book = None
+        self.sent = None
+        self.acked = None
+        self.visible = None
+        self.first_fill = None
+        self.fill_source = None
+        self.fills = 0
+        self.tids = set()
+        self.cancel_sent = None
+        self.cancel_acked = None
+        self.cancelled = None
+        self.amount = None
+
+    def latencies(self):
+        """Seconds from `sent` to each stage seen so far, and from
+        `cancel_sent` to `cancelled` for 'cancel'."""
+        latencies = {}
+        for stage, start, end in (('ack', self.sent, self.acked),
+                                  ('visible', self.sent, self.visible),
+                                  ('first_fill', self.sent, self.first_fill),
+                                  ('cancel', self.cancel_sent, self.cancelled)):
+            if start is not None and end is not None:
+                latencies[stage] = end - start
+        return latencies
+
+    def __repr__(self):
+        return "OrderTimeline(oid={oid}, book={book}, latencies={latencies})".format(
+            oid=self.oid,
+            book=self.book,
+            latencies=self.latencies())
+
+
+class LifecycleTracker(RequestHook, Listener):
+    """Follows orders from place_order to their first fill or cancellation.
+
+    Register it as a hook on the bitso.Api that places the orders and as
+    a listener of a bitso.Client subscribed to 'diff-orders' (and
+    optionally 'orders' and 'trades') for the same books. place_order
+    responses start a timeline per oid; websocket updates and user_trades
+    responses with that oid fill it in. Updates that arrive while a
+    place_order request is still in flight are held until its oid is known,
+    since the book often shows an order before its response is read.
+
+    Example usage:
+
+        >>> tracker = bitso.LifecycleTracker()
+        >>> api.add_hook(tracker)
+        >>> bitso.Client(bitso.ListenerGroup([book, tracker])).connect(['diff-orders', 'trades'])
+        >>> oid = api.place_order(book='btc_mxn', side='buy', order_type='limit', major='0.01', price='150000')['oid']
+        >>> tracker.timeline(oid).latencies()
+        >>> tracker.report()['first_fill']['p99']
+    """
+
+    def __init__(self, max_orders=10000, buckets=DEFAULT_BUCKETS, clock=time.time):
+        """Instantiate a bitso.LifecycleTracker object.
+
+        Args:
+          max_orders (int, optional):
+            Timelines to keep. The oldest are dropped first
+          buckets (tuple, optional):
+            Upper bounds of the latency histograms, in seconds
+        """
+        self.max_orders = max_orders
+        self.clock = clock
+        self.histograms = dict((stage, Histogram(buckets)) for stage in STAGES)
+        self._orders = OrderedDict()
+        self._early = {}
+        self._inflight = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def timeline(self, oid):
+        with self._lock:
+            return self._orders.get(oid)
+
+    def timelines(self):
+        with self._lock:
+            return list(self._orders.values())
+
+    def report(self):
+        """Latency histograms of every stage, as dicts."""
+        with self._lock:
+            return dict((stage, hist.as_dict()) for stage, hist in self.histograms.items())
+
+    def before_request(self, request):
+        now = self.clock()
+        if request.endpoint == 'place_order':
+            self._local.started = now
+            with self._lock:
+                self._inflight += 1
+        elif request.endpoint == 'cancel_order':
+            with self._lock:
+                for oid in self._cancelled_oids(request.url):
+                    timeline = self._orders.get(oid)
+                    if timeline is not None and timeline.cancel_sent is None:
+                        timeline.cancel_sent = now
+
+    def after_response(self, request, response):
+        if request.endpoint not in ('place_order', 'cancel_order', 'user_trades'):
+            return
+        now = self.clock()
+        payload = json.loads(response.content)['payload']
+        with self._lock:
+            if request.endpoint == 'place_order':
+                self._placed(payload['oid'], self._local.started, now)
+            elif request.endpoint == 'cancel_order':
+                for oid in payload:
+                    timeline = self._orders.get(oid)
+                    if timeline is not None and timeline.cancel_acked is None:
+                        timeline.cancel_acked = now
+            else:
+                for trade in payload:
+                    self._fill(str(trade['oid']), now, 'user_trades', tid=trade.get('tid'))
+
+    def on_error(self, request, error):
+        if request.endpoint == 'place_order':
+            with self._lock:
+                self._done_placing()
+
+    def on_user_trades(self, trades):
+        """Records fills from bitso.UserTrade objects fetched some other way."""
+        now = self.clock()
+        with self._lock:
+            for trade in trades:
+                self._fill(str(trade.oid), now, 'user_trades', tid=trade.tid)
+
+    def on_update(self, data):
+        now = self.clock()
+        with self._lock:
+            if data.channel == 'trades':
+                for update in data.updates:
+                    for oid in (getattr(update, 'maker_oid', None), getattr(update, 'taker_oid', None)):
+                        if oid is not None:
+                            self._fill(oid, now, 'trades', data.book, getattr(update, 'tid', None))
+                return
+            for update in data.updates:
+                oid = getattr(update, 'oid', None)
+                timeline = self._timeline(oid)
+                if timeline is None:
+                    continue
+                timeline.book = data.book
+                if data.channel != 'diff-orders':
+                    self._visible(timeline, now)
+                elif update.amount > 0:
+                    self._visible(timeline, now)
+                    if timeline.amount is not None and update.amount < timeline.amount:
+                        self._fill(oid, now, 'diff-orders')
+                    timeline.amount = update.amount
+                elif self._is_cancel(update, timeline):
+                    if timeline.cancelled is None:
+                        timeline.cancelled = now
+                        if timeline.cancel_sent is not None:
+                            self.histograms['cancel'].observe(now - timeline.cancel_sent)
+                else:
+                    self._fill(oid, now, 'diff-orders')
+
+    def _timeline(self, oid):
+        if oid is None:
+            return None
+        timeline = self._orders.get(oid)
+        if timeline is None and self._inflight:
+            timeline = self._early.get(oid)
+            if timeline is None:
+                timeline = self._early[oid] = OrderTimeline(oid)
+        return timeline
+
+    def _placed(self, oid, started, acked):
+        timeline = self._early.pop(oid, None) or OrderTimeline(oid)
+        timeline.sent = started
+        timeline.acked = acked
+        self._orders[oid] = timeline
+        while len(self._orders) > self.max_orders:
+            self._orders.popitem(last=False)
+        for stage, value in timeline.latencies().items():
+            self.histograms[stage].observe(value)
+        self._done_placing()
+
+    def _done_placing(self):
+        self._inflight -= 1
+        if not self._inflight:
+            # nothing in flight can claim these anymore
+            self._early.clear()
+
+    def _visible(self, timeline, now):
+        if timeline.visible is None:
+            timeline.visible = now
+            if timeline.sent is not None:
+                self.histograms['visible'].observe(now - timeline.sent)
+
+    def _fill(self, oid, now, source, book=None, tid=None):
+        timeline = self._timeline(oid)
+        if timeline is None:
+            return
+        if tid is not None:
+            # user_trades polls and the trades channel repeat trades
+            if str(tid) in timeline.tids:
+                return
+            timeline.tids.add(str(tid))
+        if book is not None:
+            timeline.book = book
+        timeline.fills += 1
+        if timeline.first_fill is None:
+            timeline.first_fill = now
+            timeline.fill_source = source
+            if timeline.sent is not None:
+                self.histograms['first_fill'].observe(now - timeline.sent)
+
+    def _is_cancel(self, update, timeline):
+        status = getattr(update, 'status', None)
+        return status == 'cancelled' or (status is None and timeline.cancel_sent is not None)
+
+    def _cancelled_oids(self, url):
+        oids = url.rstrip('/').rsplit('/', 1)[-1]
+        if oids == 'all':
+            return []
+        return oids.split('-')
@@ -0,0 +1,405 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import bisect
+import logging
+from collections import OrderedDict, deque
+from itertools import islice
+
+from .bitsows import Listener
+from .errors import ApiClientError
+
+
+L2 = 'L2'
+L3 = 'L3'
+
+
+class BookSide(object):
+    """One side of a price-aggregated (L2) live order book.
+
+    Price levels are kept in a dict of price -> total amount, plus a sorted
+    list of prices for ordered access. diff-orders only sends the new
+    amount of each order, so the last (price, amount) of every resting oid
+    is remembered as a flat tuple to turn updates into level deltas.
+    """
+
+    def __init__(self, side):
+        self.side = side
+        self.prices = []
+        self.levels = {}
+        self.orders = {}
+        # a bitso.bookwalk.DepthIndex kept in step with the levels, if any
+        self.depth_index = None
+
+    def __len__(self):
+        return len(self.prices)
+
+    def update(self, price, amount, oid=None):
+        """Sets the resting amount of an order (0 removes it).
+
+        Returns:
+          The best price among the levels that changed, or None if
+          nothing did.
+        """
+        if price == 0:
+            # market orders never rest on the book
+            return None
+        moved = None
+        if oid is not None:
+            previous = self.orders.pop(oid, None)
+            if previous is not None and previous[0] != price:
+                moved = previous[0]
+                self._add(moved, -previous[1])
+                previous = None
+            delta = amount - (previous[1] if previous is not None else 0)
+            if amount > 0:
+                self.orders[oid] = (price, amount)
+        else:
+            delta = amount - self.levels.get(price, 0)
+        if delta != 0:
+            self._add(price, delta)
+        return self._changed(price if delta != 0 else None, moved)
+
+    def _changed(self, price, moved):
+        if moved is None:
+            return price
+        if price is None or self.is_better_or_equal(moved, price):
+            return moved
+        return price
+
+    def _add(self, price, delta):
+        total = self.levels.get(price)
+        if total is None:
+            if delta <= 0:
+                return
+            self.levels[price] = delta
+            bisect.insort(self.prices, price)
+            if self.depth_index is not None:
+                self.depth_index.dirty = True
+            return
+        total += delta
+        if total > 0:
+            self.levels[price] = total
+            if self.depth_index is not None:
+                self.depth_index.add(price, delta)
+            return
+        if total < 0:
+            logging.error("total amount at price %s went to negative amounts" % (price))
+        del self.levels[price]
+        del self.prices[bisect.bisect_left(self.prices, price)]
+        if self.depth_index is not None:
+            self.depth_index.dirty = True
+
+    def best(self):
+        """Returns the best price, or None if the side is empty."""
+        if not self.prices:
+            return None
+        return self.prices[-1] if self.side == 'bid' else self.prices[0]
+
+    def top(self, depth):
+        """Returns the best `depth` levels as a list of (price, amount)."""
+        if self.side == 'bid':
+            prices = self.prices[:-depth-1:-1]
+        else:
+            prices = self.prices[:depth]
+        levels = self.levels
+        return [(price, levels[price]) for price in prices]
+
+    def is_better_or_equal(self, price, reference):
+        if reference is None:
+            return True
+        return price >= reference if self.side == 'bid' else price <= reference
+
+
+class OrderQueueSide(BookSide):
+    """One side of a per-order (L3) live order book.
+
+    On top of the level totals, every price keeps its resting orders in
+    arrival order, and `index` maps oid -> (price, side) so updates and
+    removals never scan a level. The index may be shared by both sides.
+    """
+
+    def __init__(self, side, index=None):
+        super(OrderQueueSide, self).__init__(side)
+        self.queues = {}
+        self.index = index if index is not None else {}
+
+    def update(self, price, amount, oid=None):
+        if oid is None:
+            return super(OrderQueueSide, self).update(price, amount)
+        if price == 0:
+            return None
+        previous = 0
+        moved = None
+        entry = self.index.get(oid)
+        if entry is not None and entry[1] != self.side:
+            entry = None
+        if entry is not None:
+            queue = self.queues[entry[0]]
+            if entry[0] != price:
+                moved = entry[0]
+                self._add(moved, -queue[oid])
+                self._remove(moved, oid)
+                entry = None
+            elif amount > 0:
+                previous = queue[oid]
+        if amount > 0:
+            queue = self.queues.get(price)
+            if queue is None:
+                queue = self.queues[price] = OrderedDict()
+            queue[oid] = amount
+            self.index[oid] = (price, self.side)
+        elif entry is not None:
+            previous = self.queues[price][oid]
+            self._remove(price, oid)
+        delta = amount - previous
+        if delta != 0:
+            self._add(price, delta)
+        return self._changed(price if delta != 0 else None, moved)
+
+    def _remove(self, price, oid):
+        del self.index[oid]
+        queue = self.queues[price]
+        del queue[oid]
+        if not queue:
+            del self.queues[price]
+
+    def queue(self, price):
+        """Returns the orders resting at `price` as a list of (oid, amount), oldest first."""
+        return list(self.queues.get(price, {}).items())
+
+
+class TopOfBookEvent(object):
+    """A change in the best levels of a live order book."""
+
+    __slots__ = ('book', 'sequence', 'timestamp', 'bids', 'asks')
+
+    def __init__(self, book, sequence, timestamp, bids, asks):
+        self.book = book
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.bids = bids
+        self.asks = asks
+
+    @property
+    def bid(self):
+        return self.bids[0] if self.bids else None
+
+    @property
+    def ask(self):
+        return self.asks[0] if self.asks else None
+
+    def __repr__(self):
+        return "TopOfBookEvent(book={book}, sequence={sequence}, bid={bid}, ask={ask})".format(
+            book=self.book,
+            sequence=self.sequence,
+            bid=self.bid,
+            ask=self.ask)
+
+
+class TopOfBookStream(object):
+    """Calls `callback` with a bitso.TopOfBookEvent when the top `depth`
+    levels of a live book change, and only then."""
+
+    def __init__(self, callback, depth=1):
+        self.callback = callback
+        self.depth = depth
+        self.last = None
+
+    def check(self, book, changed, sequence, timestamp):
+        """Emits an event if the top levels changed. `changed` maps each side
+        to the prices that changed on it, or is None to compare the whole
+        top of book, as after loading a snapshot."""
+        bids = book.bids
+        asks = book.asks
+        if self.last is not None and changed is not None and not self._touches(bids, changed['bid']) \
+                and not self._touches(asks, changed['ask']):
+            return
+        top = (bids.top(self.depth), asks.top(self.depth))
+        if top == self.last:
+            return
+        self.last = top
+        self.callback(TopOfBookEvent(book.book, sequence, timestamp, top[0], top[1]))
+
+    def _touches(self, side, prices):
+        if not prices:
+            return False
+        # a level that was in the previous top may have left the book
+        last = self.last[0] if side.side == 'bid' else self.last[1]
+        reference = last[-1][0] if len(last) == self.depth else None
+        for price in prices:
+            if side.is_better_or_equal(price, reference):
+                return True
+        return False
+
+
+class LiveOrderBook(Listener):
+    """An order book kept up to date from the websocket 'diff-orders' channel.
+
+    It is seeded from an unaggregated REST snapshot; updates that arrive
+    before it are queued and those already covered by the snapshot's
+    sequence are dropped. A gap in sequence numbers marks the book as out
+    of sync and, when an Api was given, reloads the snapshot. A snapshot
+    older than the queued updates is retried on the next update. At most
+    `max_queued` updates are kept while out of sync, the oldest are
+    dropped first.
+
+    Example usage:
+
+        >>> book = bitso.LiveOrderBook('btc_mxn', api=bitso.Api())
+        >>> book.subscribe_top(lambda event: log(event), depth=1)
+        >>> client = bitso.Client(book)
+        >>> client.connect(['diff-orders'], books=['btc_mxn'])
+    """
+
+    def __init__(self, book, api=None, on_gap=None, mode=L2, max_queued=10000):
+        if mode not in (L2, L3):
+            raise ApiClientError({u'message': u"mode is not 'L2' or 'L3'"})
+        self.book = book
+        self.api = api
+        self.on_gap = on_gap
+        self.mode = mode
+        self._reset()
+        self.sequence = None
+        self.timestamp = None
+        self.synced = False
+        self._queued = deque(maxlen=max_queued)
+        self._resync_pending = False
+        self._streams = []
+
+    def _reset(self):
+        if self.mode == L3:
+            self.index = {}
+            self.bids = OrderQueueSide('bid', self.index)
+            self.asks = OrderQueueSide('ask', self.index)
+        else:
+            self.index = None
+            self.bids = BookSide('bid')
+            self.asks = BookSide('ask')
+
+    def order(self, oid):
+        """Returns (price, side, amount) of a resting order. L3 books only."""
+        entry = self.index.get(oid) if self.index is not None else None
+        if entry is None:
+            return None
+        side = self.bids if entry[1] == 'bid' else self.asks
+        return (entry[0], entry[1], side.queues[entry[0]][oid])
+
+    def queue(self, side, price):
+        """Returns the orders resting at `price` as a list of (oid, amount). L3 books only."""
+        if self.mode != L3:
+            raise ApiClientError({u'message': u"queue() needs mode='L3'"})
+        return (self.bids if side == 'bid' else self.asks).queue(price)
+
+    def subscribe_top(self, callback, depth=1):
+        """Registers `callback` for bitso.TopOfBookEvent on the top `depth` levels.
+
+        Returns:
+          The bitso.TopOfBookStream, which can be passed to unsubscribe_top().
+        """
+        stream = TopOfBookStream(callback, depth)
+        self._streams.append(stream)
+        return stream
+
+    def unsubscribe_top(self, stream):
+        self._streams.remove(stream)
+
+    def load_snapshot(self, order_book):
+        """Replaces the book with a bitso.OrderBook and applies queued updates."""
+        self._reset()
+        for order in order_book.bids:
+            self.bids.update(order.price, order.amount, order.oid)
+        for order in order_book.asks:
+            self.asks.update(order.price, order.amount, order.oid)
+        self.sequence = order_book.sequence
+        self.synced = True
+        queued = list(self._queued)
+        self._queued.clear()
+        for i, data in enumerate(queued):
+            if data.sequence_number <= self.sequence:
+                continue
+            if not self._apply(data):
+                # the snapshot is older than the queue; fetch another one
+                # when the next update arrives
+                self.synced = False
+                self._resync_pending = True
+                self._queued.extend(islice(queued, i, None))
+                return
+        self._notify(None)
+
+    def resync(self):
+        self.synced = False
+        self._resync_pending = False
+        if self.api is not None:
+            self.load_snapshot(self.api.order_book(self.book, aggregate=False))
+
+    def on_connect(self):
+        self.resync()
+
+    def on_update(self, data):
+        if data.channel != 'diff-orders' or data.sequence_number is None:
+            return
+        if data.book is not None and data.book != self.book:
+            return
+        if not self.synced:
+            self._queued.append(data)
+            if self._resync_pending:
+                self.resync()
+            return
+        if data.sequence_number <= self.sequence:
+            return
+        if not self._apply(data):
+            if self.on_gap is not None:
+                self.on_gap(self, data)
+            self._queued.append(data)
+            self.resync()
+
+    def _apply(self, data):
+        if data.sequence_number != self.sequence + 1:
+            logging.error("Sequence Number not consecutive: data.sequence:%s self.sequence:%s" % (data.sequence_number, self.sequence))
+            return False
+        changed = {'bid': [], 'ask': []}
+        for update in data.updates:
+            side = self.bids if update.side == 'bid' else self.asks
+            price = side.update(update.rate, update.amount, getattr(update, 'oid', None))
+            if price is not None:
+                changed[update.side].append(price)
+            self.timestamp = getattr(update, 'timestamp', self.timestamp)
+        self.sequence = data.sequence_number
+        if changed['bid'] or changed['ask']:
+            self._notify(changed)
+        return True
+
+    def _notify(self, changed):
+        for stream in self._streams:
+            stream.check(self, changed, self.sequence, self.timestamp)
+
+    def __repr__(self):
+        return "LiveOrderBook(book={book}, sequence={sequence}, bid={bid}, ask={ask})".format(
+            book=self.book,
+            sequence=self.sequence,
+            bid=self.bids.best(),
+            ask=self.asks.best())
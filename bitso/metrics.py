@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import bisect
+import threading
+
+
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PHASES = ('sign', 'server', 'download', 'parse', 'model', 'total')
+
+
+class Histogram(object):
+    """A fixed-bucket histogram with approximate quantiles.
+
+    Observations are counted in buckets with the given upper bounds, so
+    memory is constant no matter how many values are recorded. Quantiles
+    are interpolated inside the bucket that holds them.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Estimates the value below which a fraction `q` of observations fall."""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                lower = self.buckets[i-1] if i > 0 else self.min
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                lower = max(lower, self.min)
+                upper = min(upper, self.max)
+                fraction = (rank - cumulative) / float(bucket_count)
+                return lower + (upper - lower) * fraction
+            cumulative += bucket_count
+        return self.max
+
+    @property
+    def mean(self):
+        if self.count == 0:
+            return None
+        return self.sum / self.count
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99)
+        }
+
+    def __repr__(self):
+        return "Histogram(count={count}, p50={p50}, p99={p99})".format(
+            count=self.count,
+            p50=self.quantile(0.5),
+            p99=self.quantile(0.99))
+
+
+class RequestInfo(object):
+    """Everything known about a single HTTP request made by bitso.Api.
+
+    Passed to every bitso.RequestHook. `timings` maps a phase name to
+    seconds: 'sign' (building the auth header), 'server' (from sending the
+    request until the response headers arrive, connection setup included),
+    'download' (reading the body), 'parse' (JSON decoding), 'model'
+    (building bitso model objects) and 'total'. `params` are the query or
+    body parameters the request was sent with.
+    """
+
+    def __init__(self, endpoint, method, url, private=False, params=None):
+        self.endpoint = endpoint
+        self.method = method
+        self.url = url
+        self.private = private
+        self.params = params
+        self.timings = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.status_code = None
+        self.error_code = None
+        self.retries = 0
+        self.hedged = False
+
+    def __repr__(self):
+        return "RequestInfo(endpoint={endpoint}, method={method}, status_code={status_code})".format(
+            endpoint=self.endpoint,
+            method=self.method,
+            status_code=self.status_code)
+
+
+class RequestHook(object):
+    """Base class for objects that observe bitso.Api requests.
+
+    Register instances with bitso.Api.add_hook(). Exceptions raised by a
+    hook propagate to the caller.
+    """
+
+    def before_request(self, request):
+        pass
+
+    def after_response(self, request, response):
+        pass
+
+    def on_error(self, request, error):
+        pass
+
+
+class EndpointMetrics(object):
+    """Counters and latency histograms for one endpoint."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.requests = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.errors = {}
+        self.counters = {}
+        self.phases = dict((phase, Histogram(buckets)) for phase in PHASES)
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'errors': dict(self.errors),
+            'counters': dict(self.counters),
+            'phases': dict((phase, hist.as_dict())
+                           for phase, hist in self.phases.items() if hist.count)
+        }
+
+
+class ApiMetrics(object):
+    """Per-endpoint request metrics collected by bitso.Api.
+
+    Example usage:
+
+        >>> api = bitso.Api()
+        >>> api.ticker('btc_mxn')
+        >>> api.metrics.as_dict()['ticker']['phases']['total']['p99']
+        >>> print api.metrics.prometheus()
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix='bitso'):
+        self.buckets = buckets
+        self.prefix = prefix
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def _endpoint(self, endpoint):
+        metrics = self.endpoints.get(endpoint)
+        if metrics is None:
+            metrics = self.endpoints[endpoint] = EndpointMetrics(self.buckets)
+        return metrics
+
+    def record(self, request):
+        """Adds a finished bitso.RequestInfo to the metrics."""
+        with self._lock:
+            metrics = self._endpoint(request.endpoint)
+            metrics.requests += 1
+            metrics.bytes_sent += request.bytes_sent
+            metrics.bytes_received += request.bytes_received
+            if request.error_code is not None:
+                code = str(request.error_code)
+                metrics.errors[code] = metrics.errors.get(code, 0) + 1
+            for phase, seconds in request.timings.items():
+                if phase in metrics.phases:
+                    metrics.phases[phase].observe(seconds)
+
+    def increment(self, endpoint, counter, value=1):
+        """Adds `value` to a named counter of an endpoint."""
+        with self._lock:
+            counters = self._endpoint(endpoint).counters
+            counters[counter] = counters.get(counter, 0) + value
+
+    def histogram(self, endpoint, phase='total'):
+        """Returns the bitso.Histogram of a phase, or None if nothing was recorded."""
+        metrics = self.endpoints.get(endpoint)
+        if metrics is None or metrics.phases[phase].count == 0:
+            return None
+        return metrics.phases[phase]
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = {}
+
+    def as_dict(self):
+        with self._lock:
+            return dict((endpoint, metrics.as_dict())
+                        for endpoint, metrics in self.endpoints.items())
+
+    def prometheus(self):
+        """Returns the metrics in the Prometheus text exposition format."""
+        p = self.prefix
+        lines = []
+        with self._lock:
+            endpoints = sorted(self.endpoints.items())
+            lines.append('# TYPE %s_requests_total counter' % p)
+            for endpoint, m in endpoints:
+                lines.append('%s_requests_total{endpoint="%s"} %d' % (p, endpoint, m.requests))
+            lines.append('# TYPE %s_request_errors_total counter' % p)
+            for endpoint, m in endpoints:
+                for code, count in sorted(m.errors.items()):
+                    lines.append('%s_request_errors_total{endpoint="%s",code="%s"} %d' % (p, endpoint, code, count))
+            lines.append('# TYPE %s_bytes_sent_total counter' % p)
+            for endpoint, m in endpoints:
+                lines.append('%s_bytes_sent_total{endpoint="%s"} %d' % (p, endpoint, m.bytes_sent))
+            lines.append('# TYPE %s_bytes_received_total counter' % p)
+            for endpoint, m in endpoints:
+                lines.append('%s_bytes_received_total{endpoint="%s"} %d' % (p, endpoint, m.bytes_received))
+            counter_names = sorted(set(name for _, m in endpoints for name in m.counters))
+            for name in counter_names:
+                lines.append('# TYPE %s_%s_total counter' % (p, name))
+                for endpoint, m in endpoints:
+                    if name in m.counters:
+                        lines.append('%s_%s_total{endpoint="%s"} %d' % (p, name, endpoint, m.counters[name]))
+            lines.append('# TYPE %s_request_duration_seconds histogram' % p)
+            for endpoint, m in endpoints:
+                for phase in PHASES:
+                    hist = m.phases[phase]
+                    if not hist.count:
+                        continue
+                    labels = 'endpoint="%s",phase="%s"' % (endpoint, phase)
+                    cumulative = 0
+                    for bound, count in zip(hist.buckets, hist.counts):
+                        cumulative += count
+                        lines.append('%s_request_duration_seconds_bucket{%s,le="%s"} %d' % (p, labels, repr(bound), cumulative))
+                    lines.append('%s_request_duration_seconds_bucket{%s,le="+Inf"} %d' % (p, labels, hist.count))
+                    lines.append('%s_request_duration_seconds_sum{%s} %r' % (p, labels, hist.sum))
+                    lines.append('%s_request_duration_seconds_count{%s} %d' % (p, labels, hist.count))
+        return '\n'.join(lines) + '\n'
@@ -26,7 +26,10 @@
 
 from decimal import Decimal
 from datetime import datetime
-import dateutil.parser
+
+from .utils import LazyModule
+
+dateutil = LazyModule('dateutil.parser')
 
 
 class BaseModel(object):
@@ -61,6 +64,11 @@ class Book(BaseModel):
         for (param, val) in self._default_params.items():
             setattr(self, param, val)
 
+        if kwargs.get('tick_size'):
+            setattr(self, 'tick_size', Decimal(kwargs.get('tick_size')))
+        else:
+            setattr(self, 'tick_size', None)
+
     def __repr__(self):
         return "Book(symbol={symbol})".format(symbol=self.symbol)
             
@@ -189,7 +197,9 @@ class OrderBook(BaseModel):
             if param in ['asks', 'bids']:
                 public_orders = []
                 for order in val:
-                    public_orders.append(PublicOrder._NewFromJsonDict(order))
+                    if not isinstance(order, PublicOrder):
+                        order = PublicOrder._NewFromJsonDict(order)
+                    public_orders.append(order)
                 setattr(self, param, public_orders)
                 continue
             setattr(self, param, val)
@@ -570,6 +580,8 @@ class OrderUpdate(BaseModel):
                 setattr(self, 'value', Decimal(str(value)))
             elif param == 'o':
                 setattr(self, 'oid', str(value))
+            elif param == 's':
+                setattr(self, 'status', value)
         if not hasattr(self, 'amount'):
             setattr(self, 'amount', Decimal('0.0'))
             setattr(self, 'value', Decimal('0.0'))
@@ -596,6 +608,15 @@ class TradeUpdate(BaseModel):
                 setattr(self, 'value', Decimal(str(value)))
             elif param  == 'i':
                 setattr(self, 'tid', value)
+            elif param == 'mo':
+                setattr(self, 'maker_oid', str(value))
+            elif param == 'to':
+                setattr(self, 'taker_oid', str(value))
+            elif param == 't':
+                if value == 0:
+                    setattr(self, 'maker_side', 'buy')
+                elif value == 1:
+                    setattr(self, 'maker_side', 'sell')
             
                 
     def __repr__(self):
@@ -609,7 +630,9 @@ class TradeUpdate(BaseModel):
 class StreamUpdate(object):
     def __init__(self, json_dict):
         self.channel = json_dict['type']
+        self.book = json_dict.get('book')
         self.sequence_number = None
+        self.received_at = None
         if 'sequence' in json_dict:
             self.sequence_number = int(json_dict['sequence'])
         self.updates = []
@@ -0,0 +1,304 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import json
+import threading
+import time
+import logging
+from decimal import Decimal
+
+from .bitsows import Listener
+from .metrics import RequestHook
+
+
+_SIDES = {'bid': 'buy', 'ask': 'sell', 'buy': 'buy', 'sell': 'sell'}
+
+
+class TrackedOrder(object):
+    """The locally known state of one of the user's orders."""
+
+    __slots__ = ('oid', 'book', 'side', 'type', 'price', 'original_amount',
+                 'unfilled_amount', 'status', 'updated_at')
+
+    def __init__(self, oid, book, side, type=None, price=None, original_amount=None,
+                 unfilled_amount=None, status='open'):
+        self.oid = oid
+        self.book = book
+        self.side = _SIDES.get(side, side)
+        self.type = type
+        self.price = price
+        self.original_amount = original_amount
+        self.unfilled_amount = unfilled_amount
+        self.status = status
+        self.updated_at = time.time()
+
+    def __repr__(self):
+        return "TrackedOrder(oid={oid}, book={book}, side={side}, price={price}, unfilled_amount={unfilled_amount}, status={status})".format(
+            oid=self.oid,
+            book=self.book,
+            side=self.side,
+            price=self.price,
+            unfilled_amount=self.unfilled_amount,
+            status=self.status)
+
+
+class OrderStore(RequestHook, Listener):
+    """An in-memory view of the user's open orders.
+
+    The store registers itself as a hook of the bitso.Api, so orders are
+    added from every place_order response (place_orders included) and
+    dropped on cancel_order responses. They are updated from websocket
+    'diff-orders' and 'orders' updates that carry their oid, and
+    periodically reconciled against Api.open_orders in a background
+    thread. Updates of unknown orders seen while a place_order request is
+    in flight are held back, and applied once its response names the
+    order. Lookups by oid, book and side are dictionary lookups.
+
+    Example usage:
+
+        >>> store = bitso.OrderStore(api, books=['btc_mxn'])
+        >>> store.start()
+        >>> client = bitso.Client(store)
+        >>> api.place_order(book='btc_mxn', side='buy', order_type='limit', major='.01', price='7000')
+        >>> store.orders('btc_mxn', 'buy')
+    """
+
+    def __init__(self, api, books=None, reconcile_interval=30.0, page_size=100):
+        """Instantiate a bitso.OrderStore object.
+
+        Args:
+          api (bitso.Api):
+            An authenticated bitso.Api instance. The store adds itself
+            to its hooks
+          books (list, optional):
+            Books reconciled in the background. Default is every book
+            with a tracked order
+          reconcile_interval (float, optional):
+            Seconds between reconciliations. Default is 30.0
+          page_size (int, optional):
+            Orders fetched per Api.open_orders request. Default is 100
+        """
+        self.api = api
+        self.books = list(books) if books else None
+        self.reconcile_interval = reconcile_interval
+        self.page_size = page_size
+        self._orders = {}
+        self._by_side = {}
+        self._early = {}
+        self._inflight = 0
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+        api.add_hook(self)
+
+    def get(self, oid):
+        """Returns the bitso.TrackedOrder with this oid, or None."""
+        return self._orders.get(oid)
+
+    def __contains__(self, oid):
+        return oid in self._orders
+
+    def __len__(self):
+        return len(self._orders)
+
+    def orders(self, book=None, side=None):
+        """Returns the open orders, optionally filtered by book and side."""
+        with self._lock:
+            if book is None:
+                orders = self._orders.values()
+                if side is not None:
+                    orders = [o for o in orders if o.side == _SIDES.get(side, side)]
+                return list(orders)
+            if side is not None:
+                return list(self._by_side.get((book, _SIDES.get(side, side)), {}).values())
+            return (list(self._by_side.get((book, 'buy'), {}).values()) +
+                    list(self._by_side.get((book, 'sell'), {}).values()))
+
+    def track(self, order):
+        """Adds or replaces a bitso.TrackedOrder."""
+        with self._lock:
+            previous = self._orders.get(order.oid)
+            if previous is not None:
+                self._by_side[(previous.book, previous.side)].pop(order.oid, None)
+            self._orders[order.oid] = order
+            self._by_side.setdefault((order.book, order.side), {})[order.oid] = order
+
+    def remove(self, oid, status=None):
+        """Drops an order that is no longer open.
+
+        Returns:
+          The removed bitso.TrackedOrder, or None if it was not tracked.
+        """
+        with self._lock:
+            order = self._orders.pop(oid, None)
+            if order is not None:
+                self._by_side[(order.book, order.side)].pop(oid, None)
+                if status is not None:
+                    order.status = status
+            return order
+
+    def place_order(self, **kwargs):
+        """Places an order with Api.place_order, which starts tracking it.
+
+        Returns:
+          The payload returned by Api.place_order.
+        """
+        return self.api.place_order(**kwargs)
+
+    def track_placed(self, payload, **kwargs):
+        """Tracks an order from its place_order payload and arguments."""
+        amount = kwargs.get('major')
+        oid = payload['oid']
+        with self._lock:
+            self.track(TrackedOrder(oid,
+                                    kwargs.get('book'),
+                                    kwargs.get('side'),
+                                    kwargs.get('order_type'),
+                                    Decimal(str(kwargs['price'])) if kwargs.get('price') is not None else None,
+                                    Decimal(str(amount)) if amount is not None else None,
+                                    Decimal(str(amount)) if amount is not None else None))
+            update = self._early.pop(oid, None)
+            if update is not None:
+                self._apply(oid, update)
+
+    def cancel_order(self, oids):
+        """Cancels orders with Api.cancel_order, which stops tracking them."""
+        return self.api.cancel_order(oids)
+
+    def before_request(self, request):
+        if request.endpoint == 'place_order':
+            with self._lock:
+                self._inflight += 1
+
+    def after_response(self, request, response):
+        if request.endpoint not in ('place_order', 'cancel_order'):
+            return
+        payload = json.loads(response.content)['payload']
+        if request.endpoint == 'cancel_order':
+            for oid in payload:
+                self.remove(oid, 'cancelled')
+            return
+        params = request.params
+        try:
+            self.track_placed(payload, book=params.get('book'), side=params.get('side'),
+                              order_type=params.get('type'), major=params.get('major'),
+                              price=params.get('price'))
+        finally:
+            with self._lock:
+                self._done_placing()
+
+    def on_error(self, request, error):
+        if request.endpoint == 'place_order':
+            with self._lock:
+                self._done_placing()
+
+    def _done_placing(self):
+        self._inflight -= 1
+        if not self._inflight:
+            # nothing in flight can claim these anymore
+            self._early.clear()
+
+    def on_update(self, data):
+        if data.channel not in ('diff-orders', 'orders'):
+            return
+        for update in data.updates:
+            oid = getattr(update, 'oid', None)
+            if oid is None:
+                continue
+            with self._lock:
+                if oid in self._orders:
+                    self._apply(oid, update)
+                elif self._inflight:
+                    # may be an order whose place_order response is not read yet
+                    self._early[oid] = update
+
+    def _apply(self, oid, update):
+        status = getattr(update, 'status', None)
+        if update.amount == 0 or status in ('cancelled', 'completed'):
+            self.remove(oid, status or 'closed')
+            return
+        order = self._orders.get(oid)
+        if order is None:
+            return
+        order.unfilled_amount = update.amount
+        order.price = update.rate
+        if order.original_amount is not None and update.amount < order.original_amount:
+            order.status = 'partial-fill'
+        order.updated_at = time.time()
+
+    def reconcile(self, book=None):
+        """Replaces the local state of a book with Api.open_orders.
+
+        Every page of open orders is fetched before anything is dropped.
+        Orders tracked after the first request was sent are kept, since
+        the response may not include them yet.
+        """
+        started = time.time()
+        remote = []
+        marker = None
+        while True:
+            page = self.api.open_orders(book, marker=marker, limit=self.page_size)
+            remote.extend(page)
+            if len(page) < self.page_size or page[-1].oid == marker:
+                break
+            marker = page[-1].oid
+        seen = set()
+        with self._lock:
+            for order in remote:
+                seen.add(order.oid)
+                self.track(TrackedOrder(order.oid, order.book, order.side, order.type,
+                                        order.price, order.original_amount,
+                                        order.unfilled_amount, order.status))
+            for order in self.orders(book):
+                if order.oid not in seen and order.updated_at < started:
+                    self.remove(order.oid, 'closed')
+
+    def start(self):
+        """Starts reconciling in a background thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.reconcile_interval):
+            books = self.books
+            if books is None:
+                with self._lock:
+                    books = set(o.book for o in self._orders.values())
+            for book in books:
+                try:
+                    self.reconcile(book)
+                except Exception as e:
+                    logging.error("order reconciliation for %s failed: %s" % (book, e))
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import codecs
+import json
+import re
+
+from .models import PublicOrder
+
+
+_SIDE_KEY = re.compile(r'"(asks|bids)"\s*:\s*\[')
+_decoder = json.JSONDecoder()
+
+
+class OrderBookParser(object):
+    """Incrementally parses an order book response as its bytes arrive.
+
+    Price levels are turned into bitso.PublicOrder instances as soon as
+    each one is complete, and levels past `depth` on either side are
+    skipped without being decoded. Everything outside the 'asks' and
+    'bids' arrays is kept and decoded once the response is complete.
+
+    Example usage:
+
+        >>> parser = OrderBookParser(depth=10)
+        >>> for chunk in response.iter_content(16384):
+        ...     parser.feed(chunk)
+        >>> data = parser.close()
+        >>> data['payload']['asks']
+    """
+
+    def __init__(self, depth=None):
+        self.depth = depth
+        self.levels = {'asks': [], 'bids': []}
+        self.seen = {'asks': 0, 'bids': 0}
+        self._decode = codecs.getincrementaldecoder('utf-8')().decode
+        self._buffer = u''
+        self._skeleton = []
+        self._side = None
+
+    def feed(self, chunk):
+        """Consumes the next chunk of the response body (bytes)."""
+        self._buffer += self._decode(chunk)
+        buf = self._buffer
+        pos = 0
+        while True:
+            if self._side is None:
+                match = _SIDE_KEY.search(buf, pos)
+                if match is None:
+                    # keep enough of the tail to match a key split across chunks
+                    keep = max(pos, len(buf) - 32)
+                    self._skeleton.append(buf[pos:keep])
+                    pos = keep
+                    break
+                self._skeleton.append(buf[pos:match.end()])
+                self._side = match.group(1)
+                pos = match.end()
+                continue
+            while pos < len(buf) and buf[pos] in u' \t\r\n,':
+                pos += 1
+            if pos == len(buf):
+                break
+            if buf[pos] == u']':
+                self._skeleton.append(u']')
+                self._side = None
+                pos += 1
+                continue
+            end = buf.find(u'}', pos)
+            if end == -1:
+                break
+            side = self._side
+            if self.depth is None or self.seen[side] < self.depth:
+                level, _ = _decoder.raw_decode(buf, pos)
+                self.levels[side].append(PublicOrder._NewFromJsonDict(level))
+            self.seen[side] += 1
+            pos = end + 1
+        self._buffer = buf[pos:]
+
+    def close(self):
+        """Finishes parsing.
+
+        Returns:
+          The decoded response, with the payload's 'asks' and 'bids'
+          holding bitso.PublicOrder instances.
+        """
+        self._skeleton.append(self._buffer + self._decode(b'', True))
+        self._buffer = u''
+        data = json.loads(u''.join(self._skeleton))
+        payload = data.get('payload') if isinstance(data, dict) else None
+        if isinstance(payload, dict):
+            for side in ('asks', 'bids'):
+                if side in payload:
+                    payload[side] = self.levels[side]
+        return data
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import heapq
+import logging
+import threading
+import time
+
+from .bookdiff import diff_order_books
+from .errors import ApiClientError
+from .history import to_timestamp
+
+
+class BookDiff(object):
+    """The changes between two consecutive order book snapshots.
+
+    `updates` are bitso.models.OrderUpdate instances as produced by
+    bitso.diff_order_books, so the same code can handle polled and
+    streamed diffs. `bids` and `asks` list the changed levels as
+    (price, amount), where 0 means the level is gone. The first diff of
+    a book has `previous_sequence` None and lists every level.
+    """
+
+    channel = 'diff-orders'
+
+    def __init__(self, book, sequence, previous_sequence, updates):
+        self.book = book
+        self.sequence = sequence
+        self.previous_sequence = previous_sequence
+        self.updates = updates
+
+    @property
+    def bids(self):
+        return [(update.rate, update.amount) for update in self.updates if update.side == 'bid']
+
+    @property
+    def asks(self):
+        return [(update.rate, update.amount) for update in self.updates if update.side == 'ask']
+
+    def __repr__(self):
+        return "BookDiff(book={book}, sequence={sequence}, updates={num_updates})".format(
+            book=self.book,
+            sequence=self.sequence,
+            num_updates=len(self.updates))
+
+
+class PolledBook(object):
+    """Polling state of one book."""
+
+    def __init__(self, book, interval):
+        self.book = book
+        self.interval = interval
+        self.desired = interval
+        self.rate = None
+        self.sequence = None
+        self.polled_at = None
+        self.order_book = None
+        self.ticker = None
+        self.ticker_at = None
+        self.requests = 0
+        self.changes = 0
+
+    def __repr__(self):
+        return "PolledBook(book={book}, interval={interval:.3f}, rate={rate})".format(
+            book=self.book,
+            interval=self.interval,
+            rate=self.rate)
+
+
+class AdaptivePoller(object):
+    """Polls order books over REST at a rate that follows how fast each
+    book changes, within a global request budget.
+
+    After every poll the number of changes since the previous one is
+    taken from OrderBook.sequence (or from Ticker.created_at when probing
+    with the ticker) and folded into a moving change rate. The book's next
+    interval aims for `target_changes` changes per poll, within
+    [min_interval, max_interval]. When the intervals of all books would
+    need more than `budget` requests per second, they are stretched in
+    proportion. Each poll emits a bitso.BookDiff to `on_diff` when the
+    book changed, never the full book again.
+
+    Example usage:
+
+        >>> poller = bitso.AdaptivePoller(api, ['btc_mxn', 'eth_mxn'], on_diff=handle, budget=1.0)
+        >>> poller.start()
+    """
+
+    def __init__(self, api, books, on_diff=None, budget=1.0, min_interval=0.5, max_interval=60.0,
+                 target_changes=1.0, smoothing=0.3, probe_ticker=False, clock=time.time):
+        """Instantiate a bitso.AdaptivePoller object.
+
+        Args:
+          api (bitso.Api):
+            Client used for ticker and order_book requests
+          books (list):
+            Books to poll, at least one
+          on_diff (callable, optional):
+            Called with a bitso.BookDiff whenever a book changed
+          budget (float, optional):
+            Requests per second allowed across all books. Default is 1.0
+          min_interval, max_interval (float, optional):
+            Bounds of each book's polling interval in seconds
+          target_changes (float, optional):
+            Changes a poll should see on average. Default is 1.0
+          smoothing (float, optional):
+            Weight of the latest observation in the change rate
+          probe_ticker (bool, optional):
+            Poll the ticker first and only fetch the order book when the
+            ticker moved. Saves bandwidth on quiet books
+        """
+        if not books:
+            raise ApiClientError({u'message': u'AdaptivePoller needs at least one book'})
+        self.api = api
+        self.on_diff = on_diff
+        self.budget = budget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_changes = target_changes
+        self.smoothing = smoothing
+        self.probe_ticker = probe_ticker
+        self.clock = clock
+        initial = max(min_interval, len(books) / float(budget))
+        self.books = dict((book, PolledBook(book, initial)) for book in books)
+        self._queue = [(0, book) for book in sorted(self.books)]
+        heapq.heapify(self._queue)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Starts polling in a background thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            delay = self.run_pending()
+            self._stop.wait(delay)
+
+    def run_pending(self):
+        """Polls every book that is due.
+
+        Returns:
+          Seconds until the next book is due.
+        """
+        while True:
+            with self._lock:
+                due, book = self._queue[0]
+                now = self.clock()
+                if due > now:
+                    return due - now
+                heapq.heappop(self._queue)
+            state = self.books[book]
+            try:
+                self.poll(state)
+            except Exception as e:
+                logging.error("polling %s failed: %s" % (book, e))
+            with self._lock:
+                heapq.heappush(self._queue, (self.clock() + state.interval, book))
+
+    def poll(self, state):
+        """Polls one book, emits its diff and adapts its interval."""
+        now = self.clock()
+        if self.probe_ticker and state.sequence is not None:
+            ticker = self.api.ticker(state.book)
+            state.requests += 1
+            key = (ticker.bid, ticker.ask, ticker.last, ticker.volume)
+            ticker_at = to_timestamp(ticker.created_at)
+            moved = key != state.ticker
+            elapsed = (ticker_at - state.ticker_at) if state.ticker_at is not None else None
+            state.ticker = key
+            state.ticker_at = ticker_at
+            if not moved:
+                self._adapt(state, 0, now, elapsed)
+                return None
+        order_book = self.api.order_book(state.book)
+        state.requests += 1
+        return self._update(state, order_book, now)
+
+    def _update(self, state, order_book, now):
+        previous = state.sequence
+        diff = None
+        if previous is None or order_book.sequence > previous:
+            diff = BookDiff(state.book, order_book.sequence, previous,
+                            diff_order_books(state.order_book, order_book))
+            state.order_book = order_book
+            state.sequence = order_book.sequence
+        if previous is not None:
+            self._adapt(state, max(order_book.sequence - previous, 0), now)
+        state.polled_at = now
+        if diff is not None and (diff.updates or previous is None):
+            state.changes += 1
+            if self.on_diff is not None:
+                self.on_diff(diff)
+            return diff
+        return None
+
+    def _adapt(self, state, changes, now, elapsed=None):
+        if elapsed is None or elapsed <= 0:
+            elapsed = now - state.polled_at if state.polled_at is not None else None
+        state.polled_at = now
+        if not elapsed or elapsed <= 0:
+            return
+        observed = changes / elapsed
+        if state.rate is None:
+            state.rate = observed
+        else:
+            state.rate += self.smoothing * (observed - state.rate)
+        if state.rate > 0:
+            interval = self.target_changes / state.rate
+        else:
+            interval = self.max_interval
+        state.desired = min(self.max_interval, max(self.min_interval, interval))
+        self._fit_budget()
+
+    def _fit_budget(self):
+        # requests per second the desired intervals would need
+        per_poll = 2 if self.probe_ticker else 1
+        demand = sum(per_poll / state.desired for state in self.books.values())
+        stretch = max(1.0, demand / self.budget)
+        for state in self.books.values():
+            state.interval = state.desired * stretch
@@ -0,0 +1,334 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import json
+import logging
+import threading
+from collections import deque
+from decimal import Decimal
+
+from .bitsows import Listener
+from .metrics import RequestHook
+from .models import UserTrade
+
+
+ZERO = Decimal(0)
+
+
+class ProjectedBalance(object):
+    """The locally projected balance of one currency."""
+
+    __slots__ = ('currency', 'total', 'locked')
+
+    def __init__(self, currency, total=ZERO, locked=ZERO):
+        self.currency = currency
+        self.total = total
+        self.locked = locked
+
+    @property
+    def available(self):
+        return self.total - self.locked
+
+    def __repr__(self):
+        return "ProjectedBalance(currency={currency}, total={total}, locked={locked})".format(
+            currency=self.currency,
+            total=self.total,
+            locked=self.locked)
+
+
+class BalanceProjector(RequestHook, Listener):
+    """Projects the user's balances from their own order and trade events.
+
+    The projection is seeded from Api.balances() and then moved by the
+    funds each placed order locks, the funds cancellations release and
+    the fills reported as bitso.UserTrade instances. It is re-synced with
+    Api.balances() on a slow schedule, and any difference found is passed
+    to `on_drift`.
+
+    Registered as a hook of the bitso.Api, it follows place_order,
+    cancel_order and user_trades responses by itself. As a listener of a
+    bitso.Client it also releases the funds of orders the 'diff-orders'
+    or 'orders' channels report cancelled, and applies the fills of its
+    orders seen on the 'trades' channel. Those carry no fees, so the
+    fees are only picked up from user_trades or the next re-sync. Fills
+    and cancellations of unknown orders seen while a place_order request
+    is in flight are held back, and applied once its response names the
+    order.
+
+    Example usage:
+
+        >>> projector = bitso.BalanceProjector(api, sync_interval=300)
+        >>> api.add_hook(projector)
+        >>> projector.sync()
+        >>> projector.start()
+        >>> bitso.Client(projector).connect(['diff-orders', 'trades'])
+        >>> projector.available('mxn')
+        Decimal('75.0000')
+    """
+
+    def __init__(self, api, sync_interval=300.0, on_drift=None):
+        """Instantiate a bitso.BalanceProjector object.
+
+        Args:
+          api (bitso.Api):
+            An authenticated bitso.Api instance
+          sync_interval (float, optional):
+            Seconds between re-syncs with Api.balances(). Default is 300
+          on_drift (callable, optional):
+            Called with a dictionary of {currency: (total_drift, locked_drift)}
+            when a re-sync finds the projection was off
+        """
+        self.api = api
+        self.sync_interval = sync_interval
+        self.on_drift = on_drift
+        self.last_drift = {}
+        self._balances = {}
+        self._order_locks = {}
+        self._seen_trades = set()
+        self._seen_order = deque()
+        self._early_fills = {}
+        self._early_cancels = set()
+        self._inflight = 0
+        self.max_seen_trades = 10000
+        self.max_orders = 10000
+        self.seeded = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def balance(self, currency):
+        """Returns the bitso.ProjectedBalance of a currency."""
+        balance = self._balances.get(currency)
+        if balance is None:
+            with self._lock:
+                balance = self._balances.setdefault(currency, ProjectedBalance(currency))
+        return balance
+
+    def available(self, currency):
+        return self.balance(currency).available
+
+    def locked(self, currency):
+        return self.balance(currency).locked
+
+    def total(self, currency):
+        return self.balance(currency).total
+
+    @property
+    def currencies(self):
+        return list(self._balances)
+
+    def order_placed(self, oid, book, side, major=None, minor=None, price=None):
+        """Locks the funds an accepted order reserves.
+
+        Buys lock the minor currency (minor, or major * price) and sells
+        lock the major currency (major, or minor / price). A market order
+        given in the other currency and without a reference price locks
+        nothing; its fills still move the balances.
+        """
+        major_currency, minor_currency = book.split('_')
+        if side == 'buy':
+            currency, amount, other = minor_currency, minor, major
+        else:
+            currency, amount, other = major_currency, major, minor
+        if amount is not None:
+            amount = Decimal(str(amount))
+        elif price is None:
+            amount = ZERO
+        elif side == 'buy':
+            amount = Decimal(str(other)) * Decimal(str(price))
+        else:
+            amount = Decimal(str(other)) / Decimal(str(price))
+        with self._lock:
+            if len(self._order_locks) >= self.max_orders:
+                # orders that have nothing left locked are only kept to
+                # recognize their fills on the 'trades' channel
+                for spent in [o for o, lock in self._order_locks.items() if lock[1] <= 0]:
+                    del self._order_locks[spent]
+            lock = self._order_locks[oid] = [currency, amount, book, side]
+            self._get(currency).locked += amount
+            sign = 1 if side == 'buy' else -1
+            for tid, filled, value in self._early_fills.pop(oid, []):
+                self._fill(book, tid, oid, sign * filled, -sign * value, None, None)
+            if oid in self._early_cancels:
+                self._early_cancels.discard(oid)
+                del self._order_locks[oid]
+                self._get(currency).locked -= lock[1]
+
+    def order_cancelled(self, oid):
+        """Releases whatever an order still had locked."""
+        with self._lock:
+            lock = self._order_locks.pop(oid, None)
+            if lock is not None:
+                self._get(lock[0]).locked -= lock[1]
+
+    def trade(self, trade):
+        """Applies a fill, given as a bitso.UserTrade. Repeated fills are ignored."""
+        with self._lock:
+            self._fill(trade.book, trade.tid, trade.oid, trade.major, trade.minor,
+                       trade.fees_amount, trade.fees_currency)
+
+    def before_request(self, request):
+        if request.endpoint == 'place_order':
+            with self._lock:
+                self._inflight += 1
+
+    def after_response(self, request, response):
+        if request.endpoint not in ('place_order', 'cancel_order', 'user_trades'):
+            return
+        payload = json.loads(response.content)['payload']
+        if request.endpoint == 'place_order':
+            params = request.params
+            try:
+                self.order_placed(payload['oid'], params['book'], params['side'],
+                                  params.get('major'), params.get('minor'), params.get('price'))
+            finally:
+                with self._lock:
+                    self._done_placing()
+        elif request.endpoint == 'cancel_order':
+            for oid in payload:
+                self.order_cancelled(oid)
+        else:
+            for trade in payload:
+                self.trade(UserTrade._NewFromJsonDict(trade))
+
+    def on_error(self, request, error):
+        if request.endpoint == 'place_order':
+            with self._lock:
+                self._done_placing()
+
+    def on_update(self, data):
+        if data.channel == 'trades':
+            self._trade_updates(data)
+            return
+        if data.channel not in ('diff-orders', 'orders'):
+            return
+        for update in data.updates:
+            oid = getattr(update, 'oid', None)
+            if oid is None or getattr(update, 'status', None) != 'cancelled':
+                continue
+            if oid in self._order_locks:
+                self.order_cancelled(oid)
+            elif self._inflight:
+                with self._lock:
+                    self._early_cancels.add(oid)
+
+    def _trade_updates(self, data):
+        with self._lock:
+            for update in data.updates:
+                for oid in (getattr(update, 'maker_oid', None), getattr(update, 'taker_oid', None)):
+                    if oid is None:
+                        continue
+                    lock = self._order_locks.get(oid)
+                    if lock is None:
+                        if self._inflight:
+                            # may be an order whose place_order response is not read yet
+                            self._early_fills.setdefault(oid, []).append((update.tid, update.amount, update.value))
+                        continue
+                    sign = 1 if lock[3] == 'buy' else -1
+                    self._fill(lock[2], update.tid, oid, sign * update.amount, -sign * update.value, None, None)
+
+    def _done_placing(self):
+        self._inflight -= 1
+        if not self._inflight:
+            # nothing in flight can claim these anymore
+            self._early_fills.clear()
+            self._early_cancels.clear()
+
+    def _fill(self, book, tid, oid, major, minor, fees_amount, fees_currency):
+        key = (str(tid), oid)
+        if key in self._seen_trades:
+            return
+        self._seen_trades.add(key)
+        self._seen_order.append(key)
+        if len(self._seen_order) > self.max_seen_trades:
+            self._seen_trades.discard(self._seen_order.popleft())
+        major_currency, minor_currency = book.split('_')
+        self._get(major_currency).total += major
+        self._get(minor_currency).total += minor
+        if fees_amount:
+            self._get(fees_currency).total -= abs(fees_amount)
+        spent = -minor if minor < 0 else -major
+        lock = self._order_locks.get(oid)
+        if lock is not None and spent > 0:
+            released = min(lock[1], spent)
+            lock[1] -= released
+            self._get(lock[0]).locked -= released
+
+    def sync(self):
+        """Replaces the projection with Api.balances().
+
+        Returns:
+          A dictionary of {currency: (total_drift, locked_drift)} with the
+          currencies whose projection was off, as projected minus actual.
+          The first sync only seeds the projection and reports no drift.
+        """
+        actual = self.api.balances()
+        drift = {}
+        with self._lock:
+            for currency in set(actual.currencies) | set(self._balances):
+                remote = getattr(actual, currency, None) if currency in actual.currencies else None
+                total = remote.total if remote is not None else ZERO
+                locked = remote.locked if remote is not None else ZERO
+                local = self._get(currency)
+                if self.seeded and (local.total != total or local.locked != locked):
+                    drift[currency] = (local.total - total, local.locked - locked)
+                local.total = total
+                local.locked = locked
+            self.seeded = True
+        self.last_drift = drift
+        if drift and self.on_drift is not None:
+            self.on_drift(drift)
+        return drift
+
+    def start(self):
+        """Starts re-syncing in a background thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _get(self, currency):
+        balance = self._balances.get(currency)
+        if balance is None:
+            balance = self._balances[currency] = ProjectedBalance(currency)
+        return balance
+
+    def _run(self):
+        while not self._stop.wait(self.sync_interval):
+            try:
+                drift = self.sync()
+                if drift:
+                    logging.warning("balance projection drifted: %s" % drift)
+            except Exception as e:
+                logging.error("balance sync failed: %s" % e)
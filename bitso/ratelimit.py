@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import threading
+import time
+
+
+class RateLimiter(object):
+    """A thread-safe token bucket used to keep requests under Bitso's limits.
+
+    Example usage:
+
+        >>> limiter = bitso.RateLimiter(60, per=60.0)
+        >>> api = bitso.Api(API_KEY, API_SECRET, rate_limiter=limiter)
+    """
+
+    def __init__(self, rate, per=1.0, burst=None):
+        """Instantiate a bitso.RateLimiter object.
+
+        Args:
+          rate (int):
+            Number of requests allowed every `per` seconds.
+          per (float, optional):
+            Length of the window in seconds. Default is 1.0
+          burst (int, optional):
+            Maximum number of requests that can be made back to back.
+            Default is `rate`
+        """
+        self.rate = float(rate)
+        self.per = float(per)
+        self.burst = float(burst if burst is not None else rate)
+        self._tokens = self.burst
+        self._last = time.time()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self._last)
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate / self.per)
+        self._last = now
+
+    def try_acquire(self, tokens=1):
+        """Takes `tokens` from the bucket without blocking.
+
+        Returns:
+          True if the tokens were available, False otherwise.
+        """
+        with self._lock:
+            self._refill(time.time())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """Blocks until `tokens` can be taken from the bucket."""
+        while True:
+            with self._lock:
+                self._refill(time.time())
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) * self.per / self.rate
+            time.sleep(wait)
+
+    @property
+    def available(self):
+        """Number of tokens currently in the bucket."""
+        with self._lock:
+            self._refill(time.time())
+            return self._tokens
+
+    def __repr__(self):
+        return "RateLimiter(rate={rate}, per={per})".format(
+            rate=self.rate,
+            per=self.per)
@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import mmap
+import os
+import struct
+import time
+
+from .bitsows import Listener
+from .errors import ApiClientError
+from .utils import (to_scaled_int, from_scaled_int)
+
+
+MAGIC = b'BITSORB1'
+SCALE = 8
+NO_SIDE = 255
+# magic, capacity, records published
+HEADER = struct.Struct('<8sQQ40x')
+HEAD = struct.Struct('<Q')
+HEAD_OFFSET = 16
+# stamp, kind, side, book, sequence, timestamp, received, rate, amount, value, id, status
+SLOT = struct.Struct('<QcB6x12sqqqqqq32s12s8x')
+STAMP = struct.Struct('<Q')
+
+ORDER = b'o'
+TRADE = b't'
+_SIDES = {'bid': 0, 'buy': 0, 'ask': 1, 'sell': 1}
+_ORDER_SIDES = ('bid', 'ask')
+_TRADE_SIDES = ('buy', 'sell')
+
+
+def _scaled(value):
+    if value is None:
+        return 0
+    return to_scaled_int(value, SCALE)
+
+
+class StreamRecord(object):
+    """A diff-orders or trades update read back from a ring buffer.
+
+    `rate`, `amount` and `value` are only turned into Decimals when read.
+    """
+
+    __slots__ = ('channel', 'book', 'sequence', 'timestamp', 'received',
+                 'side', 'id', 'status', '_rate', '_amount', '_value')
+
+    def __init__(self, kind, side, book, sequence, timestamp, received,
+                 rate, amount, value, id, status):
+        if kind == ORDER:
+            self.channel = 'diff-orders'
+            self.side = _ORDER_SIDES[side] if side != NO_SIDE else None
+        else:
+            self.channel = 'trades'
+            self.side = _TRADE_SIDES[side] if side != NO_SIDE else None
+        self.book = book.rstrip(b'\0').decode('ascii') or None
+        self.sequence = sequence if sequence >= 0 else None
+        self.timestamp = timestamp if timestamp >= 0 else None
+        self.received = received
+        self.id = id.rstrip(b'\0').decode('ascii') or None
+        self.status = status.rstrip(b'\0').decode('ascii') or None
+        self._rate = rate
+        self._amount = amount
+        self._value = value
+
+    @property
+    def rate(self):
+        return from_scaled_int(self._rate, SCALE)
+
+    @property
+    def amount(self):
+        return from_scaled_int(self._amount, SCALE)
+
+    @property
+    def value(self):
+        return from_scaled_int(self._value, SCALE)
+
+    def __repr__(self):
+        return "StreamRecord(channel={channel}, book={book}, sequence={sequence}, id={id}, rate={rate}, amount={amount})".format(
+            channel=self.channel,
+            book=self.book,
+            sequence=self.sequence,
+            id=self.id,
+            rate=self.rate,
+            amount=self.amount)
+
+
+class RingWriter(object):
+    """Single producer side of a shared-memory ring buffer of stream updates.
+
+    The region is a memory-mapped file holding `capacity` fixed-size
+    slots. Every slot carries a stamp with the number of the record in it
+    (plus one), written last, and the header counts the records published
+    so far. Readers never block the writer; a reader that falls more than
+    `capacity` records behind is told how many it lost.
+    """
+
+    def __init__(self, path, capacity=65536):
+        """Instantiate a bitso.RingWriter object.
+
+        Args:
+          path (str):
+            File to map, e.g. '/dev/shm/bitso-stream'. It is created or
+            truncated.
+          capacity (int, optional):
+            Number of records kept. Default is 65536
+        """
+        self.path = path
+        self.capacity = capacity
+        self.head = 0
+        size = HEADER.size + capacity * SLOT.size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        HEADER.pack_into(self._map, 0, MAGIC, capacity, 0)
+
+    def write_record(self, kind, side, book, sequence, timestamp, rate, amount, value, id, status=None):
+        """Appends one record. Prices and amounts are Decimals."""
+        n = self.head
+        offset = HEADER.size + (n % self.capacity) * SLOT.size
+        buf = self._map
+        STAMP.pack_into(buf, offset, 0)
+        SLOT.pack_into(buf, offset, 0, kind, _SIDES.get(side, NO_SIDE),
+                       (book or '').encode('ascii'),
+                       -1 if sequence is None else sequence,
+                       -1 if timestamp is None else int(timestamp),
+                       int(time.time() * 1000),
+                       _scaled(rate), _scaled(amount), _scaled(value),
+                       ('' if id is None else str(id)).encode('ascii'),
+                       (status or '').encode('ascii'))
+        STAMP.pack_into(buf, offset, n + 1)
+        self.head = n + 1
+        HEAD.pack_into(buf, HEAD_OFFSET, self.head)
+
+    def write(self, data):
+        """Appends every update of a bitso.models.StreamUpdate.
+
+        Only 'diff-orders' and 'trades' updates are written.
+        """
+        if data.channel == 'diff-orders':
+            for update in data.updates:
+                self.write_record(ORDER, getattr(update, 'side', None), data.book, data.sequence_number,
+                                  getattr(update, 'timestamp', None), getattr(update, 'rate', None),
+                                  update.amount, getattr(update, 'value', None), getattr(update, 'oid', None),
+                                  getattr(update, 'status', None))
+        elif data.channel == 'trades':
+            for update in data.updates:
+                self.write_record(TRADE, getattr(update, 'maker_side', None), data.book,
+                                  data.sequence_number, None, update.rate, update.amount,
+                                  update.value, update.tid)
+
+    def close(self):
+        self._map.close()
+
+
+class RingPublisher(Listener):
+    """A bitso.Listener writing every diff-orders and trades update into a ring buffer.
+
+    Example usage:
+
+        >>> publisher = bitso.RingPublisher('/dev/shm/bitso-stream')
+        >>> client = bitso.Client(publisher)
+        >>> client.connect(['diff-orders', 'trades'], books=['btc_mxn', 'eth_mxn'])
+    """
+
+    def __init__(self, path, capacity=65536):
+        self.writer = RingWriter(path, capacity)
+
+    def on_update(self, data):
+        self.writer.write(data)
+
+    def close(self):
+        self.writer.close()
+
+
+class RingReader(object):
+    """One consumer of a ring buffer written by a bitso.RingWriter.
+
+    Any number of readers, in any process, can follow the same buffer at
+    their own pace. When a reader falls behind by more than the buffer's
+    capacity it skips to the oldest record still available, adds the
+    records it missed to `dropped` and calls `on_overrun(reader, missed)`.
+
+    Example usage:
+
+        >>> reader = bitso.RingReader('/dev/shm/bitso-stream')
+        >>> for record in reader.follow():
+        ...     print record.book, record.rate, record.amount
+    """
+
+    def __init__(self, path, start='latest', on_overrun=None):
+        """Instantiate a bitso.RingReader object.
+
+        Args:
+          path (str):
+            File mapped by the writer
+          start (str, optional):
+            'latest' to only read new records, 'earliest' to start from the
+            oldest record still in the buffer. Default is 'latest'
+          on_overrun (callable, optional):
+            Called with (reader, missed) when records were overwritten
+            before this reader got to them
+        """
+        self.path = path
+        self.on_overrun = on_overrun
+        self.dropped = 0
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            size = os.fstat(fd).st_size
+            self._map = mmap.mmap(fd, size, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        if size < HEADER.size or self._map[:len(MAGIC)] != MAGIC:
+            self._map.close()
+            raise ApiClientError({u'message': u'%s is not a ring buffer region' % path})
+        self.capacity = HEADER.unpack_from(self._map, 0)[1]
+        head = self.head
+        self.position = head if start == 'latest' else max(0, head - self.capacity)
+
+    @property
+    def head(self):
+        """Number of records published so far."""
+        return HEAD.unpack_from(self._map, HEAD_OFFSET)[0]
+
+    @property
+    def lag(self):
+        """Number of published records this reader has not read yet."""
+        return self.head - self.position
+
+    def read_raw(self, max_records=1024):
+        """Returns the next available records as raw tuples, without blocking.
+
+        Each tuple is (kind, side, book, sequence, timestamp, received,
+        rate, amount, value, id, status) as stored; see bitso.StreamRecord.
+        """
+        buf = self._map
+        records = []
+        while len(records) < max_records:
+            n = self.position
+            head = HEAD.unpack_from(buf, HEAD_OFFSET)[0]
+            if n >= head:
+                break
+            if head - n > self.capacity:
+                self._overrun(head)
+                continue
+            offset = HEADER.size + (n % self.capacity) * SLOT.size
+            record = SLOT.unpack_from(buf, offset)
+            if record[0] != n + 1 or STAMP.unpack_from(buf, offset)[0] != n + 1:
+                # overwritten while reading
+                self._overrun(max(HEAD.unpack_from(buf, HEAD_OFFSET)[0], n + self.capacity))
+                continue
+            records.append(record[1:])
+            self.position = n + 1
+        return records
+
+    def read(self, max_records=1024):
+        """Returns the next available bitso.StreamRecord objects, without blocking."""
+        return [StreamRecord(*record) for record in self.read_raw(max_records)]
+
+    def follow(self, poll_interval=0.001, max_records=1024):
+        """Yields records forever, sleeping `poll_interval` seconds when idle."""
+        while True:
+            records = self.read(max_records)
+            if not records:
+                time.sleep(poll_interval)
+                continue
+            for record in records:
+                yield record
+
+    def _overrun(self, head):
+        # leave one slot of slack for the record being written
+        oldest = head - self.capacity + 1
+        missed = oldest - self.position
+        self.position = oldest
+        self.dropped += missed
+        if self.on_overrun is not None:
+            self.on_overrun(self, missed)
+
+    def close(self):
+        self._map.close()
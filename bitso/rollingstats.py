@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import threading
+import time
+from collections import deque
+from decimal import Decimal
+
+from .bitsows import Listener
+
+
+ZERO = Decimal(0)
+
+
+class WindowStats(object):
+    """Running totals of the trades inside one time window.
+
+    Trades enter at the right and expire from the left, and the totals are
+    updated exactly (with Decimal arithmetic) on both ends, so every
+    trade costs amortized constant time however long the window is.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.trades = deque()
+        self.count = 0
+        self.volume = ZERO
+        self.value = ZERO
+        self.buy_volume = ZERO
+        self.sell_volume = ZERO
+
+    def add(self, timestamp, price, amount, taker_side):
+        value = price * amount
+        self.trades.append((timestamp, amount, value, taker_side))
+        self.count += 1
+        self.volume += amount
+        self.value += value
+        if taker_side == 'buy':
+            self.buy_volume += amount
+        elif taker_side == 'sell':
+            self.sell_volume += amount
+
+    def expire(self, now):
+        cutoff = now - self.seconds
+        trades = self.trades
+        while trades and trades[0][0] <= cutoff:
+            _, amount, value, taker_side = trades.popleft()
+            self.count -= 1
+            self.volume -= amount
+            self.value -= value
+            if taker_side == 'buy':
+                self.buy_volume -= amount
+            elif taker_side == 'sell':
+                self.sell_volume -= amount
+
+    @property
+    def vwap(self):
+        if not self.volume:
+            return None
+        return self.value / self.volume
+
+    @property
+    def imbalance(self):
+        """(buy - sell) / (buy + sell) taker volume, between -1 and 1."""
+        sided = self.buy_volume + self.sell_volume
+        if not sided:
+            return None
+        return (self.buy_volume - self.sell_volume) / sided
+
+    def __repr__(self):
+        return "WindowStats(seconds={seconds}, count={count}, volume={volume}, vwap={vwap}, imbalance={imbalance})".format(
+            seconds=self.seconds,
+            count=self.count,
+            volume=self.volume,
+            vwap=self.vwap,
+            imbalance=self.imbalance)
+
+
+class RollingTradeStats(Listener):
+    """Rolling VWAP, volume, trade count and buy/sell imbalance per book.
+
+    Feed it websocket 'trades' updates directly (it is a bitso.Listener),
+    or call add_trade(). The taker side of a websocket trade is the
+    opposite of its maker side.
+
+    Example usage:
+
+        >>> stats = bitso.RollingTradeStats(windows=(10, 60, 900))
+        >>> client = bitso.Client(stats)
+        ...
+        >>> stats.window('btc_mxn', 60).vwap
+    """
+
+    def __init__(self, windows=(10, 60, 900)):
+        self.windows = tuple(windows)
+        self._books = {}
+        self._lock = threading.Lock()
+
+    def _get(self, book):
+        windows = self._books.get(book)
+        if windows is None:
+            windows = self._books[book] = dict((w, WindowStats(w)) for w in self.windows)
+        return windows
+
+    def add_trade(self, book, price, amount, taker_side=None, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        with self._lock:
+            for stats in self._get(book).values():
+                stats.add(timestamp, price, amount, taker_side)
+                stats.expire(timestamp)
+
+    def window(self, book, seconds, now=None):
+        """Returns the bitso.WindowStats of a book, expired up to `now`."""
+        with self._lock:
+            stats = self._get(book)[seconds]
+            stats.expire(now if now is not None else time.time())
+            return stats
+
+    def on_update(self, data):
+        if data.channel != 'trades' or data.book is None:
+            return
+        now = time.time()
+        for update in data.updates:
+            maker_side = getattr(update, 'maker_side', None)
+            taker_side = {'buy': 'sell', 'sell': 'buy'}.get(maker_side)
+            self.add_trade(data.book, update.rate, update.amount, taker_side, now)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import mmap
+import os
+import struct
+import time
+
+from .errors import ApiClientError
+from .utils import (to_scaled_int, from_scaled_int)
+
+
+MAGIC = b'BITSOBK1'
+SCALE = 8
+# magic, version, book, depth, bid count, ask count, sequence, timestamp
+HEADER = struct.Struct('<8sQ16sIIIqq')
+LEVEL = struct.Struct('<qq')
+VERSION = struct.Struct('<Q')
+VERSION_OFFSET = 8
+
+
+def region_size(depth):
+    """Returns the size in bytes of a snapshot region of the given depth."""
+    return HEADER.size + 2 * depth * LEVEL.size
+
+
+class BookSnapshot(object):
+    """A consistent copy of the top levels of an order book read from shared memory."""
+
+    def __init__(self, book, version, sequence, timestamp, bids, asks):
+        self.book = book
+        self.version = version
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.bids = bids
+        self.asks = asks
+
+    def __repr__(self):
+        return "BookSnapshot(book={book}, sequence={sequence}, bids={num_bids}, asks={num_asks})".format(
+            book=self.book,
+            sequence=self.sequence,
+            num_bids=len(self.bids),
+            num_asks=len(self.asks))
+
+
+class SnapshotWriter(object):
+    """Writes fixed-depth order book snapshots into a memory-mapped file.
+
+    Writes follow a seqlock: the version counter is odd while a snapshot
+    is being written and even once it is complete, so readers can detect
+    and retry torn reads without any locking. There must be a single
+    writer per region. Prices and amounts are stored as integers scaled
+    by 10^8.
+    """
+
+    def __init__(self, path, book, depth=20):
+        """Instantiate a bitso.SnapshotWriter object.
+
+        Args:
+          path (str):
+            File to map, e.g. '/dev/shm/bitso-btc_mxn'. It is created or
+            truncated.
+          book (str):
+            Book name stored in the header.
+          depth (int, optional):
+            Levels stored per side. Default is 20
+        """
+        self.path = path
+        self.book = book
+        self.depth = depth
+        self.version = 0
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, region_size(depth))
+            self._map = mmap.mmap(fd, region_size(depth))
+        finally:
+            os.close(fd)
+        HEADER.pack_into(self._map, 0, MAGIC, 0, book.encode('ascii'), depth, 0, 0, -1, -1)
+
+    def write(self, sequence, timestamp, bids, asks):
+        """Publishes the top levels of a book.
+
+        Args:
+          sequence (int):
+            Sequence number of the book
+          timestamp (int):
+            Exchange timestamp in milliseconds, or None
+          bids, asks (list):
+            (price, amount) tuples, best first. Levels past `depth` are dropped.
+        """
+        bids = bids[:self.depth]
+        asks = asks[:self.depth]
+        buf = self._map
+        VERSION.pack_into(buf, VERSION_OFFSET, self.version + 1)
+        offset = HEADER.size
+        for levels in (bids, asks):
+            for price, amount in levels:
+                LEVEL.pack_into(buf, offset, to_scaled_int(price, SCALE), to_scaled_int(amount, SCALE))
+                offset += LEVEL.size
+            offset += (self.depth - len(levels)) * LEVEL.size
+        HEADER.pack_into(buf, 0, MAGIC, self.version + 1, self.book.encode('ascii'), self.depth,
+                         len(bids), len(asks),
+                         -1 if sequence is None else sequence,
+                         -1 if timestamp is None else timestamp)
+        self.version += 2
+        VERSION.pack_into(buf, VERSION_OFFSET, self.version)
+
+    def close(self):
+        self._map.close()
+
+
+class SnapshotPublisher(object):
+    """Publishes a bitso.LiveOrderBook into shared memory every time its
+    top `depth` levels change.
+
+    Example usage:
+
+        >>> book = bitso.LiveOrderBook('btc_mxn', api=bitso.Api())
+        >>> publisher = bitso.SnapshotPublisher(book, '/dev/shm/bitso-btc_mxn', depth=20)
+        >>> bitso.Client(book).connect(['diff-orders'], books=['btc_mxn'])
+    """
+
+    def __init__(self, live_book, path, depth=20):
+        self.live_book = live_book
+        self.writer = SnapshotWriter(path, live_book.book, depth)
+        self.stream = live_book.subscribe_top(self._publish, depth=depth)
+
+    def _publish(self, event):
+        self.writer.write(event.sequence, event.timestamp, event.bids, event.asks)
+
+    def close(self):
+        self.live_book.unsubscribe_top(self.stream)
+        self.writer.close()
+
+
+class SnapshotReader(object):
+    """Reads snapshots published by a bitso.SnapshotWriter in another process.
+
+    Example usage:
+
+        >>> reader = bitso.SnapshotReader('/dev/shm/bitso-btc_mxn')
+        >>> snapshot = reader.read()
+        >>> snapshot.bids[0]
+        (Decimal('9800.00000000'), Decimal('0.25000000'))
+    """
+
+    def __init__(self, path, max_retries=1000):
+        self.path = path
+        self.max_retries = max_retries
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            size = os.fstat(fd).st_size
+            self._map = mmap.mmap(fd, size, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        if size < HEADER.size or self._map[:len(MAGIC)] != MAGIC:
+            self._map.close()
+            raise ApiClientError({u'message': u'%s is not a book snapshot region' % path})
+
+    @property
+    def version(self):
+        """The current version. It changes every time a snapshot is written."""
+        return VERSION.unpack_from(self._map, VERSION_OFFSET)[0]
+
+    def read(self, depth=None):
+        """Returns a consistent bitso.BookSnapshot of the best `depth` levels.
+
+        Retries while the writer is in the middle of an update.
+        """
+        buf = self._map
+        for attempt in range(self.max_retries):
+            before = VERSION.unpack_from(buf, VERSION_OFFSET)[0]
+            if before % 2:
+                if attempt:
+                    time.sleep(0)
+                continue
+            (_, _, book, size, num_bids, num_asks,
+             sequence, timestamp) = HEADER.unpack_from(buf, 0)
+            if depth is not None:
+                num_bids = min(num_bids, depth)
+                num_asks = min(num_asks, depth)
+            bids = self._levels(HEADER.size, num_bids)
+            asks = self._levels(HEADER.size + size * LEVEL.size, num_asks)
+            if VERSION.unpack_from(buf, VERSION_OFFSET)[0] == before:
+                return BookSnapshot(book.rstrip(b'\0').decode('ascii'), before,
+                                    None if sequence < 0 else sequence,
+                                    None if timestamp < 0 else timestamp,
+                                    [(from_scaled_int(p, SCALE), from_scaled_int(a, SCALE)) for p, a in bids],
+                                    [(from_scaled_int(p, SCALE), from_scaled_int(a, SCALE)) for p, a in asks])
+        raise ApiClientError({u'message': u'could not read a consistent snapshot from %s' % self.path})
+
+    def _levels(self, offset, count):
+        buf = self._map
+        return [LEVEL.unpack_from(buf, offset + i * LEVEL.size) for i in range(count)]
+
+    def close(self):
+        self._map.close()
@@ -0,0 +1,655 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+
+import bisect
+import json
+import threading
+import time
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from Queue import Queue
+from SocketServer import ThreadingMixIn
+from collections import deque
+from datetime import datetime
+from decimal import Decimal, ROUND_DOWN
+from urlparse import urlparse, parse_qs
+
+from .metrics import DEFAULT_BUCKETS, Histogram, RequestHook
+from .models import OrderBook, StreamUpdate
+
+
+AMOUNT = Decimal('0.00000001')
+ORDERS_DEPTH = 20
+
+
+def _format(value):
+    return '{0:f}'.format(value)
+
+
+def _isoformat(timestamp):
+    return datetime.utcfromtimestamp(timestamp).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+00:00'
+
+
+def synthetic_order_book(book, mid, levels=20, step='0.01', amount='0.5', orders_per_level=1):
+    """Builds a bitso.OrderBook around `mid` for seeding a SimulatedExchange.
+
+    Every level holds `orders_per_level` orders of `amount`, and prices
+    move `step` (a fraction of mid) away from it on each level.
+    """
+    mid, step, amount = Decimal(str(mid)), Decimal(str(step)), Decimal(str(amount))
+    bids, asks = [], []
+    for level in range(1, levels + 1):
+        offset = mid * step * level
+        for _ in range(orders_per_level):
+            bids.append({'book': book, 'price': _format((mid - offset).quantize(AMOUNT)), 'amount': _format(amount)})
+            asks.append({'book': book, 'price': _format((mid + offset).quantize(AMOUNT)), 'amount': _format(amount)})
+    return OrderBook._NewFromJsonDict({'bids': bids, 'asks': asks, 'sequence': '0',
+                                       'updated_at': _isoformat(time.time())})
+
+
+class SimulatedOrder(object):
+    """An order resting in, or matched by, a MatchingEngine."""
+
+    __slots__ = ('book', 'oid', 'side', 'type', 'price', 'original_amount', 'unfilled_amount',
+                 'status', 'created_at', 'updated_at', 'user')
+
+    def __init__(self, book, oid, side, order_type, price, amount, created_at, user=True):
+        self.book = book
+        self.oid = oid
+        self.side = side
+        self.type = order_type
+        self.price = price
+        self.original_amount = amount
+        self.unfilled_amount = amount
+        self.status = 'open'
+        self.created_at = created_at
+        self.updated_at = created_at
+        self.user = user
+
+    def as_dict(self):
+        """The order as returned by the /orders/ endpoint."""
+        return {
+            'book': self.book,
+            'oid': self.oid,
+            'side': self.side,
+            'type': self.type,
+            'price': _format(self.price if self.price is not None else Decimal('0')),
+            'original_amount': _format(self.original_amount),
+            'unfilled_amount': _format(self.unfilled_amount),
+            'status': self.status,
+            'created_at': _isoformat(self.created_at),
+            'updated_at': _isoformat(self.updated_at)
+        }
+
+    def __repr__(self):
+        return "SimulatedOrder(oid={oid}, side={side}, price={price}, unfilled_amount={unfilled_amount})".format(
+            oid=self.oid,
+            side=self.side,
+            price=self.price,
+            unfilled_amount=self.unfilled_amount)
+
+
+class MatchingEngine(object):
+    """Price-time priority matching for one book.
+
+    Each side keeps a sorted list of prices and a FIFO queue of orders per
+    price. Every operation returns the websocket frames it caused, as the
+    dicts bitso.Client would decode from the wire: 'diff-orders' with a
+    sequence number per change, 'trades' with the maker ('mo') and taker
+    ('to') oids, and 'orders' with the top levels of both sides.
+    """
+
+    def __init__(self, book, clock=time.time):
+        self.book = book
+        self.clock = clock
+        self.sequence = 0
+        self.prices = {'buy': [], 'sell': []}
+        self.queues = {'buy': {}, 'sell': {}}
+        self.orders = {}
+        self.trades = []
+        self.last = None
+        self._oids = 0
+        self._tids = 0
+
+    def seed(self, order_book):
+        """Rests the orders of a bitso.OrderBook, keeping their oids when present."""
+        for side, orders in (('buy', order_book.bids), ('sell', order_book.asks)):
+            for public in orders:
+                order = SimulatedOrder(self.book, public.oid or self._next_oid(), side, 'limit',
+                                       public.price, public.amount, self.clock(), user=False)
+                self._rest(order)
+        self.sequence = order_book.sequence
+
+    def place(self, side, order_type, major=None, minor=None, price=None):
+        """Matches a new order and rests what is left of a limit order.
+
+        Returns:
+          (bitso.simulator.SimulatedOrder, list of frames)
+        """
+        now = self.clock()
+        amount = Decimal(major) if major is not None else None
+        price = Decimal(price) if price is not None else None
+        if order_type == 'limit' and amount is None:
+            amount = (Decimal(minor) / price).quantize(AMOUNT, ROUND_DOWN)
+        order = SimulatedOrder(self.book, self._next_oid(), side, order_type, price,
+                               amount if amount is not None else Decimal('0'), now)
+        self.orders[order.oid] = order
+        frames = []
+        trades = self._match(order, Decimal(minor) if amount is None else None, now, frames)
+        if trades:
+            frames.append(self._frame('trades', trades))
+        if order.type == 'limit' and order.unfilled_amount > 0:
+            self._rest(order)
+            frames.append(self._diff(order, now))
+        elif order.status != 'completed':
+            # what a market order could not fill is dropped
+            order.status = 'completed' if trades else 'cancelled'
+        if frames:
+            frames.append(self._top())
+        return order, frames
+
+    def cancel(self, oid):
+        """Cancels a resting order. Returns the frames, or None if it is not open."""
+        order = self.orders.get(oid)
+        if order is None or order.status not in ('open', 'partially filled'):
+            return None
+        now = self.clock()
+        self._unrest(order)
+        order.status = 'cancelled'
+        order.updated_at = now
+        return [self._diff(order, now, 'cancelled'), self._top()]
+
+    def best(self, side):
+        prices = self.prices[side]
+        if not prices:
+            return None
+        return prices[-1] if side == 'buy' else prices[0]
+
+    def levels(self, side, aggregate=True, depth=None):
+        """Resting orders of a side, best first, as /order_book/ entries."""
+        prices = self.prices[side]
+        prices = reversed(prices) if side == 'buy' else iter(prices)
+        entries = []
+        for price in prices:
+            if depth is not None and len(entries) >= depth:
+                break
+            queue = self.queues[side][price]
+            if aggregate:
+                total = sum(order.unfilled_amount for order in queue)
+                entries.append({'book': self.book, 'price': _format(price), 'amount': _format(total)})
+                continue
+            for order in queue:
+                entries.append({'book': self.book, 'price': _format(price),
+                                'amount': _format(order.unfilled_amount), 'oid': order.oid})
+        return entries
+
+    def _match(self, order, minor, now, frames):
+        opposite = 'sell' if order.side == 'buy' else 'buy'
+        trades = []
+        while self.prices[opposite]:
+            price = self.best(opposite)
+            if order.price is not None and order.type == 'limit':
+                if (order.side == 'buy' and price > order.price) or (order.side == 'sell' and price < order.price):
+                    break
+            maker = self.queues[opposite][price][0]
+            if minor is not None:
+                amount = min(maker.unfilled_amount, (minor / price).quantize(AMOUNT, ROUND_DOWN))
+            else:
+                amount = min(maker.unfilled_amount, order.unfilled_amount)
+            if amount <= 0:
+                break
+            trades.append(self._fill(maker, order, price, amount, now))
+            if minor is not None:
+                minor -= (amount * price)
+                order.original_amount += amount
+            else:
+                order.unfilled_amount -= amount
+            if maker.unfilled_amount == 0:
+                self._unrest(maker)
+                frames.append(self._diff(maker, now, 'completed'))
+            else:
+                frames.append(self._diff(maker, now))
+        if minor is not None:
+            order.unfilled_amount = Decimal('0')
+        if trades:
+            order.status = 'completed' if order.unfilled_amount == 0 else 'partially filled'
+            order.updated_at = now
+        return trades
+
+    def _fill(self, maker, taker, price, amount, now):
+        self._tids += 1
+        maker.unfilled_amount -= amount
+        maker.status = 'completed' if maker.unfilled_amount == 0 else 'partially filled'
+        maker.updated_at = now
+        self.last = price
+        value = (price * amount).quantize(AMOUNT)
+        for order, role in ((maker, 'maker'), (taker, 'taker')):
+            if order.user:
+                major = amount if order.side == 'buy' else -amount
+                self.trades.append({
+                    'book': self.book,
+                    'tid': self._tids,
+                    'oid': order.oid,
+                    'side': order.side,
+                    'price': _format(price),
+                    'major': _format(major),
+                    'minor': _format(-major * price),
+                    'fees_amount': '0',
+                    'fees_currency': self.book.split('_')[0 if order.side == 'buy' else 1],
+                    'maker_side': maker.side,
+                    'created_at': _isoformat(now)
+                })
+        return {'i': self._tids, 'a': _format(amount), 'r': _format(price), 'v': _format(value),
+                't': 0 if maker.side == 'buy' else 1, 'mo': maker.oid, 'to': taker.oid}
+
+    def _rest(self, order):
+        side = order.side
+        queue = self.queues[side].get(order.price)
+        if queue is None:
+            queue = self.queues[side][order.price] = deque()
+            bisect.insort(self.prices[side], order.price)
+        queue.append(order)
+        self.orders[order.oid] = order
+
+    def _unrest(self, order):
+        side = order.side
+        queue = self.queues[side][order.price]
+        queue.remove(order)
+        if not queue:
+            del self.queues[side][order.price]
+            prices = self.prices[side]
+            del prices[bisect.bisect_left(prices, order.price)]
+
+    def _diff(self, order, now, status='open'):
+        self.sequence += 1
+        update = {'d': int(now * 1000), 'r': _format(order.price), 't': 0 if order.side == 'buy' else 1,
+                  'o': order.oid, 's': status}
+        if status == 'open':
+            update['a'] = _format(order.unfilled_amount)
+            update['v'] = _format((order.unfilled_amount * order.price).quantize(AMOUNT))
+        frame = self._frame('diff-orders', [update])
+        frame['sequence'] = self.sequence
+        return frame
+
+    def _top(self):
+        now = int(self.clock() * 1000)
+        payload = {}
+        for side, key, kind in (('buy', 'bids', 0), ('sell', 'asks', 1)):
+            payload[key] = [{'r': level['price'], 'a': level['amount'], 't': kind, 'd': now,
+                             'v': _format((Decimal(level['price']) * Decimal(level['amount'])).quantize(AMOUNT))}
+                            for level in self.levels(side, depth=ORDERS_DEPTH)]
+        return self._frame('orders', payload)
+
+    def _frame(self, channel, payload):
+        return {'type': channel, 'book': self.book, 'payload': payload}
+
+    def _next_oid(self):
+        self._oids += 1
+        return 'sim%013d' % self._oids
+
+
+class LatencyReport(RequestHook):
+    """Ack and fill latency of the orders a bitso.Api places.
+
+    Register it with bitso.Api.add_hook(); SimulatedExchange.connect()
+    does. An order's ack latency runs from just before its place_order
+    request is sent until its response has been read. Its fill latency
+    runs from the same point until the first 'trades' frame with the order
+    is delivered to the exchange's subscribers, so both include the
+    client's own signing, serialization and parsing.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.ack = Histogram(buckets)
+        self.fill = Histogram(buckets)
+        self._sent = {}
+        self._early = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def before_request(self, request):
+        if request.endpoint == 'place_order':
+            self._local.started = time.time()
+
+    def after_response(self, request, response):
+        if request.endpoint != 'place_order':
+            return
+        acked = time.time()
+        started = self._local.started
+        oid = json.loads(response.content)['payload']['oid']
+        with self._lock:
+            self.ack.observe(acked - started)
+            # the fill frame can overtake the response
+            filled = self._early.pop(oid, None)
+            if filled is None:
+                self._sent[oid] = started
+            else:
+                self.fill.observe(filled - started)
+
+    def filled(self, oid, delivered):
+        """Records the delivery of the first fill of a user order."""
+        with self._lock:
+            started = self._sent.pop(oid, None)
+            if started is not None:
+                self.fill.observe(delivered - started)
+            elif oid not in self._early:
+                self._early[oid] = delivered
+
+    def report(self):
+        with self._lock:
+            return {
+                'orders': self.ack.count,
+                'filled': self.fill.count,
+                'ack': self.ack.as_dict(),
+                'fill': self.fill.as_dict()
+            }
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        self._respond('GET')
+
+    def do_POST(self):
+        self._respond('POST')
+
+    def do_DELETE(self):
+        self._respond('DELETE')
+
+    def _respond(self, verb):
+        length = int(self.headers.getheader('content-length') or 0)
+        body = self.rfile.read(length) if length else ''
+        status, data = self.server.exchange.handle(verb, self.path, body)
+        content = json.dumps(data)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SimulatedExchange(object):
+    """A local stand-in for the Bitso v3 REST API and websocket feed, for
+    load-testing order entry.
+
+    Each book is matched by a bitso.simulator.MatchingEngine seeded from a
+    recorded bitso.OrderBook (fetch it with aggregate=False to keep the
+    queues) or from synthetic_order_book(). The HTTP server answers
+    available_books, ticker, order_book, place_order, lookup_order,
+    cancel_order, open_orders and user_trades with the same JSON shapes
+    as Bitso, and ignores authentication. The 'orders', 'trades' and
+    'diff-orders' frames every change causes go to subscribers from a
+    single thread, in sequence order, `feed_delay` seconds after the
+    change. `latency` reports ack and fill latency of the orders placed
+    by connected clients.
+
+    Example usage:
+
+        >>> exchange = bitso.SimulatedExchange({'btc_mxn': api.order_book('btc_mxn', aggregate=False)})
+        >>> exchange.start()
+        >>> exchange.connect(api)
+        >>> exchange.attach(bitso.LiveOrderBook('btc_mxn', api=api))
+        >>> api.place_order(book='btc_mxn', side='buy', order_type='limit', major='0.01', price='150000')
+        >>> exchange.latency.report()
+    """
+
+    def __init__(self, books, host='127.0.0.1', port=0, rest_delay=0.0, feed_delay=0.0, clock=time.time):
+        """Instantiate a bitso.SimulatedExchange object.
+
+        Args:
+          books (dict):
+            bitso.OrderBook to seed each book with, or None for an empty book
+          host, port (optional):
+            Address to listen on. Port 0 picks a free one
+          rest_delay (float, optional):
+            Seconds added before every REST response
+          feed_delay (float, optional):
+            Seconds between a change and the delivery of its frames
+        """
+        self.engines = {}
+        for book, order_book in books.items():
+            engine = MatchingEngine(book, clock)
+            if order_book is not None:
+                engine.seed(order_book)
+            self.engines[book] = engine
+        self.host = host
+        self.port = port
+        self.rest_delay = rest_delay
+        self.feed_delay = feed_delay
+        self.latency = LatencyReport()
+        self.url = None
+        self._subscribers = []
+        self._frames = Queue()
+        self._lock = threading.Lock()
+        self._server = None
+        self._threads = []
+
+    def start(self):
+        self._server = _Server((self.host, self.port), _Handler)
+        self._server.exchange = self
+        self.url = 'http://%s:%d/api/v3' % self._server.server_address
+        for target in (self._server.serve_forever, self._run):
+            t = threading.Thread(target=target)
+            t.daemon = True
+            t.start()
+            self._threads.append(t)
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._frames.put(None)
+        for t in self._threads:
+            t.join()
+        self._server = None
+        self._threads = []
+
+    def connect(self, api):
+        """Points a bitso.Api at this exchange and measures its orders."""
+        api.base_url = self.url
+        api.add_hook(self.latency)
+
+    def subscribe(self, callback, channels=None, books=None):
+        """Calls `callback` with every frame of the given channels and books,
+        as the dict a websocket message decodes to."""
+        self._subscribers.append((callback, channels, books))
+
+    def unsubscribe(self, callback):
+        self._subscribers = [s for s in self._subscribers if s[0] is not callback]
+
+    def attach(self, listener, channels=None, books=None):
+        """Feeds a bitso.Listener as bitso.Client would. Returns the callback
+        to pass to unsubscribe()."""
+        callback = lambda frame: listener.on_update(StreamUpdate(frame))
+        listener.on_connect()
+        self.subscribe(callback, channels, books)
+        return callback
+
+    def handle(self, verb, path, body=''):
+        """Answers one REST request.
+
+        Returns:
+          (HTTP status, response dict)
+        """
+        if self.rest_delay:
+            time.sleep(self.rest_delay)
+        url = urlparse(path)
+        query = dict((key, values[-1]) for key, values in parse_qs(url.query).items())
+        parts = [part for part in url.path.split('/') if part][2:]
+        if not parts:
+            return self._error(404, 'not_found', 'unknown endpoint')
+        endpoint, ids = parts[0], parts[1].split('-') if len(parts) > 1 else []
+        try:
+            with self._lock:
+                if endpoint == 'available_books' and verb == 'GET':
+                    return 200, self._ok(self._available_books())
+                if endpoint == 'ticker' and verb == 'GET':
+                    return 200, self._ok(self._ticker(self._engine(query)))
+                if endpoint == 'order_book' and verb == 'GET':
+                    aggregate = query.get('aggregate', 'true').lower() not in ('false', '0')
+                    return 200, self._ok(self._order_book(self._engine(query), aggregate))
+                if endpoint == 'orders' and verb == 'POST':
+                    return 200, self._ok(self._place(json.loads(body or '{}')))
+                if endpoint == 'orders' and verb == 'GET':
+                    return 200, self._ok([order.as_dict() for order in self._user_orders(ids)])
+                if endpoint == 'orders' and verb == 'DELETE':
+                    return 200, self._ok(self._cancel(ids))
+                if endpoint == 'open_orders' and verb == 'GET':
+                    return 200, self._ok(self._page(self._open_orders(query.get('book')), query))
+                if endpoint == 'user_trades' and verb == 'GET':
+                    return 200, self._ok(self._user_trades(ids, query))
+        except ValueError as e:
+            return self._error(400, 'invalid_parameter', str(e))
+        return self._error(404, 'not_found', 'unknown endpoint')
+
+    def _ok(self, payload):
+        return {'success': True, 'payload': payload}
+
+    def _error(self, status, code, message):
+        return status, {'success': False, 'error': {'code': code, 'message': message}}
+
+    def _engine(self, params):
+        engine = self.engines.get(params.get('book'))
+        if engine is None:
+            raise ValueError('unknown book %s' % params.get('book'))
+        return engine
+
+    def _available_books(self):
+        return [{'book': book, 'minimum_amount': '0.00000001', 'maximum_amount': '100000000',
+                 'minimum_price': '0.00000001', 'maximum_price': '100000000',
+                 'minimum_value': '0.00000001', 'maximum_value': '100000000'}
+                for book in sorted(self.engines)]
+
+    def _ticker(self, engine):
+        last = _format(engine.last or Decimal('0'))
+        bid, ask = engine.best('buy'), engine.best('sell')
+        return {'book': engine.book, 'last': last, 'high': last, 'low': last, 'vwap': last,
+                'volume': '0', 'bid': _format(bid or Decimal('0')), 'ask': _format(ask or Decimal('0')),
+                'created_at': _isoformat(engine.clock())}
+
+    def _order_book(self, engine, aggregate):
+        return {'bids': engine.levels('buy', aggregate), 'asks': engine.levels('sell', aggregate),
+                'sequence': str(engine.sequence), 'updated_at': _isoformat(engine.clock())}
+
+    def _place(self, params):
+        engine = self._engine(params)
+        side, order_type = params.get('side'), params.get('type')
+        major, minor, price = params.get('major'), params.get('minor'), params.get('price')
+        if side not in ('buy', 'sell') or order_type not in ('limit', 'market'):
+            raise ValueError('side must be buy or sell and type limit or market')
+        if (major is None) == (minor is None):
+            raise ValueError('specify either major or minor')
+        if order_type == 'limit' and price is None:
+            raise ValueError('limit orders need a price')
+        try:
+            order, frames = engine.place(side, order_type, major, minor, price if order_type == 'limit' else None)
+        except ArithmeticError:
+            raise ValueError('invalid amount or price')
+        self._publish(frames)
+        return {'oid': order.oid}
+
+    def _user_orders(self, oids):
+        orders = []
+        for oid in oids:
+            for engine in self.engines.values():
+                order = engine.orders.get(oid)
+                if order is not None and order.user:
+                    orders.append(order)
+        return orders
+
+    def _cancel(self, oids):
+        if oids == ['all']:
+            oids = [order['oid'] for order in self._open_orders(None)]
+        cancelled = []
+        for order in self._user_orders(oids):
+            frames = self.engines[order.book].cancel(order.oid)
+            if frames is not None:
+                self._publish(frames)
+                cancelled.append(order.oid)
+        return cancelled
+
+    def _open_orders(self, book):
+        engines = self.engines.values() if book in (None, 'None') else [self._engine({'book': book})]
+        orders = []
+        for engine in engines:
+            orders.extend(order.as_dict() for order in engine.orders.values()
+                          if order.user and order.status in ('open', 'partially filled'))
+        return sorted(orders, key=lambda order: order['created_at'], reverse=True)
+
+    def _page(self, orders, params):
+        if params.get('sort') == 'asc':
+            orders.reverse()
+        marker = params.get('marker')
+        if marker is not None:
+            oids = [order['oid'] for order in orders]
+            orders = orders[oids.index(marker) + 1:] if marker in oids else []
+        return orders[:int(params.get('limit', 25))]
+
+    def _user_trades(self, tids, params):
+        engines = self.engines.values() if 'book' not in params else [self._engine(params)]
+        trades = []
+        for engine in engines:
+            trades.extend(engine.trades)
+        if tids:
+            trades = [trade for trade in trades if str(trade['tid']) in tids]
+        trades.sort(key=lambda trade: trade['tid'], reverse=params.get('sort', 'desc') == 'desc')
+        return trades[:int(params.get('limit', 25))]
+
+    def _publish(self, frames):
+        sent = time.time()
+        for frame in frames:
+            self._frames.put((sent, frame))
+
+    def _run(self):
+        while True:
+            item = self._frames.get()
+            if item is None:
+                return
+            sent, frame = item
+            wait = sent + self.feed_delay - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            delivered = time.time()
+            if frame['type'] == 'trades':
+                engine = self.engines[frame['book']]
+                for trade in frame['payload']:
+                    for oid in (trade['mo'], trade['to']):
+                        if engine.orders[oid].user:
+                            self.latency.filled(oid, delivered)
+            for callback, channels, books in self._subscribers:
+                if channels is not None and frame['type'] not in channels:
+                    continue
+                if books is not None and frame['book'] not in books:
+                    continue
+                callback(frame)
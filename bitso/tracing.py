@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+"""Tracing support for bitso.Api and bitso.Client.
+
+Both accept a `tracer` argument. Any object with an OpenTelemetry style
+`start_as_current_span(name, attributes=None)` method works, including
+`opentelemetry.trace.get_tracer(__name__)`. When no tracer is given the
+traced code paths are skipped entirely.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class Span(object):
+    """A finished or in-progress span recorded by bitso.tracing.RecordingTracer."""
+
+    def __init__(self, name, attributes=None, parent=None):
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.parent = parent
+        self.start_time = time.time()
+        self.end_time = None
+        self.exception = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exception):
+        self.exception = exception
+
+    @property
+    def duration(self):
+        if self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+    def __repr__(self):
+        return "Span(name={name}, duration={duration}, attributes={attributes})".format(
+            name=self.name,
+            duration=self.duration,
+            attributes=self.attributes)
+
+
+class RecordingTracer(object):
+    """A minimal in-process tracer with the OpenTelemetry tracer interface.
+
+    Useful where OpenTelemetry is not installed: finished spans are passed
+    to `on_finish` and the last `max_spans` of them are kept in `spans`.
+
+    Example usage:
+
+        >>> def log_slow(span):
+        ...     if span.parent is None and span.duration > 0.5:
+        ...         print span, span.attributes
+        >>> api = bitso.Api(tracer=bitso.tracing.RecordingTracer(on_finish=log_slow))
+    """
+
+    def __init__(self, on_finish=None, max_spans=1000):
+        self.on_finish = on_finish
+        self.max_spans = max_spans
+        self.spans = deque(maxlen=max_spans) if max_spans else None
+        self._local = threading.local()
+
+    @contextmanager
+    def start_as_current_span(self, name, attributes=None, **kwargs):
+        parent = getattr(self._local, 'current', None)
+        span = Span(name, attributes, parent)
+        self._local.current = span
+        try:
+            yield span
+        except Exception as e:
+            span.record_exception(e)
+            raise
+        finally:
+            span.end_time = time.time()
+            self._local.current = parent
+            if self.spans is not None:
+                self.spans.append(span)
+            if self.on_finish is not None:
+                self.on_finish(span)
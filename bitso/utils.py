@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import sys
+import threading
+from decimal import Decimal
+from Queue import Queue, Empty
+
+
+def map_concurrently(func, items, max_workers=8):
+    """Applies `func` to every item on a small pool of threads.
+
+    Returns:
+      A list with one result per item, in the same order as `items`. If
+      `func` raised for an item, the exception instance takes its place.
+    """
+    items = list(items)
+    results = [None] * len(items)
+    if len(items) <= 1 or max_workers <= 1:
+        for i, item in enumerate(items):
+            try:
+                results[i] = func(item)
+            except Exception as e:
+                results[i] = e
+        return results
+
+    queue = Queue()
+    for i, item in enumerate(items):
+        queue.put((i, item))
+
+    def worker():
+        while True:
+            try:
+                i, item = queue.get_nowait()
+            except Empty:
+                return
+            try:
+                results[i] = func(item)
+            except Exception as e:
+                results[i] = e
+
+    threads = []
+    for _ in range(min(max_workers, len(items))):
+        t = threading.Thread(target=worker)
+        t.daemon = True
+        t.start()
+        threads.append(t)
+    for t in threads:
+        t.join()
+    return results
+
+
+def chunk_ids(ids, base_length=0, max_length=2000, separator='-'):
+    """Splits `ids` into groups whose joined length stays under a limit.
+
+    Bitso takes several IDs in a single URL path segment joined by '-'.
+    This keeps each resulting URL below `max_length` characters.
+
+    Returns:
+      A list of lists of IDs.
+    """
+    chunks = []
+    current = []
+    length = base_length
+    for oid in ids:
+        extra = len(oid) + (len(separator) if current else 0)
+        if current and length + extra > max_length:
+            chunks.append(current)
+            current = []
+            length = base_length
+            extra = len(oid)
+        current.append(oid)
+        length += extra
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def to_scaled_int(value, scale=8):
+    """Returns a Decimal as an integer count of 10^-scale units, truncating
+    any further digits. Used to store prices and amounts in fixed-width
+    binary records."""
+    text = str(value)
+    if 'E' not in text:
+        whole, _, fraction = text.partition('.')
+        return int(whole + (fraction + '0' * scale)[:scale])
+    return int(Decimal(value).scaleb(scale))
+
+
+def from_scaled_int(value, scale=8):
+    """Inverse of to_scaled_int()."""
+    return Decimal(value).scaleb(-scale)
+
+
+class LazyModule(object):
+    """Stands in for a module until one of its attributes is used.
+
+    LazyModule('dateutil.parser') behaves like the name bound by
+    `import dateutil.parser`: the top level package, with the submodule
+    loaded.
+    """
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            name = self.__dict__['_name']
+            __import__(name)
+            module = sys.modules[name.split('.')[0]]
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        return "LazyModule(name={name}, loaded={loaded})".format(
+            name=self.__dict__['_name'],
+            loaded=self.__dict__['_module'] is not None)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import threading
+import time
+from decimal import Decimal, ROUND_DOWN, ROUND_UP
+
+from .errors import ApiClientError
+
+
+class BookRules(object):
+    """Limits and precision of one book, taken from a bitso.Book."""
+
+    def __init__(self, book, amount_places=8):
+        self.symbol = book.symbol
+        self.minimum_amount = book.minimum_amount
+        self.maximum_amount = book.maximum_amount
+        self.minimum_price = book.minimum_price
+        self.maximum_price = book.maximum_price
+        self.minimum_value = book.minimum_value
+        self.maximum_value = book.maximum_value
+        # prices are only rounded to a tick the exchange published
+        self.price_quantum = getattr(book, 'tick_size', None) or None
+        self.amount_quantum = Decimal(1).scaleb(-amount_places)
+
+    def quantize_price(self, price, side):
+        """Rounds a price to the book's tick, never in the taker's disfavour:
+        buys round down and sells round up. Prices of books without a
+        published tick size are returned unchanged."""
+        if self.price_quantum is None:
+            return price
+        rounding = ROUND_DOWN if side == 'buy' else ROUND_UP
+        return (price / self.price_quantum).quantize(Decimal(1), rounding=rounding) * self.price_quantum
+
+    def __repr__(self):
+        return "BookRules(symbol={symbol}, price_quantum={price_quantum}, amount_quantum={amount_quantum})".format(
+            symbol=self.symbol,
+            price_quantum=self.price_quantum,
+            amount_quantum=self.amount_quantum)
+
+
+class OrderValidator(object):
+    """Checks and quantizes orders locally before they are sent.
+
+    Book limits come from Api.available_books() and are cached for `ttl`
+    seconds. Every validated order increments the 'validated' counter of
+    the 'place_order' endpoint in the Api's metrics; rejected orders
+    increment 'rejected' and 'rejected_<reason>'.
+
+    Example usage:
+
+        >>> api = bitso.Api(key, secret, validator=bitso.OrderValidator())
+        >>> api.place_order(book='btc_mxn', side='buy', order_type='limit',
+        ...                 major='0.0000000001', price='7000')
+        ApiClientError: major is below minimum_amount 0.003 for btc_mxn
+    """
+
+    ENDPOINT = 'place_order'
+
+    def __init__(self, ttl=3600.0, amount_places=8):
+        """Instantiate a bitso.OrderValidator object.
+
+        Args:
+          ttl (float, optional):
+            Seconds book limits are cached. Default is 3600.0
+          amount_places (int, optional):
+            Decimal places allowed in major amounts. Default is 8
+        """
+        self.ttl = ttl
+        self.amount_places = amount_places
+        self.rules = {}
+        self.loaded_at = None
+        self._lock = threading.Lock()
+
+    def load(self, available_books):
+        """Caches the limits of a bitso.AvailableBooks instance."""
+        rules = {}
+        for symbol in available_books.books:
+            rules[symbol] = BookRules(getattr(available_books, symbol), self.amount_places)
+        with self._lock:
+            self.rules = rules
+            self.loaded_at = time.time()
+
+    def book_rules(self, api, book):
+        """Returns the bitso.BookRules of `book`, refreshing stale limits with `api`."""
+        if self.loaded_at is None or time.time() - self.loaded_at > self.ttl:
+            self.load(api.available_books())
+        return self.rules.get(book)
+
+    def validate(self, api, order):
+        """Checks an order given as place_order() keyword arguments.
+
+        Returns:
+          A copy of `order` with the price rounded to the book's tick size
+          and major rounded to `amount_places`.
+
+        Raises:
+          ApiClientError if the order would be rejected by Bitso.
+        """
+        book = order.get('book')
+        rules = self.book_rules(api, book) if book is not None else None
+        if rules is None:
+            return self._reject(api, 'book', u'unknown book %s' % book)
+        side = order.get('side')
+        if side not in ('buy', 'sell'):
+            return self._reject(api, 'side', u"side is not 'buy' or 'sell'")
+        order_type = order.get('order_type')
+        if order_type not in ('limit', 'market'):
+            return self._reject(api, 'order_type', u"order type is not 'limit' or 'market'")
+        has_major = order.get('major') is not None
+        has_minor = order.get('minor') is not None
+        if has_major == has_minor:
+            return self._reject(api, 'amount', u'exactly one of major or minor must be given')
+
+        checked = dict(order)
+        price = None
+        if order_type == 'limit':
+            if order.get('price') is None:
+                return self._reject(api, 'price', u'limit orders need a price')
+            price = rules.quantize_price(Decimal(str(order['price'])), side)
+            if price < rules.minimum_price:
+                return self._limit(api, rules, 'minimum_price', 'price', rules.minimum_price)
+            if price > rules.maximum_price:
+                return self._limit(api, rules, 'maximum_price', 'price', rules.maximum_price)
+            checked['price'] = price
+        elif order.get('price') is not None:
+            return self._reject(api, 'price', u'market orders take no price')
+
+        if has_major:
+            major = Decimal(str(order['major'])).quantize(rules.amount_quantum, rounding=ROUND_DOWN)
+            if major < rules.minimum_amount:
+                return self._limit(api, rules, 'minimum_amount', 'major', rules.minimum_amount)
+            if major > rules.maximum_amount:
+                return self._limit(api, rules, 'maximum_amount', 'major', rules.maximum_amount)
+            checked['major'] = major
+            value = major * price if price is not None else None
+        else:
+            # no minor precision is published: minor is only checked
+            value = Decimal(str(order['minor']))
+            checked['minor'] = value
+        if value is not None:
+            if value < rules.minimum_value:
+                return self._limit(api, rules, 'minimum_value', 'value', rules.minimum_value)
+            if value > rules.maximum_value:
+                return self._limit(api, rules, 'maximum_value', 'value', rules.maximum_value)
+
+        if api.metrics is not None:
+            api.metrics.increment(self.ENDPOINT, 'validated')
+        return checked
+
+    def _limit(self, api, rules, reason, field, limit):
+        if reason.startswith('minimum'):
+            message = u'%s is below %s %s for %s' % (field, reason, limit, rules.symbol)
+        else:
+            message = u'%s is above %s %s for %s' % (field, reason, limit, rules.symbol)
+        return self._reject(api, reason, message)
+
+    def _reject(self, api, reason, message):
+        if api.metrics is not None:
+            api.metrics.increment(self.ENDPOINT, 'rejected')
+            api.metrics.increment(self.ENDPOINT, 'rejected_%s' % reason)
+        raise ApiClientError({u'message': message, u'code': u'local_%s' % reason})
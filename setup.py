@@ -22,4 +22,7 @@ setup(
         "python-dateutil >= 1.5",
         "mock >= 2.0.0" 
     ],
+    extras_require={
+        "parquet": ["pyarrow"],
+    },
 )
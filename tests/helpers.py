@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+"""Fixtures shared by several test modules."""
+
+from bitso.models import OrderBook
+
+
+class Clock(object):
+    """A clock that only moves when a test sets `now`."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def order_book(bids, asks, sequence=1, book='btc_mxn'):
+    """Builds a bitso.OrderBook from (price, amount) or (price, amount, oid) levels."""
+    def orders(levels):
+        return [dict(book=book, price=str(level[0]), amount=str(level[1]),
+                     oid=level[2] if len(level) > 2 else None) for level in levels]
+    return OrderBook._NewFromJsonDict({'updated_at': '2017-01-01T00:00:01+00:00',
+                                       'sequence': str(sequence),
+                                       'bids': orders(bids), 'asks': orders(asks)})
@@ -24,6 +24,7 @@
 #SOFTWARE.
 
 import mock
+import json
 import os
 import unittest
 import sys
@@ -166,6 +167,28 @@ class PublicApiTest(unittest.TestCase):
         self.assertEqual(result.updated_at.minute, 52)
         self.assertEqual(result.updated_at.second, 31)
 
+    def test_order_book_stream(self):
+        asks = [{'book': 'btc_mxn', 'price': str(5600 + i), 'amount': '0.5'} for i in range(50)]
+        bids = [{'book': 'btc_mxn', 'price': str(5599 - i), 'amount': '1.5', 'oid': 'o%d' % i} for i in range(50)]
+        body = json.dumps({'success': True, 'payload': {'asks': asks, 'bids': bids,
+                           'updated_at': '2016-04-08T17:52:31.000+00:00', 'sequence': '27214'}})
+        response = FakeResponse(body.encode('utf-8'))
+        self.api.stream_chunk_size = 7
+        with mock.patch('requests.get', return_value=response):
+            full = self.api.order_book('btc_mxn', stream=True)
+            top = self.api.order_book('btc_mxn', aggregate=False, depth=5)
+        self.assertEqual(len(full.asks), 50)
+        self.assertEqual([o.price for o in full.bids], [Decimal(b['price']) for b in bids])
+        self.assertEqual(full.sequence, 27214)
+        self.assertEqual(len(top.asks), 5)
+        self.assertEqual(len(top.bids), 5)
+        self.assertEqual(top.bids[4].oid, 'o4')
+
+    def test_order_book_stream_error(self):
+        response = FakeResponse(b"""{"success": false, "error": {"code": "0301", "message": "Unknown OrderBook"}}""")
+        with mock.patch('requests.get', return_value=response):
+            self.assertRaises(bitso.ApiError, self.api.order_book, 'xxx_mxn', depth=10)
+
         
         
     def test_trades(self):
@@ -527,6 +550,65 @@ class PrivateApiTest(unittest.TestCase):
         self.assertIsInstance(result, dict)
         self.assertEqual(result['oid'], 'qlbga6b600n3xta7actori10z19acfb20njbtuhtu5xry7z8jswbaycazlkc0wf1')
 
+    def test_place_orders(self):
+        response = FakeResponse(b"""
+    {
+        "success": true,
+        "payload": {
+            "oid": "qlbga6b600n3xta7actori10z19acfb20njbtuhtu5xry7z8jswbaycazlkc0wf1"
+        }
+    }
+        """)
+        orders = [dict(book='btc_mxn', side='buy', order_type='limit', major='0.1', price=str(5600+i))
+                  for i in range(10)]
+        orders.append(dict(book='btc_mxn', order_type='limit', major='0.1', price='5600'))
+        with mock.patch('requests.post', return_value=response) as post:
+            result = self.api.place_orders(orders)
+        self.assertEqual(post.call_count, 10)
+        self.assertEqual(len(result), 11)
+        for item in result[:10]:
+            self.assertEqual(item['oid'], 'qlbga6b600n3xta7actori10z19acfb20njbtuhtu5xry7z8jswbaycazlkc0wf1')
+        self.assertIsInstance(result[10], bitso.ApiClientError)
+
+    def test_cancel_order_chunks(self):
+        oids = ['%064d' % i for i in range(100)]
+        def delete(url, **kwargs):
+            chunk = url.rstrip('/').split('/')[-1].split('-')
+            self.assertTrue(len(url) <= self.api.max_url_length)
+            return FakeResponse(json.dumps({'success': True, 'payload': chunk[1:]}).encode('utf-8'))
+        with mock.patch('requests.delete', side_effect=delete) as delete_mock:
+            result = self.api.cancel_orders(oids)
+        self.assertTrue(delete_mock.call_count > 1)
+        self.assertEqual(len(result), 100)
+        self.assertEqual(result.count(True), 100 - delete_mock.call_count)
+        with mock.patch('requests.delete', side_effect=delete):
+            result = self.api.cancel_order(oids)
+        self.assertEqual(len(result), 100 - delete_mock.call_count)
+
+    def test_lookup_orders(self):
+        response = FakeResponse(b"""
+    {
+        "success": true,
+        "payload": [{
+            "book": "btc_mxn",
+            "original_amount": "0.01000000",
+            "unfilled_amount": "0.00500000",
+            "original_value": "56.0",
+            "created_at": "2016-04-08T17:52:31.000+00:00",
+            "updated_at": "2016-04-08T17:52:51.000+00:00",
+            "price": "5600.00",
+            "oid": "543cr2v32a1h684430tvcqx1b0vkr93wd694957cg8umhyrlzkgbaedmf976ia3v",
+            "side": "buy",
+            "status": "partial-fill",
+            "type": "limit"
+        }]
+    }
+        """)
+        with mock.patch('requests.get', return_value=response):
+            result = self.api.lookup_orders(['543cr2v32a1h684430tvcqx1b0vkr93wd694957cg8umhyrlzkgbaedmf976ia3v', 'missing'])
+        self.assertIsInstance(result[0], bitso.Order)
+        self.assertEqual(result[1], None)
+
         
 
     def test_funding_destination(self):
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import hashlib
+import hmac
+import mock
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitso
+from test_api import FakeResponse
+
+
+class NonceGeneratorTest(unittest.TestCase):
+    def test_unique_across_threads(self):
+        generator = bitso.NonceGenerator()
+        nonces = []
+        def worker():
+            local = [generator.next() for _ in range(2000)]
+            nonces.extend(local)
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(set(nonces)), 8000)
+
+    def test_shared_file(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'nonce')
+            first = bitso.NonceGenerator(path)
+            second = bitso.NonceGenerator(path)
+            values = []
+            for _ in range(100):
+                values.append(int(first.next()))
+                values.append(int(second.next()))
+            self.assertEqual(values, sorted(values))
+            self.assertEqual(len(set(values)), 200)
+            first.close()
+            second.close()
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+class SignerTest(unittest.TestCase):
+    def test_signature(self):
+        signer = bitso.Signer('key', 'secret')
+        header = signer.auth_header('get', '/api/v3/balance/')
+        key, nonce, signature = header['Authorization'][len('Bitso '):].split(':')
+        expected = hmac.new(b'secret', (nonce+'GET/api/v3/balance/').encode('utf-8'), hashlib.sha256).hexdigest()
+        self.assertEqual(key, 'key')
+        self.assertEqual(signature, expected)
+
+    def test_private_get_signs_once(self):
+        api = bitso.Api('key', 'secret')
+        response = FakeResponse(b'{"success": true, "payload": {"balances": []}}')
+        with mock.patch.object(api._signer, 'auth_header', wraps=api._signer.auth_header) as auth_header:
+            with mock.patch('requests.get', return_value=response):
+                api.balances()
+        self.assertEqual(auth_header.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
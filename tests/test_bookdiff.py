@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import os
+import random
+import sys
+import unittest
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitso
+from bitso.livebook import BookSide
+from helpers import order_book
+
+
+def summary(updates):
+    return [(u.action, u.side, u.rate, u.amount, getattr(u, 'oid', None)) for u in updates]
+
+
+class DiffOrderBooksTest(unittest.TestCase):
+    def test_aggregated(self):
+        previous = order_book([(100, 1), (99, 2), (98, 3)], [(101, 1), (102, 2)])
+        current = order_book([(100.5, 1), (100, 1), (98, 4)], [(102, 2), (103, 1)])
+        updates = bitso.diff_order_books(previous, current)
+        self.assertEqual(summary(updates), [
+            ('remove', 'bid', Decimal('99'), 0, None),
+            ('remove', 'ask', Decimal('101'), 0, None),
+            ('add', 'bid', Decimal('100.5'), Decimal('1'), None),
+            ('modify', 'bid', Decimal('98'), Decimal('4'), None),
+            ('add', 'ask', Decimal('103'), Decimal('1'), None),
+        ])
+        self.assertFalse(hasattr(updates[0], 'status'))
+        self.assertEqual(updates[2].status, 'open')
+        self.assertEqual(updates[2].timestamp, 1483228801000)
+        self.assertEqual(updates[3].value, Decimal('392'))
+
+    def test_by_oid(self):
+        previous = order_book([(100, 1, 'b1'), (100, 2, 'b2')], [(101, 1, 'a1')])
+        current = order_book([(100, 1, 'b1'), (100, 1, 'b2'), (100, 5, 'b3')], [(101.5, 1, 'a1')])
+        self.assertEqual(summary(bitso.diff_order_books(previous, current)), [
+            ('remove', 'ask', Decimal('101'), 0, 'a1'),
+            ('modify', 'bid', Decimal('100'), Decimal('1'), 'b2'),
+            ('add', 'bid', Decimal('100'), Decimal('5'), 'b3'),
+            ('add', 'ask', Decimal('101.5'), Decimal('1'), 'a1'),
+        ])
+
+    def test_removal_is_not_a_cancel(self):
+        previous = order_book([(100, 1, 'mine')], [])
+        current = order_book([], [])
+        diff = bitso.BookDiff('btc_mxn', 2, 1, bitso.diff_order_books(previous, current))
+        api = bitso.Api('key', 'secret')
+        store = bitso.OrderStore(api)
+        order = bitso.TrackedOrder('mine', 'btc_mxn', 'buy')
+        store.track(order)
+        projector = bitso.BalanceProjector(api)
+        projector.order_placed('mine', 'btc_mxn', 'buy', major='1', price='100')
+        store.on_update(diff)
+        projector.on_update(diff)
+        self.assertFalse('mine' in store)
+        self.assertEqual(order.status, 'closed')
+        self.assertEqual(projector.locked('mxn'), Decimal('100'))
+
+    def test_first_snapshot_and_unsorted(self):
+        current = order_book([(98, 1), (100, 1)], [(102, 1), (101, 1)])
+        self.assertEqual([(u.side, u.rate) for u in bitso.diff_order_books(None, current)],
+                         [('bid', Decimal('100')), ('bid', Decimal('98')),
+                          ('ask', Decimal('101')), ('ask', Decimal('102'))])
+
+    def test_replaying_updates_rebuilds_book(self):
+        rng = random.Random(5)
+
+        def random_book():
+            bids = [(rng.randint(90, 100), rng.randint(1, 3), 'b%d' % i) for i in rng.sample(range(40), 20)]
+            asks = [(rng.randint(101, 111), rng.randint(1, 3), 'a%d' % i) for i in rng.sample(range(40), 20)]
+            bids.sort(key=lambda level: -level[0])
+            asks.sort(key=lambda level: level[0])
+            return order_book(bids, asks)
+        previous = random_book()
+        sides = {'bid': BookSide('bid'), 'ask': BookSide('ask')}
+        for update in bitso.diff_order_books(None, previous):
+            sides[update.side].update(update.rate, update.amount, update.oid)
+        for _ in range(20):
+            current = random_book()
+            for update in bitso.diff_order_books(previous, current):
+                sides[update.side].update(update.rate, update.amount, update.oid)
+            expected = BookSide('bid')
+            for order in current.bids:
+                expected.update(order.price, order.amount, order.oid)
+            self.assertEqual(sides['bid'].levels, expected.levels)
+            self.assertEqual(sides['bid'].orders, expected.orders)
+            previous = current
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import os
+import random
+import sys
+import unittest
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitso
+from bitso.bookwalk import FenwickTree
+from bitso.models import OrderBook
+from test_livebook import SNAPSHOT, diff
+
+
+def naive_cost(levels, amount):
+    filled = value = Decimal('0')
+    for price, size in levels:
+        take = min(size, amount - filled)
+        if take <= 0:
+            break
+        filled += take
+        value += take * price
+    return filled, value
+
+
+class FenwickTreeTest(unittest.TestCase):
+    def test_prefix_and_search(self):
+        rng = random.Random(7)
+        values = [Decimal(rng.randint(1, 100)) for _ in range(37)]
+        tree = FenwickTree(values)
+        for k in range(38):
+            self.assertEqual(tree.prefix(k), sum(values[:k]))
+        tree.add(5, Decimal('10'))
+        values[5] += 10
+        for limit in (0, 1, 50, 500, 5000):
+            k, total = tree.search(Decimal(limit))
+            self.assertEqual(total, sum(values[:k]))
+            self.assertTrue(total <= limit)
+            if k < len(values):
+                self.assertTrue(total + values[k] > limit)
+
+
+class BookWalkerTest(unittest.TestCase):
+    def setUp(self):
+        self.order_book = OrderBook._NewFromJsonDict(SNAPSHOT)
+        self.walker = bitso.BookWalker.from_order_book(self.order_book)
+
+    def test_cost(self):
+        estimate = self.walker.cost('sell', Decimal('2.5'))
+        self.assertTrue(estimate.complete)
+        self.assertEqual(estimate.value, Decimal('100') + Decimal('1.5') * 99)
+        self.assertEqual(estimate.worst_price, Decimal('99'))
+        self.assertEqual(estimate.average_price, Decimal('248.5') / Decimal('2.5'))
+        self.assertEqual(estimate.slippage_bps, (100 - Decimal('248.5') / Decimal('2.5')) / 100 * 10000)
+        estimate = self.walker.cost('buy', '10')
+        self.assertFalse(estimate.complete)
+        self.assertEqual(estimate.filled, Decimal('3'))
+        self.assertEqual(estimate.worst_price, Decimal('102'))
+        self.assertEqual(self.walker.cost('buy', 1).slippage_bps, 0)
+        self.assertRaises(bitso.ApiClientError, self.walker.cost, 'bid', 1)
+
+    def test_size_and_depth(self):
+        self.assertEqual(self.walker.size_within('sell', 100), Decimal('3'))
+        self.assertEqual(self.walker.size_within('sell', 0), Decimal('1'))
+        self.assertEqual(self.walker.size_within('buy', 99), Decimal('1'))
+        self.assertEqual(self.walker.price_at_depth('sell', 1), Decimal('100'))
+        self.assertEqual(self.walker.price_at_depth('sell', '1.01'), Decimal('99'))
+        self.assertEqual(self.walker.price_at_depth('sell', 6), Decimal('98'))
+        self.assertEqual(self.walker.price_at_depth('sell', 7), None)
+
+    def test_live_book_matches_naive_walk(self):
+        rng = random.Random(3)
+        book = bitso.LiveOrderBook('btc_mxn')
+        book.load_snapshot(self.order_book)
+        walker = bitso.BookWalker(book)
+        for seq in range(11, 300):
+            oid = 'x%d' % rng.randint(0, 40)
+            amount = str(rng.randint(0, 5)) if rng.random() < 0.8 else None
+            book.on_update(diff(seq, ('ask', str(rng.randint(101, 120)), amount, oid)))
+            if seq % 7:
+                continue
+            target = Decimal(rng.randint(1, 30))
+            estimate = walker.cost('buy', target)
+            filled, value = naive_cost(book.asks.top(len(book.asks)), target)
+            self.assertEqual((estimate.filled, estimate.value), (filled, value))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import json
+import mock
+import os
+import sys
+import unittest
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitso
+from bitso.models import StreamUpdate
+from test_api import FakeResponse
+
+
+def trade(tid, second, price, amount='1'):
+    return {'book': 'btc_mxn', 'tid': tid, 'price': price, 'amount': amount, 'maker_side': 'buy',
+            'created_at': '2016-04-08T17:%02d:%02d.000+00:00' % (second // 60, second % 60)}
+
+
+class CandleAggregatorTest(unittest.TestCase):
+    def setUp(self):
+        self.closed = []
+        self.candles = bitso.CandleAggregator(intervals=(1, 60), max_candles=3,
+                                              on_candle=lambda book, c: self.closed.append(c))
+
+    def test_ohlcv(self):
+        for tid, (ts, price, amount) in enumerate([(0.1, '10', '1'), (0.5, '12', '1'), (0.9, '9', '2'), (1.2, '11', '1')]):
+            self.candles.add_trade('btc_mxn', tid, Decimal(price), Decimal(amount), ts)
+        first = self.candles.series('btc_mxn', 1).candles[0]
+        self.assertEqual((first.open, first.high, first.low, first.close), (10, 12, 9, 9))
+        self.assertEqual(first.volume, 4)
+        self.assertEqual(first.vwap, Decimal('10'))
+        minute = self.candles.series('btc_mxn', 60).current
+        self.assertEqual(minute.count, 4)
+        self.assertEqual(self.closed, [first])
+
+    def test_dedupe_and_ring_buffer(self):
+        for second in range(10):
+            self.assertTrue(self.candles.add_trade('btc_mxn', second, Decimal(10), Decimal(1), second))
+        self.assertFalse(self.candles.add_trade('btc_mxn', 9, Decimal(10), Decimal(1), 9))
+        series = self.candles.series('btc_mxn', 1)
+        self.assertEqual(len(series.closed), 3)
+        self.assertEqual(series.current.count, 1)
+
+    def test_backfill_then_stream(self):
+        pages = [[trade(5, 125, '12'), trade(4, 65, '11')], [trade(3, 61, '10'), trade(2, 10, '9')]]
+        responses = [FakeResponse(json.dumps({'success': True, 'payload': p}).encode('utf-8')) for p in pages]
+        with mock.patch('requests.get', side_effect=responses) as get:
+            added = self.candles.backfill(bitso.Api(), 'btc_mxn', since=1460134800 + 30, page_size=2)
+        self.assertEqual(added, 3)
+        self.assertTrue('marker=4' in get.call_args[0][0])
+        minutes = self.candles.series('btc_mxn', 60).candles
+        self.assertEqual([(c.open, c.close, c.count) for c in minutes], [(10, 11, 2), (12, 12, 1)])
+        self.candles.on_update(StreamUpdate({'type': 'trades', 'book': 'btc_mxn', 'payload': [
+            {'i': 5, 'a': '1', 'r': '12', 'v': '12'}]}))
+        self.assertEqual(self.candles.series('btc_mxn', 60).candles[-1].count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitso
+from bitso import export
+from bitso.models import LedgerEntry, UserTrade
+from test_history import user_trade
+
+
+class FakeApi(object):
+    """Serves pages of user trades and ledger entries after a marker."""
+
+    def __init__(self, trades, entries):
+        self.trades = trades
+        self.entries = entries
+        self.fail_after = None
+        self.calls = 0
+
+    def _page(self, objects, key, marker, limit):
+        self.calls += 1
+        if self.fail_after is not None and self.calls > self.fail_after:
+            raise bitso.ApiError({u'message': u'boom'})
+        keys = [key(obj) for obj in objects]
+        start = keys.index(marker) + 1 if marker is not None else 0
+        return objects[start:start + limit]
+
+    def user_trades(self, book=None, marker=None, limit=25, sort='desc'):
+        trades = [t for t in self.trades if t.book == book]
+        return self._page(trades, lambda t: str(t.tid), marker, limit)
+
+    def ledger(self, operations='', marker=None, limit=25, sort='desc'):
+        entries = [e for e in self.entries if e.operation == operations.rstrip('s')]
+        return self._page(entries, lambda e: e.eid, marker, limit)
+
+
+class HistoryExporterTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        trades = [UserTrade._NewFromJsonDict(user_trade(tid, tid, book=book))
+                  for tid, book in enumerate(['btc_mxn', 'eth_mxn'] * 4, 1)]
+        with open('tests/ledger.json') as data_file:
+            entries = [LedgerEntry._NewFromJsonDict(e) for e in json.load(data_file)['payload']
+                       if 'eid' in e]
+        self.api = FakeApi(trades, entries)
+        self.exporter = bitso.HistoryExporter(self.api, self.dir, page_size=2, max_workers=3)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def read(self, name):
+        with open(os.path.join(self.dir, name)) as f:
+            return list(csv.reader(f))
+
+    def test_export(self):
+        results = self.exporter.export(books=['btc_mxn', 'eth_mxn'], operations=['trades', 'fees'])
+        self.assertEqual(results['user_trades_btc_mxn'], 4)
+        self.assertEqual(results['user_trades_eth_mxn'], 4)
+        rows = self.read('user_trades_btc_mxn.csv')
+        self.assertEqual(tuple(rows[0]), export.USER_TRADE_COLUMNS)
+        self.assertEqual([row[0] for row in rows[1:]], ['1', '3', '5', '7'])
+        self.assertEqual(rows[1][4], '2017-09-01T17:52:31+00:00')
+        ledger = self.read('ledger_trades.csv')
+        self.assertEqual(tuple(ledger[0]), export.LEDGER_COLUMNS)
+        self.assertEqual(len(ledger) - 1, results['ledger_trades'])
+        self.assertTrue(results['ledger_trades'] > 0)
+        # nothing new: one request per partition, no rows
+        self.api.calls = 0
+        results = self.exporter.export(books=['btc_mxn', 'eth_mxn'], operations=['trades', 'fees'])
+        self.assertEqual(set(results.values()), set([0]))
+        self.assertEqual(self.api.calls, 4)
+        self.assertEqual(len(self.read('user_trades_btc_mxn.csv')), 5)
+
+    def test_resume(self):
+        self.api.fail_after = 1
+        partition = export.Partition('user_trades', 'btc_mxn')
+        self.assertRaises(bitso.ApiError, self.exporter.export_partition, partition)
+        self.assertEqual(self.exporter.load_checkpoint(partition)['marker'], '3')
+        # rows written after the last checkpoint are dropped on resume
+        with open(os.path.join(self.dir, 'user_trades_btc_mxn.csv'), 'ab') as f:
+            f.write('partial,row\r\n')
+        self.api.fail_after = None
+        self.assertEqual(self.exporter.export_partition(partition), 2)
+        rows = self.read('user_trades_btc_mxn.csv')
+        self.assertEqual([row[0] for row in rows[1:]], ['1', '3', '5', '7'])
+        self.assertEqual(self.exporter.load_checkpoint(partition)['rows'], 4)
+
+    def test_partition_errors_are_returned(self):
+        self.api.fail_after = 0
+        results = self.exporter.export(books=['btc_mxn'], operations=[])
+        self.assertTrue(isinstance(results['user_trades_btc_mxn'], bitso.ApiError))
+        self.assertRaises(bitso.ApiClientError, bitso.HistoryExporter, self.api, self.dir, format='xlsx')
+
+    def test_main_needs_credentials(self):
+        with open(os.devnull, 'w') as devnull:
+            stderr, sys.stderr = sys.stderr, devnull
+            try:
+                self.assertRaises(SystemExit, export.main, ['--out', self.dir, '--key', ''])
+            finally:
+                sys.stderr = stderr
+
+
+if __name__ == '__main__':
+    unittest.main()
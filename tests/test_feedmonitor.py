@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import json
+import os
+import sys
+import threading
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mock
+
+import bitso
+from bitso.models import OrderBook, StreamUpdate
+from helpers import Clock
+from test_livebook import SNAPSHOT
+
+
+def message(channel, received_at, d=None, book='btc_mxn'):
+    payload = []
+    if d is not None:
+        payload = [{'d': d, 'r': '100', 't': 0, 'a': '1', 'o': 'o1', 's': 'open'}]
+    data = StreamUpdate({'type': channel, 'book': book, 'sequence': 1, 'payload': payload})
+    data.received_at = received_at
+    return data
+
+
+class FeedMonitorTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.listener = mock.Mock()
+        self.monitor = bitso.FeedMonitor(self.listener, window=5.0, clock=self.clock)
+
+    def test_latencies_and_gaps(self):
+        self.clock.now = 1000.5
+        self.monitor.on_update(message('diff-orders', 1000.25, d=1000000))
+        self.clock.now = 1002.0
+        self.monitor.on_update(message('diff-orders', 1001.75, d=1001500))
+        stats = self.monitor.stats('diff-orders', 'btc_mxn')
+        self.assertEqual(stats.messages, 2)
+        self.assertEqual((stats.exchange_latency.min, stats.exchange_latency.max), (0.25, 0.25))
+        self.assertEqual(stats.dispatch_latency.sum, 0.5)
+        self.assertEqual((stats.gaps.count, stats.gaps.sum), (1, 1.5))
+        self.assertEqual(stats.last_timestamp, 1001500)
+        self.assertEqual(self.listener.on_update.call_count, 2)
+        self.assertEqual(self.monitor.stats('trades', 'btc_mxn'), None)
+
+    def test_watchdog_fires_once_until_next_message(self):
+        stale = []
+        btc = mock.Mock(book='btc_mxn')
+        eth = mock.Mock(book='eth_mxn')
+        monitor = bitso.FeedMonitor(bitso.ListenerGroup([btc, eth]), window={'diff-orders': 5.0}, clock=self.clock,
+                                    on_stale=lambda m, channel, book, silence: stale.append((channel, book, silence)),
+                                    resync=True, watch=[('diff-orders', 'ltc_mxn')])
+        monitor.on_update(message('diff-orders', 1000.0))
+        monitor.on_update(message('trades', 1000.0))
+        self.clock.now = 1004.0
+        self.assertEqual(monitor.check(), [])
+        self.clock.now = 1006.0
+        self.assertEqual(sorted(monitor.check()), [('diff-orders', 'btc_mxn', 6.0), ('diff-orders', 'ltc_mxn', 6.0)])
+        self.assertEqual(len(stale), 2)
+        # only the stale book is resynced, without waiting for a message
+        self.assertEqual(btc.resync.call_count, 1)
+        self.assertEqual(eth.resync.call_count, 0)
+        self.assertTrue(monitor.is_stale('diff-orders', 'btc_mxn'))
+        self.assertFalse(monitor.is_stale('trades', 'btc_mxn'))
+        self.clock.now = 1010.0
+        self.assertEqual(monitor.check(), [])
+        self.assertEqual(btc.resync.call_count, 1)
+        monitor.on_update(message('diff-orders', 1010.0))
+        self.assertFalse(monitor.is_stale('diff-orders', 'btc_mxn'))
+        self.assertEqual(btc.resync.call_count, 1)
+
+    def test_resync_waits_for_dispatch(self):
+        listener = mock.Mock(book='btc_mxn')
+        monitor = bitso.FeedMonitor(listener, window=5.0, resync=True, clock=self.clock)
+        monitor.on_update(message('diff-orders', 1000.0))
+        self.clock.now = 1006.0
+        watchdog = threading.Thread(target=monitor.check)
+        resyncs = []
+
+        def on_update(data):
+            # the watchdog fires while the feed thread is inside the listener
+            watchdog.start()
+            watchdog.join(0.1)
+            resyncs.append(listener.resync.call_count)
+        listener.on_update.side_effect = on_update
+        monitor.on_update(message('diff-orders', 1000.0))
+        watchdog.join()
+        self.assertEqual(resyncs, [0])
+        self.assertEqual(listener.resync.call_count, 1)
+
+    def test_resyncs_live_book_through_client(self):
+        api = mock.Mock()
+        api.order_book.return_value = OrderBook._NewFromJsonDict(SNAPSHOT)
+        book = bitso.LiveOrderBook('btc_mxn', api=api)
+        monitor = bitso.FeedMonitor(book, window=5.0, resync=True, clock=self.clock)
+        with mock.patch('bitso.bitsows.websocket'):
+            client = bitso.Client(monitor)
+        with mock.patch('bitso.bitsows.time') as time:
+            time.time.return_value = 999.75
+            client._on_message(None, json.dumps({'type': 'diff-orders', 'book': 'btc_mxn', 'sequence': 11,
+                                                 'payload': [{'d': 999000, 'r': '101', 't': 1, 'a': '1', 'o': 'x', 's': 'open'}]}))
+        stats = monitor.stats('diff-orders', 'btc_mxn')
+        self.assertEqual(stats.dispatch_latency.sum, 0.25)
+        self.assertEqual(stats.exchange_latency.sum, 0.75)
+        self.clock.now = 1010.0
+        monitor.check()
+        self.assertEqual(api.order_book.call_count, 1)
+        self.assertTrue(book.synced)
+        self.assertEqual(book.sequence, 11)
+        with mock.patch('bitso.bitsows.time') as time:
+            time.time.return_value = 1010.0
+            client._on_message(None, json.dumps({'type': 'diff-orders', 'book': 'btc_mxn', 'sequence': 12,
+                                                 'payload': [{'d': 1009900, 'r': '101', 't': 1, 'o': 'x', 's': 'cancelled'}]}))
+        self.assertEqual(api.order_book.call_count, 1)
+        self.assertEqual(book.sequence, 12)
+        self.assertFalse(monitor.is_stale('diff-orders', 'btc_mxn'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import json
+import mock
+import os
+import sys
+import unittest
+from datetime import datetime
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitso
+from test_api import FakeResponse
+
+
+def user_trade(tid, day, book='eth_mxn', fee='-1.5'):
+    return {
+        'book': book,
+        'major': '-0.25232073',
+        'created_at': '2017-09-%02dT17:52:31.000+00:00' % day,
+        'minor': '1013.540958479115',
+        'fees_amount': fee,
+        'fees_currency': 'mxn',
+        'price': '4057.45',
+        'tid': tid,
+        'oid': 'oid%d' % tid,
+        'side': 'sell'
+    }
+
+
+class HistorySyncTest(unittest.TestCase):
+    def setUp(self):
+        self.api = bitso.Api('key', 'secret')
+        self.store = bitso.HistoryStore()
+        self.sync = bitso.HistorySync(self.api, self.store, page_size=2)
+
+    def respond(self, pages):
+        responses = [FakeResponse(json.dumps({'success': True, 'payload': page}).encode('utf-8'))
+                     for page in pages]
+        return mock.patch('requests.get', side_effect=responses)
+
+    def test_incremental_user_trades(self):
+        with self.respond([[user_trade(1, 1), user_trade(2, 15)], [user_trade(3, 30)]]) as get:
+            self.assertEqual(self.sync.sync_user_trades('eth_mxn'), 3)
+        self.assertEqual(get.call_count, 2)
+        self.assertTrue('marker=2' in get.call_args[0][0])
+        self.assertTrue('sort=asc' in get.call_args[0][0])
+        self.assertEqual(self.store.checkpoint('user_trades:eth_mxn'), '3')
+
+        with self.respond([[user_trade(4, 30, fee='-0.25')]]) as get:
+            self.assertEqual(self.sync.sync_user_trades('eth_mxn'), 1)
+        self.assertTrue('marker=3' in get.call_args[0][0])
+
+        fees = self.store.fees(book='eth_mxn', start=datetime(2017, 9, 10), end=datetime(2017, 10, 1))
+        self.assertEqual(fees, {u'mxn': Decimal('-3.25')})
+        self.assertEqual(len(self.store.user_trades(book='eth_mxn')), 4)
+        self.assertEqual(self.store.user_trades(book='btc_mxn'), [])
+
+    def test_ledger(self):
+        with open('tests/ledger.json') as data_file:
+            entries = json.load(data_file)['payload']
+        with self.respond([entries, []]):
+            self.sync.sync_ledger('trades')
+        changes = self.store.balance_changes(currency='btc', operation='trade')
+        self.assertEqual(changes, {u'btc': Decimal('-0.25232073')})
+        self.assertEqual(self.store.checkpoint('ledger:trades'), entries[-1]['eid'])
+
+
+if __name__ == '__main__':
+    unittest.main()
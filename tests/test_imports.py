@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import os
+import subprocess
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitso
+from bitso.utils import LazyModule
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def loaded_after(statement):
+    script = ('import sys\n%s\nprint(",".join(m for m in ("requests", "websocket", "dateutil")'
+              ' if m in sys.modules))' % statement)
+    output = subprocess.check_output([sys.executable, '-c', script], cwd=ROOT)
+    return set(filter(None, output.decode('ascii').strip().split(',')))
+
+
+class LazyImportTest(unittest.TestCase):
+    def test_import_loads_no_dependencies(self):
+        self.assertEqual(loaded_after('import bitso'), set())
+        self.assertEqual(loaded_after('import bitso; bitso.Api; bitso.LiveOrderBook; bitso.Client'), set())
+        self.assertEqual(loaded_after('import bitso; bitso.OrderBook(bids=[], asks=[], sequence="1", updated_at="2016-04-08T17:52:31+00:00")'),
+                         set(['dateutil']))
+        self.assertEqual(loaded_after('from bitso import Api; Api().available_books'), set())
+
+    def test_package_names(self):
+        self.assertTrue(set(bitso.__all__) <= set(dir(bitso)))
+        for name in bitso.__all__:
+            self.assertTrue(getattr(bitso, name) is not None)
+        self.assertRaises(AttributeError, getattr, bitso, 'NotAName')
+
+    def test_lazy_module(self):
+        module = LazyModule('xml.dom.minidom')
+        self.assertTrue(module.dom.minidom.parseString is not None)
+        self.assertTrue('loaded=True' in repr(module))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import mock
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitso
+from test_api import FakeResponse
+
+
+class KeyPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.credentials = [('key1', 'secret1'), ('key2', 'secret2'), ('key3', 'secret3')]
+
+    def test_round_robin(self):
+        pool = bitso.KeyPool(self.credentials, strategy='round_robin')
+        used = []
+        for _ in range(6):
+            pooled = pool.acquire()
+            used.append(pooled.key)
+            pool.release(pooled)
+        self.assertEqual(used, ['key1', 'key2', 'key3'] * 2)
+
+    def test_least_loaded(self):
+        pool = bitso.KeyPool(self.credentials)
+        first = pool.acquire()
+        second = pool.acquire()
+        self.assertNotEqual(first.key, second.key)
+        pool.release(first)
+        third = pool.acquire()
+        self.assertNotEqual(third.key, second.key)
+
+    def test_unhealthy_key_leaves_rotation(self):
+        pool = bitso.KeyPool(self.credentials, strategy='round_robin', max_errors=2)
+        bad = pool.keys[0]
+        pool.release(pool.acquire(), failed=True)
+        self.assertEqual(len(pool.healthy_keys), 3)
+        bad.in_flight += 1
+        pool.release(bad, failed=True)
+        self.assertEqual(pool.healthy_keys, ['key2', 'key3'])
+
+    def test_api_routes_private_requests(self):
+        pool = bitso.KeyPool(self.credentials, strategy='round_robin', max_errors=1)
+        api = bitso.Api(key_pool=pool, max_retries=0)
+        ok = FakeResponse(b'{"success": true, "payload": {"balances": []}}')
+        limited = FakeResponse(b'{"success": false, "error": {"code": "0201", "message": "Too many requests"}}', status_code=429)
+        with mock.patch('requests.get', side_effect=[ok, limited, ok]) as get:
+            api.balances()
+            self.assertRaises(bitso.ApiError, api.balances)
+            api.balances()
+        keys = [call[1]['headers']['Authorization'].split(':')[0] for call in get.call_args_list]
+        self.assertEqual(keys, ['Bitso key1', 'Bitso key2', 'Bitso key3'])
+        self.assertEqual(pool.healthy_keys, ['key1', 'key3'])
+
+    def test_key_released_when_hook_raises(self):
+        pool = bitso.KeyPool(self.credentials)
+        api = bitso.Api(key_pool=pool)
+        hook = mock.Mock()
+        hook.before_request.side_effect = RuntimeError('hook')
+        api.add_hook(hook)
+        with mock.patch('requests.get') as get:
+            self.assertRaises(RuntimeError, api.balances)
+        self.assertEqual(get.call_count, 0)
+        self.assertEqual([k.in_flight for k in pool.keys], [0, 0, 0])
+        self.assertEqual(len(pool.healthy_keys), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import json
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mock
+
+import bitso
+from bitso.metrics import RequestInfo
+from bitso.models import StreamUpdate
+from helpers import Clock
+from test_simulator import wait_for
+
+
+def response(payload):
+    return mock.Mock(content=json.dumps({'success': True, 'payload': payload}))
+
+
+def diff(oid, amount=None, status='open'):
+    elem = {'d': 1, 'r': '100', 't': 0, 'o': oid, 's': status}
+    if amount is not None:
+        elem['a'] = amount
+    return StreamUpdate({'type': 'diff-orders', 'book': 'btc_mxn', 'sequence': 1, 'payload': [elem]})
+
+
+class LifecycleTrackerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.tracker = bitso.LifecycleTracker(clock=self.clock)
+
+    def place(self, oid, acked_after, before_ack=()):
+        request = RequestInfo('place_order', 'POST', 'https://bitso.com/api/v3/orders/', True)
+        self.tracker.before_request(request)
+        for delay, data in before_ack:
+            self.clock.now += delay
+            self.tracker.on_update(data)
+        self.clock.now += acked_after
+        self.tracker.after_response(request, response({'oid': oid}))
+
+    def test_timeline_of_filled_order(self):
+        self.place('o1', 0.25)
+        self.clock.now += 0.25
+        self.tracker.on_update(diff('o1', '1'))
+        self.clock.now += 1.0
+        self.tracker.on_update(diff('o1', '0.4'))
+        self.tracker.on_update(diff('o1', status='completed'))
+        timeline = self.tracker.timeline('o1')
+        self.assertEqual(timeline.latencies(), {'ack': 0.25, 'visible': 0.5, 'first_fill': 1.5})
+        self.assertEqual((timeline.fills, timeline.fill_source, timeline.book), (2, 'diff-orders', 'btc_mxn'))
+        report = self.tracker.report()
+        self.assertEqual(report['first_fill']['count'], 1)
+        self.assertEqual(report['cancel']['count'], 0)
+
+    def test_updates_before_ack_are_kept(self):
+        trade = StreamUpdate({'type': 'trades', 'book': 'btc_mxn',
+                              'payload': [{'i': 1, 'a': '1', 'r': '100', 'v': '100', 't': 1,
+                                           'mo': 'maker', 'to': 'o2'}]})
+        self.place('o2', 0.1, before_ack=[(0.05, trade), (0.01, diff('other', '1'))])
+        timeline = self.tracker.timeline('o2')
+        self.assertEqual(timeline.fill_source, 'trades')
+        self.assertAlmostEqual(timeline.latencies()['first_fill'], 0.05)
+        self.assertEqual(self.tracker.timeline('other'), None)
+        # nothing in flight, so unknown orders are not buffered
+        self.tracker.on_update(diff('other', '1'))
+        self.assertEqual(self.tracker._early, {})
+
+    def test_cancel_confirmation_and_user_trades(self):
+        self.place('o3', 0.1)
+        self.place('o4', 0.1)
+        request = RequestInfo('cancel_order', 'DELETE', 'https://bitso.com/api/v3/orders/o3-o4/', True)
+        self.tracker.before_request(request)
+        self.clock.now += 0.2
+        self.tracker.after_response(request, response(['o3']))
+        self.clock.now += 0.1
+        self.tracker.on_update(diff('o3', status='cancelled'))
+        trades = RequestInfo('user_trades', 'GET', 'https://bitso.com/api/v3/user_trades/', True)
+        self.tracker.after_response(trades, response([{'oid': 'o4', 'tid': 1}]))
+        self.tracker.after_response(trades, response([{'oid': 'o4', 'tid': 2}, {'oid': 'o4', 'tid': 1}]))
+        self.assertEqual(self.tracker.timeline('o4').fills, 2)
+        self.assertAlmostEqual(self.tracker.timeline('o3').latencies()['cancel'], 0.3)
+        self.assertAlmostEqual(self.tracker.timeline('o3').cancel_acked - self.tracker.timeline('o3').cancel_sent, 0.2)
+        self.assertEqual(self.tracker.timeline('o4').fill_source, 'user_trades')
+        self.assertEqual(self.tracker.timeline('o4').cancelled, None)
+
+    def test_with_simulated_exchange(self):
+        exchange = bitso.SimulatedExchange({'btc_mxn': bitso.synthetic_order_book('btc_mxn', '100000', levels=5)})
+        exchange.start()
+        try:
+            api = bitso.Api('key', 'secret')
+            api.base_url = exchange.url
+            tracker = bitso.LifecycleTracker()
+            api.add_hook(tracker)
+            exchange.attach(tracker)
+            resting = api.place_order(book='btc_mxn', side='buy', order_type='limit', major='1', price='99000')['oid']
+            taker = api.place_order(book='btc_mxn', side='sell', order_type='market', major='0.5')['oid']
+            api.cancel_order(resting)
+            wait_for(lambda: tracker.timeline(resting).cancelled is not None)
+            wait_for(lambda: tracker.timeline(taker).first_fill is not None)
+        finally:
+            exchange.stop()
+        self.assertEqual(sorted(tracker.timeline(resting).latencies()),
+                         ['ack', 'cancel', 'visible'])
+        self.assertEqual(tracker.timeline(taker).fill_source, 'trades')
+
+
+if __name__ == '__main__':
+    unittest.main()
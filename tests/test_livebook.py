@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import os
+import sys
+import unittest
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mock
+
+import bitso
+from bitso.models import OrderBook, StreamUpdate
+
+
+SNAPSHOT = {
+    'updated_at': '2016-04-08T17:52:31.000+00:00',
+    'sequence': '10',
+    'bids': [{'book': 'btc_mxn', 'price': '100', 'amount': '1', 'oid': 'b1'},
+             {'book': 'btc_mxn', 'price': '99', 'amount': '2', 'oid': 'b2'},
+             {'book': 'btc_mxn', 'price': '98', 'amount': '3', 'oid': 'b3'}],
+    'asks': [{'book': 'btc_mxn', 'price': '101', 'amount': '1', 'oid': 'a1'},
+             {'book': 'btc_mxn', 'price': '102', 'amount': '2', 'oid': 'a2'}],
+}
+
+
+def diff(sequence, *updates):
+    payload = []
+    for (side, rate, amount, oid) in updates:
+        elem = {'d': 1460000000000 + sequence, 'r': rate, 't': 0 if side == 'bid' else 1, 'o': oid}
+        if amount is not None:
+            elem['a'] = amount
+            elem['s'] = 'open'
+        else:
+            elem['s'] = 'cancelled'
+        payload.append(elem)
+    return StreamUpdate({'type': 'diff-orders', 'book': 'btc_mxn',
+                         'sequence': sequence, 'payload': payload})
+
+
+class LiveOrderBookTest(unittest.TestCase):
+    def setUp(self):
+        self.book = bitso.LiveOrderBook('btc_mxn')
+        self.events = []
+        self.book.subscribe_top(self.events.append, depth=1)
+
+    def test_snapshot_and_queue(self):
+        self.book.on_update(diff(10, ('bid', '97', '5', 'b4')))
+        self.book.on_update(diff(11, ('bid', '100.5', '1', 'b5')))
+        self.book.load_snapshot(OrderBook._NewFromJsonDict(SNAPSHOT))
+        self.assertEqual(self.book.sequence, 11)
+        self.assertEqual(self.book.bids.top(2), [(Decimal('100.5'), Decimal('1')),
+                                                 (Decimal('100'), Decimal('1'))])
+        self.assertNotIn(Decimal('97'), self.book.bids.levels)
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(self.events[0].bid, (Decimal('100.5'), Decimal('1')))
+        self.assertEqual(self.events[0].ask, (Decimal('101'), Decimal('1')))
+
+    def test_change_only_events(self):
+        self.book.load_snapshot(OrderBook._NewFromJsonDict(SNAPSHOT))
+        del self.events[:]
+        # below the top of book: no event
+        self.book.on_update(diff(11, ('bid', '98', '4', 'b3')))
+        self.book.on_update(diff(12, ('ask', '102', None, 'a2')))
+        self.assertEqual(self.events, [])
+        self.assertEqual(self.book.asks.top(5), [(Decimal('101'), Decimal('1'))])
+        # partial fill at the best bid
+        self.book.on_update(diff(13, ('bid', '100', '0.4', 'b1')))
+        self.assertEqual(len(self.events), 1)
+        event = self.events[0]
+        self.assertEqual(event.sequence, 13)
+        self.assertEqual(event.timestamp, 1460000000013)
+        self.assertEqual(event.bid, (Decimal('100'), Decimal('0.4')))
+        # best bid removed
+        self.book.on_update(diff(14, ('bid', '100', None, 'b1')))
+        self.assertEqual(self.events[-1].bid, (Decimal('99'), Decimal('2')))
+
+    def test_depth(self):
+        events = []
+        self.book.subscribe_top(events.append, depth=2)
+        self.book.load_snapshot(OrderBook._NewFromJsonDict(SNAPSHOT))
+        self.book.on_update(diff(11, ('bid', '99', '1', 'b6')))
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(len(events), 2)
+        self.assertEqual(events[-1].bids, [(Decimal('100'), Decimal('1')),
+                                           (Decimal('99'), Decimal('3'))])
+
+    def test_gap_resyncs(self):
+        api = mock.Mock()
+        api.order_book.return_value = OrderBook._NewFromJsonDict(SNAPSHOT)
+        gaps = []
+        book = bitso.LiveOrderBook('btc_mxn', api=api, on_gap=lambda b, d: gaps.append(d.sequence_number))
+        book.on_connect()
+        api.order_book.assert_called_with('btc_mxn', aggregate=False)
+        book.on_update(diff(13, ('bid', '100', None, 'b1')))
+        self.assertEqual(gaps, [13])
+        # the reloaded snapshot was still older than the queue
+        self.assertFalse(book.synced)
+        newer = dict(SNAPSHOT, sequence='14')
+        api.order_book.return_value = OrderBook._NewFromJsonDict(newer)
+        book.on_update(diff(14, ('bid', '100', None, 'b1')))
+        self.assertTrue(book.synced)
+        self.assertEqual(book.sequence, 14)
+        self.assertEqual(len(book._queued), 0)
+        book.on_update(diff(15, ('bid', '100', None, 'b1')))
+        self.assertEqual(book.sequence, 15)
+        self.assertEqual(book.bids.best(), Decimal('99'))
+
+    def test_queue_is_capped(self):
+        book = bitso.LiveOrderBook('btc_mxn', max_queued=3)
+        for sequence in range(11, 16):
+            book.on_update(diff(sequence, ('bid', '97', '5', 'b4')))
+        self.assertEqual([data.sequence_number for data in book._queued], [13, 14, 15])
+
+    def test_snapshot_reload_moves_top(self):
+        self.book.load_snapshot(OrderBook._NewFromJsonDict(SNAPSHOT))
+        bids = [{'book': 'btc_mxn', 'price': '100.9', 'amount': '1', 'oid': 'b9'}] + SNAPSHOT['bids']
+        self.book.load_snapshot(OrderBook._NewFromJsonDict(dict(SNAPSHOT, sequence='20', bids=bids)))
+        self.assertEqual(len(self.events), 2)
+        self.assertEqual(self.events[-1].bid, (Decimal('100.9'), Decimal('1')))
+        self.assertEqual(self.events[-1].sequence, 20)
+
+
+class StorageModeTest(unittest.TestCase):
+    def test_l3_queues(self):
+        book = bitso.LiveOrderBook('btc_mxn', mode='L3')
+        book.load_snapshot(OrderBook._NewFromJsonDict(SNAPSHOT))
+        book.on_update(diff(11, ('bid', '100', '2', 'b7'), ('bid', '100', '3', 'b8')))
+        self.assertEqual(book.queue('bid', Decimal('100')),
+                         [('b1', Decimal('1')), ('b7', Decimal('2')), ('b8', Decimal('3'))])
+        book.on_update(diff(12, ('bid', '100', '0.5', 'b1'), ('bid', '100', None, 'b7')))
+        self.assertEqual(book.queue('bid', Decimal('100')),
+                         [('b1', Decimal('0.5')), ('b8', Decimal('3'))])
+        self.assertEqual(book.bids.levels[Decimal('100')], Decimal('3.5'))
+        self.assertEqual(book.order('b8'), (Decimal('100'), 'bid', Decimal('3')))
+        self.assertEqual(book.order('b7'), None)
+        book.on_update(diff(13, ('ask', '101', None, 'a1')))
+        self.assertNotIn('a1', book.index)
+        self.assertEqual(book.asks.best(), Decimal('102'))
+
+    def test_modes_agree(self):
+        l2 = bitso.LiveOrderBook('btc_mxn')
+        l3 = bitso.LiveOrderBook('btc_mxn', mode='L3')
+        updates = [diff(11, ('bid', '99', '1', 'b9')),
+                   diff(12, ('bid', '99', None, 'b2'), ('ask', '101.5', '4', 'a3')),
+                   diff(13, ('ask', '101.5', '1', 'a3'), ('bid', '98', None, 'b3'))]
+        for book in (l2, l3):
+            book.load_snapshot(OrderBook._NewFromJsonDict(SNAPSHOT))
+            for update in updates:
+                book.on_update(update)
+        self.assertEqual(l2.bids.top(10), l3.bids.top(10))
+        self.assertEqual(l2.asks.top(10), l3.asks.top(10))
+        self.assertEqual(l2.bids.top(10), [(Decimal('100'), Decimal('1')),
+                                           (Decimal('99'), Decimal('1'))])
+        self.assertRaises(bitso.ApiClientError, l2.queue, 'bid', Decimal('100'))
+        self.assertRaises(bitso.ApiClientError, bitso.LiveOrderBook, 'btc_mxn', mode='L4')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import mock
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitso
+from test_api import FakeResponse
+
+
+TICKER = b"""{"success": true, "payload": {"book": "btc_mxn", "volume": "22.31349615",
+    "high": "5750.00", "last": "5633.98", "low": "5450.00", "vwap": "5393.45",
+    "ask": "5632.24", "bid": "5520.01", "created_at": "2016-04-08T17:52:31.000+00:00"}}"""
+
+
+class RecordingHook(bitso.RequestHook):
+    def __init__(self):
+        self.events = []
+
+    def before_request(self, request):
+        self.events.append(('before', request.endpoint))
+
+    def after_response(self, request, response):
+        self.events.append(('after', request.endpoint, response.status_code))
+
+    def on_error(self, request, error):
+        self.events.append(('error', request.endpoint, request.error_code))
+
+
+class HistogramTest(unittest.TestCase):
+    def test_quantiles(self):
+        hist = bitso.Histogram(buckets=[10, 20, 30, 40, 50, 60, 70, 80, 90, 100])
+        for value in range(1, 101):
+            hist.observe(value)
+        self.assertEqual(hist.count, 100)
+        self.assertAlmostEqual(hist.quantile(0.5), 50, delta=1)
+        self.assertAlmostEqual(hist.quantile(0.99), 99, delta=1)
+        self.assertEqual(hist.quantile(1.0), 100)
+
+    def test_empty(self):
+        self.assertEqual(bitso.Histogram().quantile(0.5), None)
+
+
+class ApiMetricsTest(unittest.TestCase):
+    def setUp(self):
+        self.hook = RecordingHook()
+        self.api = bitso.Api(hooks=[self.hook])
+
+    def test_records_phases(self):
+        with mock.patch('requests.get', return_value=FakeResponse(TICKER)):
+            self.api.ticker('btc_mxn')
+            self.api.ticker('btc_mxn')
+        ticker = self.api.metrics.as_dict()['ticker']
+        self.assertEqual(ticker['requests'], 2)
+        self.assertEqual(ticker['bytes_received'], 2 * len(TICKER))
+        for phase in ('sign', 'server', 'download', 'parse', 'model', 'total'):
+            self.assertEqual(ticker['phases'][phase]['count'], 2)
+        self.assertEqual(self.hook.events, [('before', 'ticker'), ('after', 'ticker', 200)] * 2)
+
+    def test_records_errors(self):
+        response = FakeResponse(b'{"success": false, "error": {"code": "0301", "message": "Unknown OrderBook"}}', status_code=400)
+        with mock.patch('requests.get', return_value=response):
+            self.assertRaises(bitso.ApiError, self.api.ticker, 'xxx_mxn')
+        self.assertEqual(self.api.metrics.as_dict()['ticker']['errors'], {'0301': 1})
+        self.assertEqual(self.hook.events[-1], ('error', 'ticker', '0301'))
+
+    def test_prometheus(self):
+        with mock.patch('requests.get', return_value=FakeResponse(TICKER)):
+            self.api.ticker('btc_mxn')
+        text = self.api.metrics.prometheus()
+        self.assertTrue('bitso_requests_total{endpoint="ticker"} 1' in text)
+        self.assertTrue('bitso_request_duration_seconds_count{endpoint="ticker",phase="total"} 1' in text)
+        self.assertTrue('bitso_request_duration_seconds_bucket{endpoint="ticker",phase="total",le="+Inf"} 1' in text)
+
+
+if __name__ == '__main__':
+    unittest.main()
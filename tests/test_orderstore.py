@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import json
+import mock
+import os
+import sys
+import unittest
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitso
+from bitso.models import StreamUpdate
+from test_api import FakeResponse
+
+
+def open_order(oid, side='buy', price='5600.00', unfilled='0.01000000'):
+    return {
+        'book': 'btc_mxn',
+        'original_amount': '0.01000000',
+        'unfilled_amount': unfilled,
+        'original_value': '56.0',
+        'created_at': '2016-04-08T17:52:31.000+00:00',
+        'updated_at': '2016-04-08T17:52:51.000+00:00',
+        'price': price,
+        'oid': oid,
+        'side': side,
+        'status': 'open',
+        'type': 'limit'
+    }
+
+
+class OrderStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.api = bitso.Api('key', 'secret')
+        self.store = bitso.OrderStore(self.api)
+
+    def place(self, oid, side='buy', price='5600'):
+        response = FakeResponse(json.dumps({'success': True, 'payload': {'oid': oid}}).encode('utf-8'))
+        with mock.patch('requests.post', return_value=response):
+            self.store.place_order(book='btc_mxn', side=side, order_type='limit', major='0.01', price=price)
+
+    def test_place_and_query(self):
+        self.place('a')
+        self.place('b', side='sell', price='5700')
+        self.assertEqual(self.store.get('a').price, Decimal('5600'))
+        self.assertEqual([o.oid for o in self.store.orders('btc_mxn', 'sell')], ['b'])
+        self.assertEqual(len(self.store.orders('btc_mxn')), 2)
+        self.assertEqual(self.store.orders('eth_mxn'), [])
+
+    def test_follows_api_calls(self):
+        response = FakeResponse(b'{"success": true, "payload": {"oid": "direct"}}')
+        with mock.patch('requests.post', return_value=response):
+            self.api.place_orders([{'book': 'btc_mxn', 'side': 'sell', 'order_type': 'limit',
+                                    'major': '0.02', 'price': '5700'}])
+        order = self.store.get('direct')
+        self.assertEqual((order.side, order.type, order.price), ('sell', 'limit', Decimal('5700')))
+        self.assertEqual(order.unfilled_amount, Decimal('0.02'))
+        response = FakeResponse(b'{"success": true, "payload": ["direct"]}')
+        with mock.patch('requests.delete', return_value=response):
+            self.api.cancel_order('direct')
+        self.assertEqual(len(self.store), 0)
+
+    def test_updates_before_place_response(self):
+        updates = iter([
+            # filled right away
+            [{'d': 1, 'r': '5600', 't': 0, 'a': '0', 'o': 'filled', 's': 'completed'}],
+            # partly filled before the response is read
+            [{'d': 2, 'r': '5600', 't': 0, 'a': '0.004', 'o': 'partial', 's': 'open'}]])
+
+        def post(*args, **kwargs):
+            oid = 'filled' if post.calls == 0 else 'partial'
+            self.store.on_update(StreamUpdate({'type': 'diff-orders', 'book': 'btc_mxn', 'sequence': post.calls,
+                                               'payload': next(updates)}))
+            post.calls += 1
+            return FakeResponse(json.dumps({'success': True, 'payload': {'oid': oid}}).encode('utf-8'))
+        post.calls = 0
+        with mock.patch('requests.post', side_effect=post):
+            self.store.place_order(book='btc_mxn', side='buy', order_type='limit', major='0.01', price='5600')
+            self.store.place_order(book='btc_mxn', side='buy', order_type='limit', major='0.01', price='5600')
+        self.assertFalse('filled' in self.store)
+        self.assertEqual(self.store.get('partial').unfilled_amount, Decimal('0.004'))
+        self.assertEqual(self.store.get('partial').status, 'partial-fill')
+        # with nothing in flight, updates of unknown orders are not kept
+        self.store.on_update(StreamUpdate({'type': 'diff-orders', 'book': 'btc_mxn', 'sequence': 3, 'payload': [
+            {'d': 3, 'r': '5600', 't': 0, 'a': '0', 'o': 'later', 's': 'cancelled'}]}))
+        self.store.track_placed({'oid': 'later'}, book='btc_mxn', side='buy', major='0.01', price='5600')
+        self.assertTrue('later' in self.store)
+
+    def test_stream_updates(self):
+        self.place('a')
+        self.place('b')
+        self.store.on_update(StreamUpdate({'type': 'diff-orders', 'book': 'btc_mxn', 'sequence': 1, 'payload': [
+            {'d': 1455315979682, 'r': '5600', 't': 0, 'a': '0.004', 'v': '22.4', 'o': 'a', 's': 'open'},
+            {'d': 1455315979682, 'r': '5600', 't': 0, 'o': 'b', 's': 'cancelled'},
+            {'d': 1455315979682, 'r': '5601', 't': 0, 'a': '1', 'v': '5601', 'o': 'other'}]}))
+        self.assertEqual(self.store.get('a').unfilled_amount, Decimal('0.004'))
+        self.assertEqual(self.store.get('a').status, 'partial-fill')
+        self.assertEqual(self.store.get('b'), None)
+        self.assertEqual(len(self.store), 1)
+
+    def test_reconcile(self):
+        self.place('a')
+        self.place('gone')
+        self.store.get('gone').updated_at -= 60
+        self.store.get('a').updated_at -= 60
+        response = FakeResponse(json.dumps({'success': True, 'payload': [
+            open_order('a', unfilled='0.005'), open_order('external', side='sell')]}).encode('utf-8'))
+        with mock.patch('requests.get', return_value=response):
+            self.store.reconcile('btc_mxn')
+        self.assertEqual(sorted(o.oid for o in self.store.orders()), ['a', 'external'])
+        self.assertEqual(self.store.get('a').unfilled_amount, Decimal('0.005'))
+        self.assertEqual(self.store.get('external').side, 'sell')
+
+    def test_reconcile_pages(self):
+        store = bitso.OrderStore(self.api, page_size=2)
+        for oid in ('a', 'b', 'c'):
+            store.track(bitso.TrackedOrder(oid, 'btc_mxn', 'buy'))
+            store.get(oid).updated_at -= 60
+        pages = [[open_order('c'), open_order('b')], [open_order('a')]]
+        responses = [FakeResponse(json.dumps({'success': True, 'payload': page}).encode('utf-8')) for page in pages]
+        with mock.patch('requests.get', side_effect=responses) as get:
+            store.reconcile('btc_mxn')
+        self.assertEqual(get.call_count, 2)
+        self.assertTrue('marker=b' in get.call_args[0][0])
+        self.assertTrue('limit=2' in get.call_args[0][0])
+        self.assertEqual(sorted(o.oid for o in store.orders()), ['a', 'b', 'c'])
+        self.assertEqual(store.get('a').status, 'open')
+
+    def test_cancel(self):
+        self.place('a')
+        response = FakeResponse(b'{"success": true, "payload": ["a"]}')
+        with mock.patch('requests.delete', return_value=response):
+            self.store.cancel_order('a')
+        self.assertFalse('a' in self.store)
+
+
+if __name__ == '__main__':
+    unittest.main()
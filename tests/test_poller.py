@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import os
+import sys
+import unittest
+from datetime import datetime
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mock
+
+import bitso
+from bitso.models import Ticker
+from helpers import Clock, order_book
+
+
+class AdaptivePollerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.api = mock.Mock()
+        self.diffs = []
+
+    def poller(self, books, **kwargs):
+        return bitso.AdaptivePoller(self.api, books, on_diff=self.diffs.append,
+                                    clock=self.clock, **kwargs)
+
+    def test_diffs(self):
+        poller = self.poller(['btc_mxn'])
+        state = poller.books['btc_mxn']
+        self.api.order_book.return_value = order_book([('100', '1'), ('99', '2')], [('101', '1')], 10)
+        poller.poll(state)
+        self.assertEqual(self.diffs[0].previous_sequence, None)
+        self.assertEqual(sorted(self.diffs[0].bids), [(Decimal('99'), Decimal('2')), (Decimal('100'), Decimal('1'))])
+        self.clock.now += 1
+        self.api.order_book.return_value = order_book([('100', '1'), ('99', '3')], [('102', '1')], 12)
+        diff = poller.poll(state)
+        self.assertEqual((diff.sequence, diff.previous_sequence), (12, 10))
+        self.assertEqual(diff.bids, [(Decimal('99'), Decimal('3'))])
+        self.assertEqual(sorted(diff.asks), [(Decimal('101'), 0), (Decimal('102'), Decimal('1'))])
+        # same sequence: nothing emitted
+        self.clock.now += 1
+        self.assertEqual(poller.poll(state), None)
+        self.assertEqual(len(self.diffs), 2)
+
+    def test_interval_follows_change_rate(self):
+        poller = self.poller(['btc_mxn', 'eth_mxn'], budget=10.0, min_interval=0.5, max_interval=60.0, smoothing=1.0)
+        busy = poller.books['btc_mxn']
+        quiet = poller.books['eth_mxn']
+        sequences = {'btc_mxn': 0, 'eth_mxn': 0}
+
+        def fetch(book):
+            if book == 'btc_mxn':
+                sequences[book] += 10
+            return order_book([('100', '1')], [('101', '1')], sequences[book])
+        self.api.order_book.side_effect = fetch
+        for _ in range(5):
+            self.clock.now += poller.run_pending()
+        self.assertEqual(busy.interval, 0.5)
+        self.assertEqual(quiet.interval, 60.0)
+        self.assertTrue(busy.requests > quiet.requests)
+
+    def test_needs_a_book(self):
+        self.assertRaises(bitso.ApiClientError, bitso.AdaptivePoller, None, [])
+
+    def test_budget(self):
+        poller = self.poller(['a', 'b', 'c', 'd'], budget=2.0, min_interval=0.1, smoothing=1.0)
+        sequences = dict((book, 0) for book in poller.books)
+
+        def fetch(book):
+            sequences[book] += 100
+            return order_book([('100', '1')], [('101', '1')], sequences[book])
+        self.api.order_book.side_effect = fetch
+        for _ in range(20):
+            self.clock.now += poller.run_pending()
+        demand = sum(1 / state.interval for state in poller.books.values())
+        self.assertAlmostEqual(demand, 2.0)
+        for state in poller.books.values():
+            self.assertAlmostEqual(state.interval, 2.0)
+
+    def test_ticker_probe(self):
+        poller = self.poller(['btc_mxn'], probe_ticker=True)
+        state = poller.books['btc_mxn']
+        self.api.order_book.return_value = order_book([('100', '1')], [('101', '1')], 10)
+        poller.poll(state)
+        ticker = Ticker._NewFromJsonDict({'book': 'btc_mxn', 'ask': '101', 'bid': '100', 'high': '1',
+                                          'last': '100', 'low': '1', 'vwap': '1', 'volume': '5',
+                                          'created_at': '2017-01-01T00:00:00+00:00'})
+        self.api.ticker.return_value = ticker
+        self.clock.now += 1
+        poller.poll(state)
+        self.clock.now += 1
+        poller.poll(state)
+        self.assertEqual(self.api.order_book.call_count, 2)
+        self.assertEqual(self.api.ticker.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
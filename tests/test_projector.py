@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import json
+import mock
+import os
+import sys
+import unittest
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitso
+from bitso.models import StreamUpdate
+from test_api import FakeResponse
+
+
+def balances_response(mxn_total, mxn_locked, btc_total, btc_locked):
+    return FakeResponse(json.dumps({'success': True, 'payload': {'balances': [
+        {'currency': 'mxn', 'total': mxn_total, 'locked': mxn_locked,
+         'available': str(Decimal(mxn_total) - Decimal(mxn_locked))},
+        {'currency': 'btc', 'total': btc_total, 'locked': btc_locked,
+         'available': str(Decimal(btc_total) - Decimal(btc_locked))}]}}).encode('utf-8'))
+
+
+def fill(tid, oid, major, minor, fee):
+    return bitso.UserTrade(book='btc_mxn', tid=tid, oid=oid, created_at='2016-04-08T17:52:31.000+00:00',
+                           major=major, minor=minor, price='5000', fees_amount=fee,
+                           fees_currency='btc' if Decimal(major) > 0 else 'mxn', side='buy')
+
+
+class BalanceProjectorTest(unittest.TestCase):
+    def setUp(self):
+        self.drifts = []
+        self.projector = bitso.BalanceProjector(bitso.Api('key', 'secret'), on_drift=self.drifts.append)
+        with mock.patch('requests.get', return_value=balances_response('10000', '0', '1', '0')):
+            self.projector.sync()
+
+    def test_order_lifecycle(self):
+        self.projector.order_placed('a', 'btc_mxn', 'buy', major='0.5', price='5000')
+        self.assertEqual(self.projector.available('mxn'), Decimal('7500'))
+        self.assertEqual(self.projector.locked('mxn'), Decimal('2500'))
+        self.projector.trade(fill(1, 'a', '0.2', '-1000', '0.001'))
+        self.projector.trade(fill(1, 'a', '0.2', '-1000', '0.001'))
+        self.assertEqual(self.projector.total('mxn'), Decimal('9000'))
+        self.assertEqual(self.projector.locked('mxn'), Decimal('1500'))
+        self.assertEqual(self.projector.total('btc'), Decimal('1.199'))
+        self.projector.order_cancelled('a')
+        self.assertEqual(self.projector.locked('mxn'), Decimal('0'))
+        self.assertEqual(self.projector.available('mxn'), Decimal('9000'))
+
+    def test_sell_locks_major(self):
+        self.projector.order_placed('b', 'btc_mxn', 'sell', major='0.25', price='6000')
+        self.assertEqual(self.projector.available('btc'), Decimal('0.75'))
+
+    def test_market_orders(self):
+        self.projector.order_placed('m1', 'btc_mxn', 'buy', major='0.01')
+        self.projector.order_placed('m2', 'btc_mxn', 'sell', minor='100')
+        self.assertEqual(self.projector.locked('mxn'), Decimal('0'))
+        self.assertEqual(self.projector.locked('btc'), Decimal('0'))
+        self.projector.order_placed('m3', 'btc_mxn', 'sell', minor='1000', price='5000')
+        self.assertEqual(self.projector.locked('btc'), Decimal('0.2'))
+        self.projector.trade(fill(7, 'm1', '0.01', '-50', '0'))
+        self.assertEqual(self.projector.total('btc'), Decimal('1.01'))
+
+    def test_follows_api_and_stream(self):
+        api = bitso.Api('key', 'secret')
+        api.add_hook(self.projector)
+        placed = FakeResponse(b'{"success": true, "payload": {"oid": "c"}}')
+        with mock.patch('requests.post', return_value=placed):
+            api.place_order(book='btc_mxn', side='buy', order_type='limit', major='0.5', price='5000')
+        self.assertEqual(self.projector.locked('mxn'), Decimal('2500'))
+        trades = StreamUpdate({'type': 'trades', 'book': 'btc_mxn', 'payload': [
+            {'i': 9, 'a': '0.1', 'r': '5000', 'v': '500', 't': 0, 'mo': 'c', 'to': 'x'}]})
+        self.projector.on_update(trades)
+        self.assertEqual(self.projector.total('btc'), Decimal('1.1'))
+        self.assertEqual(self.projector.locked('mxn'), Decimal('2000'))
+        user_trades = FakeResponse(json.dumps({'success': True, 'payload': [
+            {'book': 'btc_mxn', 'tid': 9, 'oid': 'c', 'created_at': '2016-04-08T17:52:31.000+00:00',
+             'major': '0.1', 'minor': '-500', 'price': '5000', 'fees_amount': '0',
+             'fees_currency': 'btc', 'side': 'buy'}]}).encode('utf-8'))
+        with mock.patch('requests.get', return_value=user_trades):
+            api.user_trades(book='btc_mxn')
+        self.assertEqual(self.projector.total('mxn'), Decimal('9500'))
+        cancel = StreamUpdate({'type': 'diff-orders', 'book': 'btc_mxn', 'sequence': 5, 'payload': [
+            {'d': 1, 'r': '5000', 't': 0, 'o': 'c', 's': 'cancelled'}]})
+        self.projector.on_update(cancel)
+        self.assertEqual(self.projector.locked('mxn'), Decimal('0'))
+
+    def test_fill_before_place_response(self):
+        api = bitso.Api('key', 'secret')
+        api.add_hook(self.projector)
+        trades = StreamUpdate({'type': 'trades', 'book': 'btc_mxn', 'payload': [
+            {'i': 11, 'a': '0.01', 'r': '5000', 'v': '50', 't': 1, 'mo': 'x', 'to': 'd'}]})
+        cancel = StreamUpdate({'type': 'diff-orders', 'book': 'btc_mxn', 'sequence': 6, 'payload': [
+            {'d': 1, 'r': '5000', 't': 0, 'o': 'd', 's': 'cancelled'}]})
+
+        def post(*args, **kwargs):
+            # the feed reports the fill before the response is read
+            self.projector.on_update(trades)
+            self.projector.on_update(cancel)
+            return FakeResponse(b'{"success": true, "payload": {"oid": "d"}}')
+        with mock.patch('requests.post', side_effect=post):
+            api.place_order(book='btc_mxn', side='buy', order_type='limit', major='0.02', price='5000')
+        self.assertEqual(self.projector.total('mxn'), Decimal('9950'))
+        self.assertEqual(self.projector.total('btc'), Decimal('1.01'))
+        self.assertEqual(self.projector.locked('mxn'), Decimal('0'))
+        # once nothing is in flight, fills of unknown orders are not kept
+        self.projector.on_update(StreamUpdate({'type': 'trades', 'book': 'btc_mxn', 'payload': [
+            {'i': 12, 'a': '0.01', 'r': '5000', 'v': '50', 't': 1, 'mo': 'x', 'to': 'e'}]}))
+        self.projector.order_placed('e', 'btc_mxn', 'buy', major='0.01', price='5000')
+        self.assertEqual(self.projector.locked('mxn'), Decimal('50'))
+
+    def test_drift(self):
+        self.assertEqual(self.drifts, [])
+        self.projector.order_placed('a', 'btc_mxn', 'buy', major='0.5', price='5000')
+        with mock.patch('requests.get', return_value=balances_response('10000', '2400', '1', '0')):
+            drift = self.projector.sync()
+        self.assertEqual(drift, {u'mxn': (Decimal('0'), Decimal('100'))})
+        self.assertEqual(self.drifts, [drift])
+        self.assertEqual(self.projector.locked('mxn'), Decimal('2400'))
+
+
+if __name__ == '__main__':
+    unittest.main()
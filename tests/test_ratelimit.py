@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import os
+import sys
+import time
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitso
+from bitso.utils import (map_concurrently, chunk_ids)
+
+
+class RateLimiterTest(unittest.TestCase):
+    def test_burst(self):
+        limiter = bitso.RateLimiter(5, per=60.0)
+        for _ in range(5):
+            self.assertTrue(limiter.try_acquire())
+        self.assertFalse(limiter.try_acquire())
+
+    def test_acquire_waits(self):
+        limiter = bitso.RateLimiter(100, per=1.0, burst=1)
+        start = time.time()
+        limiter.acquire()
+        limiter.acquire()
+        self.assertTrue(time.time() - start >= 0.005)
+
+
+class UtilsTest(unittest.TestCase):
+    def test_map_concurrently_keeps_order(self):
+        def square(x):
+            if x == 3:
+                raise ValueError(x)
+            return x * x
+        result = map_concurrently(square, range(6), max_workers=3)
+        self.assertEqual(result[:3], [0, 1, 4])
+        self.assertIsInstance(result[3], ValueError)
+        self.assertEqual(result[4:], [16, 25])
+
+    def test_chunk_ids(self):
+        ids = ['a' * 10] * 7
+        chunks = chunk_ids(ids, base_length=10, max_length=43)
+        self.assertEqual([len(c) for c in chunks], [3, 3, 1])
+        self.assertEqual(sum(chunks, []), ids)
+
+
+if __name__ == '__main__':
+    unittest.main()
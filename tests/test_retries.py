@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import mock
+import os
+import sys
+import threading
+import time
+import unittest
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitso
+from test_api import FakeResponse
+from test_metrics import TICKER
+
+
+class RetryTest(unittest.TestCase):
+    def setUp(self):
+        self.api = bitso.Api('key', 'secret', backoff=0.001, timeouts={'order_book': 30.0})
+
+    def test_timeout_passed(self):
+        with mock.patch('requests.get', return_value=FakeResponse(TICKER)) as get:
+            self.api.ticker('btc_mxn')
+        self.assertEqual(get.call_args[1]['timeout'], 10.0)
+
+    def test_get_retried(self):
+        responses = [requests.ConnectionError('reset'), FakeResponse(b'{}', status_code=503), FakeResponse(TICKER)]
+        with mock.patch('requests.get', side_effect=responses) as get:
+            ticker = self.api.ticker('btc_mxn')
+        self.assertEqual(get.call_count, 3)
+        self.assertIsInstance(ticker, bitso.Ticker)
+        self.assertEqual(self.api.metrics.as_dict()['ticker']['counters']['retries'], 2)
+
+    def test_retries_exhausted(self):
+        with mock.patch('requests.get', side_effect=requests.Timeout('slow')) as get:
+            self.assertRaises(requests.Timeout, self.api.ticker, 'btc_mxn')
+        self.assertEqual(get.call_count, 3)
+        self.assertEqual(self.api.metrics.as_dict()['ticker']['counters']['timeouts'], 3)
+
+    def test_every_attempt_takes_a_token(self):
+        pool = bitso.KeyPool([('key1', 'secret1')])
+        pool.keys[0].rate_limiter = mock.Mock(available=1)
+        api = bitso.Api(rate_limiter=mock.Mock(), key_pool=pool, backoff=0.001)
+        empty = b'{"success": true, "payload": []}'
+        responses = [FakeResponse(b'{}', status_code=429), FakeResponse(b'{}', status_code=429), FakeResponse(empty)]
+        with mock.patch('requests.get', side_effect=responses) as get:
+            self.assertEqual(api.open_orders('btc_mxn'), [])
+        self.assertEqual(get.call_count, 3)
+        self.assertEqual(api.rate_limiter.acquire.call_count, 3)
+        self.assertEqual(pool.keys[0].rate_limiter.acquire.call_count, 3)
+
+    def test_post_not_retried(self):
+        with mock.patch('requests.post', side_effect=requests.ConnectionError('reset')) as post:
+            self.assertRaises(requests.ConnectionError, self.api.place_order,
+                              book='btc_mxn', side='buy', order_type='limit', major='0.1', price='5600')
+        self.assertEqual(post.call_count, 1)
+
+
+class HedgeTest(unittest.TestCase):
+    def test_hedge_wins(self):
+        api = bitso.Api(hedge=True, hedge_delay=0.01)
+        calls = []
+        lock = threading.Lock()
+        def get(url, **kwargs):
+            with lock:
+                calls.append(url)
+                first = len(calls) == 1
+            if first:
+                time.sleep(0.2)
+            return FakeResponse(TICKER)
+        with mock.patch('requests.get', side_effect=get):
+            start = time.time()
+            ticker = api.ticker('btc_mxn')
+            elapsed = time.time() - start
+        self.assertIsInstance(ticker, bitso.Ticker)
+        self.assertTrue(elapsed < 0.15)
+        counters = api.metrics.as_dict()['ticker']['counters']
+        self.assertEqual(counters['hedges'], 1)
+        self.assertEqual(counters['hedge_wins'], 1)
+
+    def test_fast_request_not_hedged(self):
+        api = bitso.Api(hedge=True, hedge_delay=1.0)
+        with mock.patch('requests.get', return_value=FakeResponse(TICKER)) as get:
+            api.ticker('btc_mxn')
+        self.assertEqual(get.call_count, 1)
+        self.assertFalse('hedges' in api.metrics.as_dict()['ticker']['counters'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitso
+from bitso.models import StreamUpdate
+from test_livebook import diff
+
+
+def trades(*tids):
+    return StreamUpdate({'type': 'trades', 'book': 'eth_mxn', 'payload': [
+        {'i': tid, 'a': '0.5', 'r': '5000', 'v': '2500', 't': 1} for tid in tids]})
+
+
+def consume(path, count, queue):
+    reader = bitso.RingReader(path, start='earliest')
+    records = []
+    while len(records) < count:
+        records.extend(reader.read())
+    queue.put([(r.channel, r.id, str(r.amount)) for r in records])
+
+
+class RingBufferTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'stream')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_round_trip(self):
+        publisher = bitso.RingPublisher(self.path, capacity=8)
+        reader = bitso.RingReader(self.path)
+        publisher.on_update(diff(11, ('bid', '100.5', '0.25', 'b1'), ('ask', '101', None, 'a1')))
+        publisher.on_update(trades(42))
+        publisher.on_update(StreamUpdate({'type': 'orders', 'book': 'btc_mxn', 'payload': {'bids': [], 'asks': []}}))
+        records = reader.read()
+        self.assertEqual(len(records), 3)
+        order = records[0]
+        self.assertEqual(order.channel, 'diff-orders')
+        self.assertEqual(order.book, 'btc_mxn')
+        self.assertEqual(order.sequence, 11)
+        self.assertEqual(order.timestamp, 1460000000011)
+        self.assertEqual(order.side, 'bid')
+        self.assertEqual(order.id, 'b1')
+        self.assertEqual(order.status, 'open')
+        self.assertEqual(order.rate, Decimal('100.5'))
+        self.assertEqual(order.amount, Decimal('0.25'))
+        self.assertEqual(records[1].amount, Decimal('0'))
+        self.assertEqual(records[1].status, 'cancelled')
+        trade = records[2]
+        self.assertEqual((trade.channel, trade.book, trade.id, trade.side), ('trades', 'eth_mxn', '42', 'sell'))
+        self.assertEqual(trade.value, Decimal('2500'))
+        self.assertEqual(trade.sequence, None)
+        self.assertEqual(reader.read(), [])
+        self.assertEqual(reader.lag, 0)
+
+    def test_start(self):
+        writer = bitso.RingWriter(self.path, capacity=4)
+        writer.write(trades(1, 2))
+        self.assertEqual(len(bitso.RingReader(self.path).read()), 0)
+        self.assertEqual([r.id for r in bitso.RingReader(self.path, start='earliest').read()], ['1', '2'])
+
+    def test_overrun(self):
+        writer = bitso.RingWriter(self.path, capacity=4)
+        overruns = []
+        reader = bitso.RingReader(self.path, on_overrun=lambda r, missed: overruns.append(missed))
+        writer.write(trades(*range(10)))
+        self.assertEqual(reader.lag, 10)
+        ids = [r.id for r in reader.read()]
+        self.assertEqual(ids, ['7', '8', '9'])
+        self.assertEqual(reader.dropped, 7)
+        self.assertEqual(overruns, [7])
+
+    def test_consumers_in_other_processes(self):
+        writer = bitso.RingWriter(self.path, capacity=64)
+        queue = multiprocessing.Queue()
+        writer.write(trades(*range(20)))
+        processes = [multiprocessing.Process(target=consume, args=(self.path, 20, queue))
+                     for _ in range(2)]
+        for process in processes:
+            process.start()
+        results = [queue.get(timeout=10) for _ in processes]
+        for process in processes:
+            process.join()
+        for records in results:
+            self.assertEqual([r[1] for r in records], [str(i) for i in range(20)])
+            self.assertEqual(records[0], ('trades', '0', '0.50000000'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import os
+import sys
+import unittest
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitso
+from bitso.models import StreamUpdate
+
+
+class RollingTradeStatsTest(unittest.TestCase):
+    def setUp(self):
+        self.stats = bitso.RollingTradeStats(windows=(10, 60))
+
+    def test_windows_expire(self):
+        self.stats.add_trade('btc_mxn', Decimal('100'), Decimal('1'), 'buy', timestamp=0)
+        self.stats.add_trade('btc_mxn', Decimal('110'), Decimal('3'), 'sell', timestamp=5)
+        self.stats.add_trade('btc_mxn', Decimal('120'), Decimal('1'), 'buy', timestamp=12)
+        short = self.stats.window('btc_mxn', 10, now=12)
+        self.assertEqual(short.count, 2)
+        self.assertEqual(short.volume, Decimal('4'))
+        self.assertEqual(short.vwap, Decimal('112.5'))
+        self.assertEqual(short.imbalance, Decimal('-0.5'))
+        longer = self.stats.window('btc_mxn', 60, now=12)
+        self.assertEqual(longer.count, 3)
+        self.assertEqual(self.stats.window('btc_mxn', 10, now=30).count, 0)
+        self.assertEqual(self.stats.window('btc_mxn', 10, now=30).volume, Decimal('0'))
+
+    def test_exact_decimal(self):
+        for i in range(1000):
+            self.stats.add_trade('eth_mxn', Decimal('0.1'), Decimal('0.00000001'), timestamp=i * 0.01)
+        stats = self.stats.window('eth_mxn', 60, now=10)
+        self.assertEqual(stats.volume, Decimal('0.00001000'))
+        self.assertEqual(stats.imbalance, None)
+
+    def test_listener(self):
+        self.stats.on_update(StreamUpdate({'type': 'trades', 'book': 'btc_mxn', 'payload': [
+            {'i': 1, 'a': '0.5', 'r': '5000', 'v': '2500', 't': 1}]}))
+        stats = self.stats.window('btc_mxn', 10)
+        self.assertEqual(stats.buy_volume, Decimal('0.5'))
+        self.assertEqual(stats.imbalance, Decimal('1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
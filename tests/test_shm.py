@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitso
+from bitso import shm
+from bitso.models import OrderBook
+from test_livebook import SNAPSHOT, diff
+
+
+def read_top(path, queue):
+    reader = bitso.SnapshotReader(path)
+    snapshot = reader.read(depth=1)
+    queue.put((snapshot.sequence, snapshot.bids, snapshot.asks))
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'btc_mxn')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_write_read(self):
+        writer = bitso.SnapshotWriter(self.path, 'btc_mxn', depth=2)
+        reader = bitso.SnapshotReader(self.path)
+        self.assertEqual(reader.read().bids, [])
+        writer.write(5, 1460000000000,
+                     [(Decimal('100.5'), Decimal('0.00000001')), (Decimal('100'), Decimal('2')),
+                      (Decimal('99'), Decimal('3'))],
+                     [(Decimal('101'), Decimal('1'))])
+        snapshot = reader.read()
+        self.assertEqual(snapshot.book, 'btc_mxn')
+        self.assertEqual(snapshot.sequence, 5)
+        self.assertEqual(snapshot.timestamp, 1460000000000)
+        self.assertEqual(snapshot.bids, [(Decimal('100.5'), Decimal('0.00000001')),
+                                         (Decimal('100'), Decimal('2'))])
+        self.assertEqual(snapshot.asks, [(Decimal('101'), Decimal('1'))])
+        self.assertEqual(reader.version, 2)
+        writer.close()
+        reader.close()
+
+    def test_torn_read(self):
+        writer = bitso.SnapshotWriter(self.path, 'btc_mxn', depth=2)
+        reader = bitso.SnapshotReader(self.path, max_retries=3)
+        shm.VERSION.pack_into(writer._map, shm.VERSION_OFFSET, 1)
+        self.assertRaises(bitso.ApiClientError, reader.read)
+        shm.VERSION.pack_into(writer._map, shm.VERSION_OFFSET, 2)
+        self.assertEqual(reader.read().version, 2)
+
+    def test_not_a_region(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'x' * 100)
+        self.assertRaises(bitso.ApiClientError, bitso.SnapshotReader, self.path)
+
+    def test_publisher_other_process(self):
+        book = bitso.LiveOrderBook('btc_mxn')
+        publisher = bitso.SnapshotPublisher(book, self.path, depth=5)
+        book.load_snapshot(OrderBook._NewFromJsonDict(SNAPSHOT))
+        book.on_update(diff(11, ('bid', '100.5', '1', 'b9')))
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=read_top, args=(self.path, queue))
+        process.start()
+        sequence, bids, asks = queue.get(timeout=10)
+        process.join()
+        self.assertEqual(sequence, 11)
+        self.assertEqual(bids, [(Decimal('100.5'), Decimal('1'))])
+        self.assertEqual(asks, [(Decimal('101'), Decimal('1'))])
+        publisher.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import os
+import sys
+import time
+import unittest
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitso
+from bitso.errors import ApiError
+from bitso.simulator import MatchingEngine
+from helpers import order_book
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError('timed out')
+        time.sleep(0.005)
+
+
+class MatchingEngineTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = MatchingEngine('btc_mxn', clock=lambda: 1000.0)
+        self.engine.seed(order_book([('99', '1', 'b1')],
+                                    [('101', '1', 'a1'), ('101', '1', 'a2'), ('102', '2', 'a3')], 10))
+
+    def test_price_time_priority(self):
+        order, frames = self.engine.place('buy', 'limit', major='2.5', price='102')
+        self.assertEqual(order.status, 'completed')
+        trades = [f for f in frames if f['type'] == 'trades'][0]['payload']
+        self.assertEqual([(t['mo'], t['a'], t['r']) for t in trades],
+                         [('a1', '1', '101'), ('a2', '1', '101'), ('a3', '0.5', '102')])
+        self.assertEqual([t['t'] for t in trades], [1, 1, 1])
+        diffs = [f for f in frames if f['type'] == 'diff-orders']
+        self.assertEqual([f['sequence'] for f in diffs], [11, 12, 13])
+        self.assertEqual([(f['payload'][0]['o'], f['payload'][0]['s']) for f in diffs],
+                         [('a1', 'completed'), ('a2', 'completed'), ('a3', 'open')])
+        self.assertEqual(diffs[-1]['payload'][0]['a'], '1.5')
+        self.assertEqual(frames[-1]['type'], 'orders')
+        self.assertEqual(frames[-1]['payload']['asks'][0]['r'], '102')
+        self.assertEqual([t['oid'] for t in self.engine.trades], [order.oid] * 3)
+
+    def test_limit_remainder_rests_behind_same_price(self):
+        first, _ = self.engine.place('buy', 'limit', major='3', price='101')
+        self.assertEqual(first.status, 'partially filled')
+        self.assertEqual(first.unfilled_amount, Decimal('1'))
+        second, frames = self.engine.place('buy', 'limit', major='1', price='101')
+        self.assertEqual(second.status, 'open')
+        self.assertEqual(self.engine.best('buy'), Decimal('101'))
+        self.assertEqual([e['oid'] for e in self.engine.levels('buy', aggregate=False)],
+                         [first.oid, second.oid, 'b1'])
+        self.assertEqual(self.engine.levels('buy')[0]['amount'], '2')
+        self.assertEqual(self.engine.cancel(first.oid)[0]['payload'][0]['s'], 'cancelled')
+        self.assertEqual(self.engine.cancel(first.oid), None)
+
+    def test_market_buy_by_minor(self):
+        order, frames = self.engine.place('buy', 'market', minor='202')
+        self.assertEqual(order.status, 'completed')
+        self.assertEqual(order.original_amount, Decimal('2'))
+        self.assertEqual(self.engine.best('sell'), Decimal('102'))
+
+
+class SimulatedExchangeTest(unittest.TestCase):
+    def setUp(self):
+        self.exchange = bitso.SimulatedExchange({'btc_mxn': bitso.synthetic_order_book('btc_mxn', '100000', levels=5)})
+        self.exchange.start()
+        self.api = bitso.Api('key', 'secret')
+        self.exchange.connect(self.api)
+
+    def tearDown(self):
+        self.exchange.stop()
+
+    def test_order_entry_round_trip(self):
+        book = bitso.LiveOrderBook('btc_mxn', api=self.api, mode='L3')
+        self.exchange.attach(book, channels=['diff-orders'])
+        oid = self.api.place_order(book='btc_mxn', side='buy', order_type='limit',
+                                   major='0.1', price='99500')['oid']
+        self.assertEqual([o.oid for o in self.api.open_orders('btc_mxn')], [oid])
+        order = self.api.lookup_order([oid])[0]
+        self.assertEqual((order.status, order.price, order.unfilled_amount),
+                         ('open', Decimal('99500'), Decimal('0.1')))
+        wait_for(lambda: book.order(oid) is not None)
+        self.assertEqual(self.api.cancel_order(oid), [oid])
+        self.assertEqual(self.api.open_orders('btc_mxn'), [])
+        wait_for(lambda: book.order(oid) is None)
+        self.assertEqual(self.api.cancel_order(oid), [])
+
+    def test_fills_reach_user_trades_and_latency_report(self):
+        frames = []
+        self.exchange.subscribe(frames.append, channels=['trades'])
+        oid = self.api.place_order(book='btc_mxn', side='buy', order_type='market', major='0.6')['oid']
+        trades = self.api.user_trades(book='btc_mxn')
+        self.assertEqual(set(t.oid for t in trades), set([oid]))
+        self.assertEqual(sum(t.major for t in trades), Decimal('0.6'))
+        self.assertEqual(self.api.ticker('btc_mxn').last, Decimal('102000'))
+        wait_for(lambda: self.exchange.latency.report()['filled'] == 1)
+        report = self.exchange.latency.report()
+        self.assertEqual(report['orders'], 1)
+        self.assertTrue(report['fill']['min'] >= 0)
+        self.assertEqual(frames[0]['payload'][0]['to'], oid)
+
+    def test_invalid_order(self):
+        with self.assertRaises(ApiError):
+            self.api.place_order(book='btc_mxn', side='buy', order_type='limit', major='1')
+        with self.assertRaises(ApiError):
+            self.api.place_order(book='eth_mxn', side='buy', order_type='market', major='1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import json
+import mock
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitso
+from bitso.tracing import RecordingTracer
+from test_api import FakeResponse
+
+
+DIFF_ORDERS = json.dumps({
+    'type': 'diff-orders',
+    'book': 'btc_mxn',
+    'sequence': 2734,
+    'payload': [{'d': 1455315979682, 'r': '7251.1', 't': 1, 'a': '0.5', 'v': '3625.55', 'o': 'abc'}]
+})
+
+
+class RecordingListener(bitso.Listener):
+    def __init__(self):
+        self.updates = []
+
+    def on_update(self, data):
+        self.updates.append(data)
+
+
+class ApiTracingTest(unittest.TestCase):
+    def test_package_names(self):
+        self.assertTrue(bitso.tracing.RecordingTracer is RecordingTracer)
+        self.assertTrue(bitso.RecordingTracer is RecordingTracer)
+        self.assertIn('Span', bitso.__all__)
+
+    def test_api_span(self):
+        tracer = RecordingTracer()
+        api = bitso.Api(tracer=tracer)
+        response = FakeResponse(b"""{"success": true, "payload": {"asks": [], "bids": [],
+            "updated_at": "2016-04-08T17:52:31.000+00:00", "sequence": "27214"}}""")
+        with mock.patch('requests.get', return_value=response):
+            api.order_book('btc_mxn')
+        span = tracer.spans[-1]
+        self.assertEqual(span.name, 'bitso.api.order_book')
+        self.assertEqual(span.attributes['bitso.book'], 'btc_mxn')
+        self.assertEqual(span.attributes['bitso.endpoint'], 'order_book')
+        self.assertEqual(span.attributes['bitso.sequence'], 27214)
+        self.assertEqual(span.attributes['http.status_code'], 200)
+
+    def test_api_span_records_exception(self):
+        tracer = RecordingTracer()
+        api = bitso.Api(tracer=tracer)
+        response = FakeResponse(b"""{"success": false, "error": "something went wrong"}""")
+        with mock.patch('requests.get', return_value=response):
+            self.assertRaises(bitso.ApiError, api.ticker, 'btc_mxn')
+        self.assertIsInstance(tracer.spans[-1].exception, bitso.ApiError)
+
+
+class ClientTracingTest(unittest.TestCase):
+    def test_message_spans(self):
+        tracer = RecordingTracer()
+        listener = RecordingListener()
+        client = bitso.Client(listener, tracer=tracer)
+        client._on_message(None, DIFF_ORDERS)
+        self.assertEqual(len(listener.updates), 1)
+        self.assertEqual([s.name for s in tracer.spans],
+                         ['bitso.ws.parse', 'bitso.ws.dispatch', 'bitso.ws.message'])
+        message = tracer.spans[-1]
+        self.assertEqual(message.attributes['bitso.book'], 'btc_mxn')
+        self.assertEqual(message.attributes['bitso.sequence'], 2734)
+        self.assertTrue(tracer.spans[0].parent is message)
+
+    def test_no_tracer(self):
+        listener = RecordingListener()
+        client = bitso.Client(listener)
+        client._on_message(None, DIFF_ORDERS)
+        self.assertEqual(listener.updates[0].book, 'btc_mxn')
+        self.assertEqual(listener.updates[0].updates[0].oid, 'abc')
+
+
+if __name__ == '__main__':
+    unittest.main()
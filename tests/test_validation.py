@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+
+#
+#The MIT License (MIT)
+#
+#Copyright (c) 2016 Mario Romero 
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+import json
+import os
+import sys
+import unittest
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mock
+
+import bitso
+from test_api import FakeResponse
+
+
+BOOKS = {
+    "success": True,
+    "payload": [{
+        "book": "btc_mxn",
+        "minimum_amount": ".003",
+        "maximum_amount": "1000.00",
+        "minimum_price": "100.00",
+        "maximum_price": "1000000.00",
+        "minimum_value": "25.00",
+        "maximum_value": "1000000.00"
+    }, {
+        "book": "eth_mxn",
+        "minimum_amount": ".003",
+        "maximum_amount": "1000.00",
+        "minimum_price": "100.0",
+        "maximum_price": "1000000.0",
+        "minimum_value": "25.0",
+        "maximum_value": "1000000.0",
+        "tick_size": "0.05"
+    }]
+}
+
+
+class OrderValidatorTest(unittest.TestCase):
+    def setUp(self):
+        self.validator = bitso.OrderValidator()
+        self.api = bitso.Api('key', 'secret', validator=self.validator)
+        self.validator.load(bitso.AvailableBooks._NewFromJsonDict(BOOKS))
+
+    def counters(self):
+        return self.api.metrics.as_dict()['place_order']['counters']
+
+    def test_quantize(self):
+        order = self.validator.validate(self.api, {
+            'book': 'btc_mxn', 'side': 'buy', 'order_type': 'limit',
+            'major': '0.123456789', 'price': '7000.129'})
+        self.assertEqual(order['major'], Decimal('0.12345678'))
+        # no tick_size published: the price is left as given
+        self.assertEqual(order['price'], Decimal('7000.129'))
+        order = self.validator.validate(self.api, {
+            'book': 'eth_mxn', 'side': 'sell', 'order_type': 'limit',
+            'major': '1', 'price': '200.01'})
+        self.assertEqual(order['price'], Decimal('200.05'))
+        order = self.validator.validate(self.api, {
+            'book': 'btc_mxn', 'side': 'buy', 'order_type': 'market', 'minor': '100.999'})
+        self.assertEqual(order['minor'], Decimal('100.999'))
+        self.assertEqual(self.counters(), {'validated': 3})
+
+    def test_minor_not_rounded(self):
+        # minor has more decimals than minimum_value and is sent as given
+        order = self.validator.validate(self.api, {
+            'book': 'eth_mxn', 'side': 'sell', 'order_type': 'market', 'minor': '100.57'})
+        self.assertEqual(order['minor'], Decimal('100.57'))
+        with self.assertRaises(bitso.ApiClientError) as context:
+            self.validator.validate(self.api, {
+                'book': 'eth_mxn', 'side': 'sell', 'order_type': 'market', 'minor': '24.999'})
+        self.assertEqual(context.exception.args[0]['code'], 'local_minimum_value')
+
+    def test_rejections(self):
+        cases = [
+            ({'book': 'ltc_mxn', 'major': '1', 'price': '200'}, 'book'),
+            ({'major': '0.001', 'price': '7000'}, 'minimum_amount'),
+            ({'major': '1001', 'price': '7000'}, 'maximum_amount'),
+            ({'major': '1', 'price': '99.99'}, 'minimum_price'),
+            ({'major': '0.003', 'price': '7000'}, 'minimum_value'),
+            ({'major': '1', 'minor': '10', 'price': '7000'}, 'amount'),
+            ({'major': '1'}, 'price'),
+        ]
+        for changes, reason in cases:
+            order = {'book': 'btc_mxn', 'side': 'buy', 'order_type': 'limit'}
+            order.update(changes)
+            with self.assertRaises(bitso.ApiClientError) as context:
+                self.validator.validate(self.api, order)
+            self.assertEqual(context.exception.args[0]['code'], 'local_%s' % reason)
+        counters = self.counters()
+        self.assertEqual(counters['rejected'], len(cases))
+        self.assertEqual(counters['rejected_minimum_amount'], 1)
+
+    def test_place_order_never_sent(self):
+        with mock.patch('requests.post') as post:
+            self.assertRaises(bitso.ApiClientError, self.api.place_order,
+                              book='btc_mxn', side='sell', order_type='limit', major='5000', price='7000')
+            self.assertFalse(post.called)
+        response = FakeResponse(b'{"success": true, "payload": {"oid": "qlbga6b600n3xta7"}}')
+        with mock.patch('requests.post', return_value=response) as post:
+            self.api.place_order(book='btc_mxn', side='sell', order_type='limit', major='0.50000000001', price='7000.001')
+        self.assertEqual(post.call_args[1]['json']['major'], '0.50000000')
+        self.assertEqual(post.call_args[1]['json']['price'], '7000.001')
+
+    def test_refresh(self):
+        validator = bitso.OrderValidator(ttl=60)
+        response = FakeResponse(json.dumps(BOOKS).encode('utf-8'))
+        with mock.patch('requests.get', return_value=response) as get:
+            self.assertEqual(validator.book_rules(self.api, 'eth_mxn').price_quantum, Decimal('0.05'))
+            self.assertEqual(validator.book_rules(self.api, 'btc_mxn').price_quantum, None)
+            self.assertEqual(get.call_count, 1)
+            validator.loaded_at -= 61
+            validator.book_rules(self.api, 'btc_mxn')
+            self.assertEqual(get.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()